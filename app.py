@@ -1,6 +1,29 @@
+import math
+import os
+
 import streamlit as st
 import pandas as pd
 import altair as alt
+import numpy as np
+
+import cards
+import column_store
+import condensation
+import cube
+import data_access
+import exports
+import features
+import indexes
+import neighbors
+import optimizer
+import pareto
+import scoring
+import snapshot
+import thumbnails
+import transient
+import walls
+from indexes import Filters
+from import_csv_to_db import categorical_cols, numeric_cols
 
 # =========================
 # CONFIGURATION DE LA PAGE
@@ -109,6 +132,31 @@ st.markdown(
         margin-bottom: 0.25rem;
     }
 
+    /* Métriques clés (4 colonnes) et paires de détails (2 colonnes) */
+    .material-metrics {
+        display: grid;
+        grid-template-columns: repeat(4, 1fr);
+        gap: 0.5rem;
+        margin: 0.5rem 0;
+    }
+
+    .material-pairs {
+        display: grid;
+        grid-template-columns: repeat(2, 1fr);
+        gap: 0.5rem;
+    }
+
+    .material-details {
+        border-top: 1px solid rgba(148, 163, 184, 0.35);
+        padding-top: 0.4rem;
+    }
+
+    .material-details summary {
+        cursor: pointer;
+        color: #9ca3af;
+        font-size: 0.85rem;
+    }
+
     .stTabs [data-baseweb="tab-list"] {
         gap: 1rem;
     }
@@ -134,83 +182,166 @@ st.markdown(
 # CHARGEMENT DES DONNÉES
 # =========================
 
-CSV_FILE = "materiaux_clean.csv"  # ton CSV nettoyé
+DB_FILE = "materiaux.db"  # base créée par import_csv_to_db.py
+
+# Pagination des cartes de l'onglet Parcours
+PAGE_SIZES = [12, 24, 48, 96]
+DEFAULT_PAGE_SIZE = 24
+
+# Classes de l'histogramme des éco-scores (pas de 10 points)
+ECO_BINS = np.arange(0, 101, 10)
 
-@st.cache_data
-def load_data(csv_file: str) -> pd.DataFrame:
-    df = pd.read_csv(csv_file, sep=";", encoding="utf-8-sig")
+# Nombre de matériaux similaires proposés par défaut (recherche de substituts)
+SIMILAR_K = 5
 
-    # Supprimer les colonnes parasites Unnamed
-    unnamed = [c for c in df.columns if c.startswith("Unnamed")]
-    if unnamed:
-        df = df.drop(columns=unnamed)
+# Critères proposés par défaut pour le front de Pareto de l'onglet Statistiques
+# (3 au plus : au-delà, le calcul n'est plus en O(n log n))
+PARETO_DEFAULT = ["cout_eur_m2", "empreinte_carbone_kgco2e_kg", "conductivite_w_mk"]
 
-    # Nettoyage minimal texte
-    for col in df.select_dtypes(include="object").columns:
+def read_database(db_file: str) -> pd.DataFrame:
+    """Lit la table et nettoie les colonnes texte (étape coûteuse, mise en instantané)."""
+    df = data_access.load_table(db_file)
+
+    # Nettoyage minimal texte (NULL → chaîne vide)
+    for col in df.select_dtypes(include=["object", "string"]).columns:
         df[col] = (
             df[col]
+            .fillna("")
             .astype(str)
             .str.strip()
             .str.replace(r"\s+", " ", regex=True)
             .replace({"nan": ""})
         )
 
-    return df
+    # Colonnes à faible cardinalité : codes entiers + vocabulaire trié partagé.
+    # isin, groupby, nunique et listes d'options travaillent alors sur les codes.
+    for col in categorical_cols:
+        if col in df.columns:
+            df[col] = pd.Categorical(df[col], categories=sorted(df[col].dropna().unique()))
+
+    # Colonnes dérivées (biosourcé, R par cm, diffusivité...) stockées avec l'instantané
+    return features.add_derived_features(df)
 
-def add_eco_score(df: pd.DataFrame) -> pd.DataFrame:
+@st.cache_resource
+def load_data(db_file: str, version: str) -> pd.DataFrame:
     """
-    Ajoute une colonne 'eco_score' (0-100) basée sur :
-    - cout_eur_m2 (plus c'est bas, mieux c'est)
-    - empreinte_carbone_kgco2e_kg (plus c'est bas, mieux c'est)
-    - conductivite_w_mk (plus c'est bas, mieux c'est)
-    - contenu_recycle_pct (plus c'est haut, mieux c'est)
+    Jeu de données nettoyé (instantané Parquet) avec son éco-score.
+    Un seul exemplaire par processus, partagé par toutes les sessions : il ne
+    doit jamais être modifié. Les colonnes numériques sont projetées en mémoire
+    depuis .cache/ et donc partagées aussi entre les workers.
     """
-    df = df.copy()
-
-    for col in ["cout_eur_m2", "empreinte_carbone_kgco2e_kg",
-                "contenu_recycle_pct", "conductivite_w_mk"]:
-        if col in df.columns:
-            df[col] = pd.to_numeric(df[col], errors="coerce")
-
-    scores = []
-    # Coût (bas = bien)
-    if "cout_eur_m2" in df.columns and df["cout_eur_m2"].notna().sum() > 0:
-        col = df["cout_eur_m2"]
-        mn, mx = col.min(), col.max()
-        if mx > mn:
-            scores.append((mx - col) / (mx - mn))
-
-    # CO2 (bas = bien)
-    if "empreinte_carbone_kgco2e_kg" in df.columns and df["empreinte_carbone_kgco2e_kg"].notna().sum() > 0:
-        col = df["empreinte_carbone_kgco2e_kg"]
-        mn, mx = col.min(), col.max()
-        if mx > mn:
-            scores.append((mx - col) / (mx - mn))
-
-    # Lambda (bas = bien)
-    if "conductivite_w_mk" in df.columns and df["conductivite_w_mk"].notna().sum() > 0:
-        col = df["conductivite_w_mk"]
-        mn, mx = col.min(), col.max()
-        if mx > mn:
-            scores.append((mx - col) / (mx - mn))
-
-    # Contenu recyclé (haut = bien)
-    if "contenu_recycle_pct" in df.columns and df["contenu_recycle_pct"].notna().sum() > 0:
-        col = df["contenu_recycle_pct"]
-        mn, mx = col.min(), col.max()
-        if mx > mn:
-            scores.append((col - mn) / (mx - mn))
-
-    if scores:
-        eco_raw = sum(scores) / len(scores)
-        df["eco_score"] = (eco_raw * 100).round(1)
-    else:
-        df["eco_score"] = None
+    df = snapshot.load_or_build("materiaux", version, lambda: read_database(db_file))
+    df["eco_score"] = scoring.EcoScorer(df).score(scoring.DEFAULT_PROFILE)
+    return column_store.share_numeric(df, numeric_cols + features.DERIVED_NUMERIC + ["eco_score"], version)
+
+@st.cache_resource
+def load_eco_scorer(version: str, _df: pd.DataFrame) -> scoring.EcoScorer:
+    """Matrice des critères de l'éco-score, construite une fois par version."""
+    return scoring.EcoScorer(_df)
+
+@st.cache_data(max_entries=32)
+def eco_scores(version: str, profile: scoring.EcoProfile, _df: pd.DataFrame) -> np.ndarray:
+    """Éco-scores d'un profil de pondération, mémorisés par version et profil."""
+    return load_eco_scorer(version, _df).score(profile)
+
+@st.cache_resource
+def load_facet_index(version: str, _df: pd.DataFrame) -> indexes.FacetIndex:
+    """Bitmaps des facettes de la barre latérale, construits une fois par version."""
+    return indexes.FacetIndex(_df, list(indexes.FACET_COLUMNS))
+
+@st.cache_resource
+def load_similarity_index(version: str, _df: pd.DataFrame) -> neighbors.SimilarityIndex:
+    """Arbres k-d des propriétés normalisées (catalogue et par type), construits une fois par version."""
+    return neighbors.SimilarityIndex(_df, numeric_cols)
+
+@st.cache_data(max_entries=2000)
+def similar_materials(version: str, position: int, k: int, types: tuple, _df: pd.DataFrame) -> pd.DataFrame:
+    """Les k matériaux les plus proches de la ligne `position` (parmi `types` si non vide), indexés par position."""
+    pos, dist = load_similarity_index(version, _df).query(position, k, list(types) or None)
+    cols = [c for c in ["nom", "type"] if c in _df.columns]
+    return _df[cols].iloc[pos].assign(distance=np.round(dist, 3)).set_axis(pos)
+
+@st.cache_data(max_entries=64)
+def pareto_positions(version: str, profile: scoring.EcoProfile, columns: tuple, positions: np.ndarray, _df: pd.DataFrame) -> np.ndarray:
+    """Front de Pareto des positions filtrées, mémorisé par version, profil d'éco-score, critères et filtre."""
+    return pareto.pareto_front(_df, list(columns), positions)
+
+@st.cache_data(max_entries=5000)
+def card_html(version: str, material_id: int, image_src: str, profile: scoring.EcoProfile, _row: dict) -> str:
+    """HTML d'une carte, mémorisé par matériau, image, profil d'éco-score et version."""
+    return cards.render_card(_row, image_src)
+
+def card_image(row: dict) -> str:
+    """
+    Miniature locale de l'image du matériau. Tant qu'elle n'est pas en cache,
+    on affiche le bandeau et on la fait générer en arrière-plan : l'affichage
+    des cartes ne dépend jamais de l'hébergeur d'origine.
+    Sans Pillow, ou si la miniature n'a pas pu être générée (l'image reste
+    peut-être lisible par le navigateur), on garde l'URL d'origine.
+    """
+    url = cards.get_valid_image_url(row)
+    if not url or not thumbnails.ENABLED or thumbnails.has_failed(url):
+        return url
+    local = thumbnails.thumbnail_url(url)
+    if local is None:
+        thumbnails.request_thumbnail(url)
+        return ""
+    return local
+
+@st.cache_resource
+def load_search_index(version: str, _df: pd.DataFrame) -> indexes.TrigramIndex:
+    """
+    Index trigrammes de l'onglet Gestion (colonnes de la base), construit une
+    fois par version. L'éco-score en est exclu : il dépend du profil de
+    pondération choisi dans la barre latérale, pas seulement de la version.
+    """
+    columns = [c for c in _df.columns if c not in features.DERIVED_COLUMNS and c != "eco_score"]
+    return indexes.TrigramIndex(_df, columns)
 
-    return df
+@st.cache_resource
+def latest_cube() -> dict:
+    """Dernier cube construit (toutes sessions) : base de la mise à jour de la version suivante."""
+    return {}
 
-df = load_data(CSV_FILE)
-df = add_eco_score(df)
+@st.cache_resource
+def load_cube(version: str, _df: pd.DataFrame) -> cube.AggregateCube:
+    """
+    Cube d'agrégats de l'onglet Statistiques, une fois par version : mis à
+    jour depuis la version précédente (lignes modifiées seulement) s'il y en a une.
+    """
+    latest = latest_cube()
+    previous = latest.get("cube")
+    if previous is None:
+        built = cube.AggregateCube(
+            _df,
+            numeric_cols + features.DERIVED_NUMERIC + ["eco_score"],
+            hist_bins={"eco_score": ECO_BINS},
+        )
+    else:
+        built = previous.synced(_df)
+    latest["cube"] = built
+    return built
+
+@st.cache_resource(max_entries=8)
+def load_eco_cube(version: str, profile: scoring.EcoProfile, _df: pd.DataFrame) -> cube.AggregateCube:
+    """Cube d'un profil d'éco-score : seule la colonne eco_score est réagrégée."""
+    base = load_cube(version, load_data(DB_FILE, version))
+    return base.with_column("eco_score", _df["eco_score"])
+
+@st.cache_resource
+def load_key_index(version: str, _df: pd.DataFrame) -> dict:
+    """Tables nom → position et id → position (première occurrence), une fois par version."""
+    return {col: indexes.key_positions(_df[col]) for col in ("nom", "id") if col in _df.columns}
+
+@st.cache_resource
+def load_range_index(version: str, _df: pd.DataFrame) -> indexes.RangeIndex:
+    """Positions triées de chaque propriété numérique, construites une fois par version."""
+    return indexes.RangeIndex(_df, numeric_cols + ["eco_score"])
+
+DATA_VERSION = snapshot.source_version(DB_FILE)
+df = load_data(DB_FILE, DATA_VERSION)
+facet_index = load_facet_index(DATA_VERSION, df)
+range_index = load_range_index(DATA_VERSION, df)
 
 # =========================
 # PETITES FONCTIONS UTILES
@@ -227,23 +358,52 @@ def get_range(df, column, fallback_min=0.0, fallback_max=1.0):
     return fallback_min, fallback_max
 
 
-def fmt(val, suffix=""):
-    """Formatage nombre + suffixe, ou tiret si NaN."""
-    try:
-        if pd.isna(val):
-            return "—"
-        val = float(val)
-        return f"{val:.2f}{suffix}"
-    except Exception:
-        return "—"
-
-
-def get_valid_image_url(row) -> str:
-    """Retourne une URL d'image propre ou '' si rien de valide."""
-    url = str(row.get("image_url", "")).strip()
-    if url.lower().startswith("http://") or url.lower().startswith("https://"):
-        return url
-    return ""
+def category_options(df, column, mask=None):
+    """Valeurs présentes (triées) d'une colonne catégorielle, calculées sur les codes."""
+    if column not in df.columns:
+        return []
+    codes = df[column].cat.codes.to_numpy()
+    if mask is not None:
+        codes = codes[mask]
+    used = np.unique(codes[codes >= 0])
+    return df[column].cat.categories[used].tolist()
+
+
+def sort_positions(df, positions, column, ascending=True):
+    """Trie des positions de lignes selon une colonne (NaN à la fin, comme sort_values)."""
+    values = df[column].iloc[positions].reset_index(drop=True)
+    order = values.sort_values(ascending=ascending, kind="stable").index.to_numpy()
+    return positions[order]
+
+def export_controls(label: str, positions: np.ndarray, name: str, key: str) -> None:
+    """
+    Choix du format + lien de téléchargement. L'export n'est généré qu'à la
+    demande, puis servi depuis le disque par Streamlit (voir exports.py).
+    """
+    c1, c2 = st.columns([1, 3])
+    with c1:
+        fmt = st.selectbox(
+            "Format d'export",
+            exports.available_formats(len(positions)),
+            key=f"export_format_{key}",
+            persist_state="session",
+            label_visibility="collapsed",
+        )
+    ext, _ = exports.FORMATS[fmt]
+    # L'éco-score exporté dépend du profil de pondération
+    version = f"{DATA_VERSION}|{eco_profile!r}"
+    with c2:
+        cached = os.path.exists(exports.export_path(df, positions, fmt, version, name))
+        if not cached and not st.button(label, key=f"export_{key}"):
+            return
+        path = exports.export_file(df, positions, fmt, version, name)
+        if os.path.getsize(path) > exports.STATIC_MAX_BYTES:
+            st.warning("Export trop volumineux pour être servi : affinez les filtres ou choisissez Parquet.")
+            return
+        st.markdown(
+            f'<a href="{exports.export_url(path)}" download="{name}.{ext}">{label} ({name}.{ext})</a>',
+            unsafe_allow_html=True,
+        )
 
 
 # =========================
@@ -253,14 +413,15 @@ st.sidebar.title("🧹 Filtres matériaux")
 
 # Recherche texte
 search_text = st.sidebar.text_input(
-    "Recherche par nom ou description",
-    placeholder="ex : béton, bois, isolant..."
+    "Recherche (nom, description, domaine, sources)",
+    placeholder="ex : béton, bois, isolant...",
+    help="Casse et accents ignorés : « beton » trouve « Béton ». Chaque mot peut être un début de mot.",
 )
 
 st.sidebar.markdown("### Classification")
 
 # Type (multi-sélection)
-type_options = sorted(df["type"].dropna().unique().tolist()) if "type" in df.columns else []
+type_options = category_options(df, "type")
 selected_types = st.sidebar.multiselect(
     "Type principal",
     options=type_options,
@@ -269,14 +430,13 @@ selected_types = st.sidebar.multiselect(
 
 # Sous-type dépendant des types choisis
 if selected_types and "type" in df.columns:
-    df_for_subtypes = df[df["type"].isin(selected_types)]
+    mask_for_subtypes = indexes.bitmap_to_positions(
+        facet_index.facet_bitmap("type", selected_types), len(df)
+    )
 else:
-    df_for_subtypes = df
+    mask_for_subtypes = None
 
-if "sous_type" in df_for_subtypes.columns:
-    subtype_options = sorted(df_for_subtypes["sous_type"].dropna().unique().tolist())
-else:
-    subtype_options = []
+subtype_options = category_options(df, "sous_type", mask_for_subtypes)
 
 selected_subtypes = st.sidebar.multiselect(
     "Sous-type",
@@ -308,57 +468,78 @@ lambda_range = st.sidebar.slider(
 
 st.sidebar.markdown("### Origine")
 
-if "pays_origine" in df.columns:
-    country_options = sorted(df["pays_origine"].dropna().unique().tolist())
-else:
-    country_options = []
+country_options = category_options(df, "pays_origine")
 selected_countries = st.sidebar.multiselect("Pays", country_options)
 
-if "fabricant" in df.columns:
-    manufacturer_options = sorted(df["fabricant"].dropna().unique().tolist())
-else:
-    manufacturer_options = []
+manufacturer_options = category_options(df, "fabricant")
 selected_manufacturers = st.sidebar.multiselect("Fabricant", manufacturer_options)
 
+st.sidebar.markdown("### Éco-score")
+
+with st.sidebar.expander("⚖️ Pondération des critères"):
+    eco_weights = [
+        st.slider(c.label, 0.0, 3.0, c.weight, 0.5, key=f"eco_weight_{c.column}")
+        for c in scoring.DEFAULT_PROFILE.criteria
+    ]
+    eco_robust = st.checkbox(
+        "Normalisation robuste",
+        key="eco_robust",
+        help="Borne chaque critère à ses 5e et 95e centiles : une valeur extrême n'écrase plus les autres.",
+    )
+eco_profile = scoring.DEFAULT_PROFILE.tuned(eco_weights, clip_pct=5.0 if eco_robust else 0.0)
+
+# Profil modifié : nouvel éco-score sur une vue du cadre partagé (copie à
+# l'écriture, seule la colonne eco_score est remplacée)
+if eco_profile != scoring.DEFAULT_PROFILE:
+    df = df.assign(eco_score=eco_scores(DATA_VERSION, eco_profile, df))
+
 if st.sidebar.button("🔄 Réinitialiser tous les filtres"):
     st.experimental_rerun()
 
 # =========================
 # APPLICATION DES FILTRES
 # =========================
-filtered = df.copy()
-
-if search_text:
-    mask_name = filtered["nom"].astype(str).str.contains(search_text, case=False, na=False) if "nom" in filtered.columns else False
-    mask_desc = filtered["description"].astype(str).str.contains(search_text, case=False, na=False) if "description" in filtered.columns else False
-    filtered = filtered[mask_name | mask_desc]
-
-if selected_types and "type" in filtered.columns:
-    filtered = filtered[filtered["type"].isin(selected_types)]
-
-if selected_subtypes and "sous_type" in filtered.columns:
-    filtered = filtered[filtered["sous_type"].isin(selected_subtypes)]
+# Un curseur laissé sur toute la plage ne restreint rien
+filters = Filters(
+    search_text=search_text,
+    types=tuple(selected_types),
+    subtypes=tuple(selected_subtypes),
+    density_range=tuple(density_range) if tuple(density_range) != (dens_min, dens_max) else None,
+    lambda_range=tuple(lambda_range) if tuple(lambda_range) != (lambda_min, lambda_max) else None,
+    countries=tuple(selected_countries),
+    manufacturers=tuple(selected_manufacturers),
+)
 
-# On garde aussi les NaN
-if "masse_volumique_kg_m3" in filtered.columns:
-    mask_density = (
-        filtered["masse_volumique_kg_m3"].between(density_range[0], density_range[1])
-        | filtered["masse_volumique_kg_m3"].isna()
-    )
-    filtered = filtered[mask_density]
+# Facettes (type, sous-type, pays, fabricant) : OU dans une facette, ET entre
+# facettes, directement sur les bitmaps de l'index.
+filtered_bits = facet_index.select(
+    {col: getattr(filters, attr) for col, attr in indexes.FACET_COLUMNS.items()}
+)
 
-if "conductivite_w_mk" in filtered.columns:
-    mask_lambda = (
-        filtered["conductivite_w_mk"].between(lambda_range[0], lambda_range[1])
-        | filtered["conductivite_w_mk"].isna()
+# Curseurs : deux recherches dichotomiques dans l'index d'intervalles
+# (les valeurs manquantes sont conservées)
+for col, attr in indexes.RANGE_COLUMNS.items():
+    bounds = getattr(filters, attr)
+    if bounds is not None and col in range_index.order:
+        filtered_bits = indexes.intersect(filtered_bits, range_index.bitmap(col, *bounds))
+
+# Recherche texte : index plein texte FTS5 de materiaux.db. On garde l'ordre
+# de pertinence pour le tri "Pertinence" de l'onglet Parcours.
+# Une saisie sans aucun mot (espaces, ponctuation) ne filtre rien.
+search_pos = None
+search_hits = data_access.search_ids(filters.search_text, DB_FILE) if filters.search_text else None
+if search_hits is not None:
+    search_pos = indexes.positions_for_ids(df["id"].to_numpy(), search_hits, keep_order=True)
+    filtered_bits = indexes.intersect(
+        filtered_bits, indexes.bitmap_from_positions(search_pos, len(df))
     )
-    filtered = filtered[mask_lambda]
-
-if selected_countries and "pays_origine" in filtered.columns:
-    filtered = filtered[filtered["pays_origine"].isin(selected_countries)]
 
-if selected_manufacturers and "fabricant" in filtered.columns:
-    filtered = filtered[filtered["fabricant"].isin(selected_manufacturers)]
+# Positions des lignes retenues dans df : aucune copie de DataFrame, seules
+# les lignes affichées sont extraites plus loin.
+if filtered_bits is None:
+    filtered_pos = np.arange(len(df))
+else:
+    filtered_pos = indexes.bitmap_to_positions(filtered_bits, len(df))
 
 # =========================
 # EN-TÊTE + MÉTRIQUES
@@ -386,7 +567,7 @@ with header_col2:
     with m2:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
         st.caption("Filtrés")
-        st.subheader(len(filtered))
+        st.subheader(len(filtered_pos))
         st.markdown("</div>", unsafe_allow_html=True)
     with m3:
         st.markdown("<div class='metric-card'>", unsafe_allow_html=True)
@@ -408,220 +589,528 @@ with header_col2:
 st.markdown("---")
 
 # Petit résumé stats sur les matériaux filtrés
-if not filtered.empty:
+if len(filtered_pos) > 0:
     stats_col1, stats_col2, stats_col3, stats_col4 = st.columns(4)
     with stats_col1:
         st.caption("Densité moyenne (filtré)")
-        if "masse_volumique_kg_m3" in filtered.columns:
-            st.write(f"{filtered['masse_volumique_kg_m3'].mean():.1f} kg/m³")
+        if "masse_volumique_kg_m3" in df.columns:
+            st.write(f"{df['masse_volumique_kg_m3'].iloc[filtered_pos].mean():.1f} kg/m³")
         else:
             st.write("—")
     with stats_col2:
         st.caption("λ moyenne (filtré)")
-        if "conductivite_w_mk" in filtered.columns:
-            st.write(f"{filtered['conductivite_w_mk'].mean():.3f} W/m·K")
+        if "conductivite_w_mk" in df.columns:
+            st.write(f"{df['conductivite_w_mk'].iloc[filtered_pos].mean():.3f} W/m·K")
         else:
             st.write("—")
     with stats_col3:
         st.caption("Empreinte CO₂ moyenne (filtré)")
-        if "empreinte_carbone_kgco2e_kg" in filtered.columns:
-            st.write(f"{filtered['empreinte_carbone_kgco2e_kg'].mean():.2f} kgCO₂e/kg")
+        if "empreinte_carbone_kgco2e_kg" in df.columns:
+            st.write(f"{df['empreinte_carbone_kgco2e_kg'].iloc[filtered_pos].mean():.2f} kgCO₂e/kg")
         else:
             st.write("—")
     with stats_col4:
         st.caption("Éco-score moyen")
-        if "eco_score" in filtered.columns and filtered["eco_score"].notna().any():
-            st.write(f"{filtered['eco_score'].mean():.1f} / 100")
+        eco_filtered = df["eco_score"].iloc[filtered_pos] if "eco_score" in df.columns else None
+        if eco_filtered is not None and eco_filtered.notna().any():
+            st.write(f"{eco_filtered.mean():.1f} / 100")
         else:
             st.write("—")
 
-# =========================
-# ONGLETS
-# =========================
-tab1, tab2, tab3, tab4 = st.tabs(
-    ["📂 Parcours des matériaux", "📊 Comparaison", "📈 Statistiques", "🗂 Gestion"]
-)
-
 # =========================
 # ONGLET 1 : PARCOURS
 # =========================
-with tab1:
-    st.markdown(f"### {len(filtered)} matériau(x) affiché(s)")
+def show_similar(nom: str) -> None:
+    """Ouvre la recherche de substituts (onglet Comparaison) sur le matériau `nom`."""
+    st.session_state["similar_ref"] = nom
+    st.session_state["onglet"] = "📊 Comparaison"
+
+def view_parcours():
+    """Onglet Parcours : tri, export et grille de cartes paginée."""
+    st.markdown(f"### {len(filtered_pos)} matériau(x) affiché(s)")
 
     sort_option = st.selectbox(
         "Trier par",
         ["Nom (A→Z)", "Densité (croissante)", "Densité (décroissante)",
-         "λ (croissante)", "λ (décroissante)", "Éco-score (meilleur en premier)"],
+         "λ (croissante)", "λ (décroissante)", "Éco-score (meilleur en premier)",
+         "Pertinence (recherche texte)"],
         key="sort_explorer",
+        persist_state="session",
     )
 
-    filtered_sorted = filtered.copy()
-    if sort_option == "Nom (A→Z)" and "nom" in filtered.columns:
-        filtered_sorted = filtered.sort_values("nom", ascending=True)
-    elif sort_option == "Densité (croissante)" and "masse_volumique_kg_m3" in filtered.columns:
-        filtered_sorted = filtered.sort_values("masse_volumique_kg_m3", ascending=True)
-    elif sort_option == "Densité (décroissante)" and "masse_volumique_kg_m3" in filtered.columns:
-        filtered_sorted = filtered.sort_values("masse_volumique_kg_m3", ascending=False)
-    elif sort_option == "λ (croissante)" and "conductivite_w_mk" in filtered.columns:
-        filtered_sorted = filtered.sort_values("conductivite_w_mk", ascending=True)
-    elif sort_option == "λ (décroissante)" and "conductivite_w_mk" in filtered.columns:
-        filtered_sorted = filtered.sort_values("conductivite_w_mk", ascending=False)
-    elif sort_option == "Éco-score (meilleur en premier)" and "eco_score" in filtered.columns:
-        filtered_sorted = filtered.sort_values("eco_score", ascending=False)
-
-    # bouton export CSV
-    csv_bytes = filtered_sorted.to_csv(index=False, sep=";").encode("utf-8")
-    st.download_button(
-        "📥 Exporter les données filtrées en CSV",
-        data=csv_bytes,
-        file_name="materiaux_filtres.csv",
-        mime="text/csv",
-    )
+    sorted_pos = filtered_pos
+    if sort_option == "Nom (A→Z)" and "nom" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "nom", ascending=True)
+    elif sort_option == "Densité (croissante)" and "masse_volumique_kg_m3" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "masse_volumique_kg_m3", ascending=True)
+    elif sort_option == "Densité (décroissante)" and "masse_volumique_kg_m3" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "masse_volumique_kg_m3", ascending=False)
+    elif sort_option == "λ (croissante)" and "conductivite_w_mk" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "conductivite_w_mk", ascending=True)
+    elif sort_option == "λ (décroissante)" and "conductivite_w_mk" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "conductivite_w_mk", ascending=False)
+    elif sort_option == "Éco-score (meilleur en premier)" and "eco_score" in df.columns:
+        sorted_pos = sort_positions(df, filtered_pos, "eco_score", ascending=False)
+    elif sort_option == "Pertinence (recherche texte)" and search_pos is not None:
+        in_filter = np.zeros(len(df), dtype=bool)
+        in_filter[filtered_pos] = True
+        sorted_pos = search_pos[in_filter[search_pos]]
+
+    # Export des lignes filtrées (dans l'ordre du tri), généré au clic seulement
+    export_controls("📥 Exporter les données filtrées", sorted_pos, "materiaux_filtres", "explorer")
 
     st.write("")
 
-    # Affichage en grille : 2 cartes par ligne
-    records = filtered_sorted.to_dict("records")
+    # Pagination : seules les cartes de la page courante sont construites.
+    # Le numéro de page est gardé d'un rerun à l'autre (clé de widget) et
+    # ramené à la dernière page si les filtres réduisent le nombre de résultats.
+    pg1, pg2, pg3 = st.columns([1, 1, 2])
+    with pg1:
+        page_size = st.selectbox(
+            "Cartes par page",
+            PAGE_SIZES,
+            index=PAGE_SIZES.index(DEFAULT_PAGE_SIZE),
+            key="page_size_explorer",
+            persist_state="session",
+        )
+    nb_pages = max(1, math.ceil(len(sorted_pos) / page_size))
+    if st.session_state.get("page_explorer", 1) > nb_pages:
+        st.session_state["page_explorer"] = nb_pages
+    with pg2:
+        page = st.number_input(
+            "Page",
+            min_value=1,
+            max_value=nb_pages,
+            step=1,
+            key="page_explorer",
+            persist_state="session",
+        )
+    start = (int(page) - 1) * page_size
+    page_pos = sorted_pos[start:start + page_size]
+    with pg3:
+        st.write("")
+        if len(page_pos) > 0:
+            st.caption(
+                f"Matériaux {start + 1}–{start + len(page_pos)} sur {len(sorted_pos)} "
+                f"(page {int(page)}/{nb_pages})"
+            )
+
+    # Affichage en grille : 2 cartes par ligne, une seule chaîne HTML par carte
+    records = df.iloc[page_pos].to_dict("records")
     for i in range(0, len(records), 2):
-        ligne = records[i:i+2]
         cols = st.columns(2)
-        for col, row in zip(cols, ligne):
+        for col, row in zip(cols, records[i:i+2]):
             with col:
-                st.markdown("<div class='material-card'>", unsafe_allow_html=True)
-
-                # Image avec hauteur uniforme ou bandeau par défaut
-                img_url = get_valid_image_url(row)
-                if img_url:
-                    st.markdown(
-                        f"""
-                        <div class="material-img-wrapper">
-                            <img src="{img_url}" class="material-img" alt="{row.get('nom', 'Matériau')}">
-                        </div>
-                        """,
-                        unsafe_allow_html=True,
-                    )
-                else:
-                    st.markdown("<div class='material-banner'></div>", unsafe_allow_html=True)
-
-                st.markdown("<div class='material-content'>", unsafe_allow_html=True)
-
-                # Titre + sous-titre
-                st.markdown(
-                    f"<div class='material-title'>{row.get('nom', 'Matériau')}</div>",
-                    unsafe_allow_html=True,
-                )
-                st.markdown(
-                    f"<div class='material-subtitle'>{row.get('type', '—')} → {row.get('sous_type', '—')}</div>",
-                    unsafe_allow_html=True,
+                st.markdown(card_html(DATA_VERSION, row["id"], card_image(row), eco_profile, row), unsafe_allow_html=True)
+                # Voisins calculés à la demande, dans l'onglet Comparaison
+                st.button(
+                    "🔁 Matériaux similaires",
+                    key=f"similar_{row['id']}",
+                    on_click=show_similar,
+                    args=(row["nom"],),
                 )
 
-                # Description courte
-                desc = row.get("description")
-                if isinstance(desc, str) and desc.strip():
-                    if len(desc) > 160:
-                        short = desc[:160].rstrip() + "..."
-                    else:
-                        short = desc
-                    st.markdown(f"**Résumé :** {short}")
-
-                # Résumé de 4 propriétés clés en frontal
-                col_key1, col_key2, col_key3, col_key4 = st.columns(4)
-                with col_key1:
-                    st.markdown("<div class='metric-label'>Densité</div>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"<div class='metric-value'>{fmt(row.get('masse_volumique_kg_m3'), ' kg/m³')}</div>",
-                        unsafe_allow_html=True,
-                    )
-                with col_key2:
-                    st.markdown("<div class='metric-label'>λ</div>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"<div class='metric-value'>{fmt(row.get('conductivite_w_mk'), ' W/m·K')}</div>",
-                        unsafe_allow_html=True,
-                    )
-                with col_key3:
-                    st.markdown("<div class='metric-label'>CO₂</div>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"<div class='metric-value'>{fmt(row.get('empreinte_carbone_kgco2e_kg'), ' kgCO₂e/kg')}</div>",
-                        unsafe_allow_html=True,
-                    )
-                with col_key4:
-                    st.markdown("<div class='metric-label'>Éco-score</div>", unsafe_allow_html=True)
-                    eco = row.get("eco_score")
-                    eco_txt = "—" if pd.isna(eco) else f"{eco:.1f}/100"
-                    st.markdown(
-                        f"<div class='metric-value'>{eco_txt}</div>",
-                        unsafe_allow_html=True,
-                    )
-
-                # DÉTAILS DANS UN EXPANDER
-                with st.expander("🔍 Afficher plus de détails"):
-                    st.markdown("<div class='section-title'>Propriétés physiques</div>", unsafe_allow_html=True)
-                    col_p1, col_p2 = st.columns(2)
-                    with col_p1:
-                        st.markdown("<div class='metric-label'>Densité</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('masse_volumique_kg_m3'), ' kg/m³')}</div>",
-                            unsafe_allow_html=True,
-                        )
-                    with col_p2:
-                        st.markdown("<div class='metric-label'>Conductivité thermique λ</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('conductivite_w_mk'), ' W/m·K')}</div>",
-                            unsafe_allow_html=True,
-                        )
-
-                    st.markdown("<div class='section-title'>Thermique & mécanique</div>", unsafe_allow_html=True)
-                    col_tm1, col_tm2 = st.columns(2)
-                    with col_tm1:
-                        st.markdown("<div class='metric-label'>Résistance en compression</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('resistance_compression_mpa'), ' MPa')}</div>",
-                            unsafe_allow_html=True,
-                        )
-                    with col_tm2:
-                        st.markdown("<div class='metric-label'>Capacité thermique massique</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('capacite_thermique_j_kgk'), ' J/kg·K')}</div>",
-                            unsafe_allow_html=True,
-                        )
-
-                    st.markdown("<div class='section-title'>Environnement & durabilité</div>", unsafe_allow_html=True)
-                    col_s1, col_s2 = st.columns(2)
-                    with col_s1:
-                        st.markdown("<div class='metric-label'>Contenu recyclé</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('contenu_recycle_pct'), ' %')}</div>",
-                            unsafe_allow_html=True,
-                        )
-                    with col_s2:
-                        st.markdown("<div class='metric-label'>Empreinte carbone</div>", unsafe_allow_html=True)
-                        st.markdown(
-                            f"<div class='metric-value'>{fmt(row.get('empreinte_carbone_kgco2e_kg'), ' kgCO₂e/kg')}</div>",
-                            unsafe_allow_html=True,
-                        )
-                    st.markdown("<div class='metric-label'>Éco-score global</div>", unsafe_allow_html=True)
-                    st.markdown(
-                        f"<div class='metric-value'>{eco_txt}</div>",
-                        unsafe_allow_html=True,
-                    )
-
-                    st.markdown("<div class='section-title'>Origine</div>", unsafe_allow_html=True)
-                    src_parts = []
-                    if isinstance(row.get("fabricant"), str) and row["fabricant"].strip():
-                        src_parts.append(f"Fabricant : {row['fabricant']}")
-                    if isinstance(row.get("pays_origine"), str) and row["pays_origine"].strip():
-                        src_parts.append(f"Pays : {row['pays_origine']}")
-                    if isinstance(row.get("origine"), str) and row["origine"].strip():
-                        src_parts.append(f"Origine : {row['origine']}")
-                    if src_parts:
-                        st.markdown(" | ".join(src_parts))
-
-                st.markdown("</div></div>", unsafe_allow_html=True)
-
 # =========================
 # ONGLET 2 : COMPARAISON
 # =========================
-with tab2:
+# Le constructeur de paroi est un fragment : modifier une couche ne
+# réexécute que cette fonction, pas le chargement, les filtres ni les cartes.
+@st.fragment
+def wall_builder(options):
+    """Scénario de paroi : R total et éco-score moyen des couches choisies."""
+    name_positions = load_key_index(DATA_VERSION, df)["nom"]
+
+    st.markdown("### 🧱 Scénario de paroi (R thermique & éco-score)")
+
+    st.write(
+        "Compose une paroi en choisissant plusieurs couches de matériaux et leurs épaisseurs. "
+        "L’application calcule la **résistance thermique totale R** et un **éco-score moyen de la paroi**."
+    )
+
+    nb_couches = st.number_input(
+        "Nombre de couches",
+        min_value=1,
+        max_value=6,
+        value=3,
+        step=1,
+        key="nb_couches_paroi",
+        persist_state="session",
+    )
+
+    couches = []
+    positions = []
+    for i in range(int(nb_couches)):
+        cmat, cep = st.columns([2, 1])
+        with cmat:
+            mat = st.selectbox(
+                f"Couche {i+1} – matériau",
+                options=options,
+                key=f"paroi_mat_{i}",
+                persist_state="session",
+            )
+        with cep:
+            ep_cm = st.number_input(
+                f"Épaisseur {i+1} (cm)",
+                min_value=0.0,
+                max_value=200.0,
+                value=10.0,
+                step=0.5,
+                key=f"paroi_ep_{i}",
+                persist_state="session",
+            )
+
+        pos = name_positions.get(mat) if mat else None
+        if pos is not None:
+            positions.append((int(pos), float(ep_cm)))
+            # Lecture directe de la ligne via l'index nom → position
+            lam = df["conductivite_w_mk"].iat[pos]
+            eco = df["eco_score"].iat[pos]
+            # R = e / λ, via la résistance par cm précalculée (NaN si λ inconnu)
+            r_cm = df["r_par_cm_m2kw"].iat[pos]
+            R_i = ep_cm * r_cm if pd.notna(r_cm) else None
+            couches.append(
+                {
+                    "Couche": i + 1,
+                    "Matériau": mat,
+                    "Épaisseur (cm)": ep_cm,
+                    "λ (W/m·K)": lam,
+                    "R (m²K/W)": R_i,
+                    "Éco-score": eco,
+                }
+            )
+
+    if couches:
+        df_paroi = pd.DataFrame(couches)
+
+        R_total = df_paroi["R (m²K/W)"].dropna().sum()
+        # Éco-score moyen pondéré par l'épaisseur
+        if df_paroi["Épaisseur (cm)"].sum() > 0 and df_paroi["Éco-score"].notna().any():
+            eco_paroi = (
+                (df_paroi["Épaisseur (cm)"] * df_paroi["Éco-score"])
+                .sum()
+                / df_paroi["Épaisseur (cm)"].sum()
+            )
+        else:
+            eco_paroi = None
+
+        st.markdown("#### Résultats du scénario")
+        colR, colE = st.columns(2)
+        with colR:
+            st.markdown("**Résistance thermique totale R :**")
+            if R_total > 0:
+                st.markdown(f"👉 **R = {R_total:.3f} m²K/W**")
+            else:
+                st.markdown("Données λ insuffisantes pour calculer R.")
+        with colE:
+            st.markdown("**Éco-score moyen de la paroi :**")
+            if eco_paroi is not None:
+                st.markdown(f"👉 **{eco_paroi:.1f} / 100**")
+            else:
+                st.markdown("Données éco-score insuffisantes.")
+
+        st.markdown("#### Détail des couches")
+        st.dataframe(df_paroi, use_container_width=True)
+
+        st.markdown("#### ☀️ Confort d’été (régime dynamique)")
+        st.caption(
+            f"Température extérieure sinusoïdale sur 24 h ({transient.T_EXT_MEAN:.0f} ± "
+            f"{transient.T_EXT_AMPLITUDE:.0f} °C), air intérieur à {transient.T_INT:.0f} °C, "
+            "couches de l’extérieur (couche 1) vers l’intérieur."
+        )
+        dyn = wall_dynamics(DATA_VERSION, tuple(positions), df)
+        if np.isnan(dyn["dephasage_h"][0]):
+            st.markdown("Données λ, masse volumique ou capacité thermique insuffisantes pour la simulation.")
+        else:
+            colL, colA, colT = st.columns(3)
+            colL.metric("Déphasage", f"{dyn['dephasage_h'][0]:.1f} h")
+            colA.metric("Facteur d’amortissement", f"{dyn['amortissement'][0]:.3f}")
+            colT.metric("Surface intérieure max.", f"{dyn['t_si_max'][0]:.1f} °C")
+
+            courbes = pd.DataFrame({
+                "Heure": np.tile(dyn["heures"], 2),
+                "Température (°C)": np.concatenate([dyn["t_ext"], dyn["t_si"][0]]),
+                "Courbe": ["Extérieur"] * len(dyn["heures"]) + ["Surface intérieure"] * len(dyn["heures"]),
+            })
+            chart_dyn = (
+                alt.Chart(courbes)
+                .mark_line()
+                .encode(
+                    x=alt.X("Heure:Q", scale=alt.Scale(domain=[0, 24])),
+                    y=alt.Y("Température (°C):Q", scale=alt.Scale(zero=False)),
+                    color="Courbe:N",
+                )
+                .properties(height=260)
+            )
+            st.altair_chart(chart_dyn, use_container_width=True)
+
+        st.markdown("#### 💧 Risque de condensation (méthode de Glaser)")
+        climat = st.selectbox(
+            "Climat de vérification",
+            options=condensation.CLIMATES["climat"].tolist(),
+            index=1,
+            key="glaser_climat",
+            persist_state="session",
+        )
+        glaser = wall_glaser(DATA_VERSION, tuple(positions), climat, df)
+        if not glaser["valide"][0]:
+            st.markdown("Données λ ou μ insuffisantes pour la vérification.")
+        else:
+            if glaser["condensation"][0, 0]:
+                debit = glaser["condensation_g_m2h"][0, 0].sum()
+                st.warning(
+                    f"Condensation dans la paroi (première interface : après la couche "
+                    f"{glaser['interface'][0, 0]}) — environ {debit:.2f} g/m²·h."
+                )
+            else:
+                st.success("Pas de condensation dans l’épaisseur de la paroi pour ce climat.")
+            if glaser["condensation_surface"][0, 0]:
+                st.warning("Condensation en surface intérieure.")
+
+            profil_cm = np.concatenate([[0.0], np.cumsum([e for _, e in positions])])
+            profils = pd.DataFrame({
+                "Position depuis l’extérieur (cm)": np.tile(profil_cm, 2),
+                "Pression (Pa)": np.concatenate([glaser["p_sat"][0, 0], glaser["p_glaser"][0, 0]]),
+                "Courbe": ["Saturation"] * len(profil_cm) + ["Vapeur"] * len(profil_cm),
+            })
+            chart_glaser = (
+                alt.Chart(profils)
+                .mark_line(point=True)
+                .encode(
+                    x="Position depuis l’extérieur (cm):Q",
+                    y="Pression (Pa):Q",
+                    color="Courbe:N",
+                )
+                .properties(height=260)
+            )
+            st.altair_chart(chart_glaser, use_container_width=True)
+
+@st.cache_data(max_entries=64)
+def wall_dynamics(version: str, layers: tuple, _df: pd.DataFrame) -> dict:
+    """Simulation dynamique d'une paroi ((position, épaisseur cm) par couche), mémorisée par version."""
+    pos = np.array([p for p, _ in layers], dtype=np.int64)
+    e_m = np.array([[e / 100.0 for _, e in layers]])
+
+    def prop(col):
+        return pd.to_numeric(_df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[pos][None, :]
+
+    return transient.simulate(
+        e_m, prop("conductivite_w_mk"), prop("masse_volumique_kg_m3"), prop("capacite_thermique_j_kgk")
+    )
+
+@st.cache_data(max_entries=64)
+def wall_glaser(version: str, layers: tuple, climat: str, _df: pd.DataFrame) -> dict:
+    """Profils de Glaser d'une paroi ((position, épaisseur cm) par couche) pour un climat prédéfini."""
+    pos = np.array([p for p, _ in layers], dtype=np.int64)
+    e_m = np.array([[e / 100.0 for _, e in layers]])
+    c = condensation.CLIMATES.set_index("climat").loc[climat]
+
+    def prop(col):
+        return pd.to_numeric(_df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)[pos][None, :]
+
+    return condensation.glaser(
+        e_m, prop("conductivite_w_mk"), prop("permeabilite_vapeur_mu"),
+        c["t_int"], c["hr_int"], c["t_ext"], c["hr_ext"],
+    )
+
+@st.cache_data(max_entries=16)
+def wall_condensation(version: str, layers: pd.DataFrame, _df: pd.DataFrame) -> pd.DataFrame:
+    """Vérification de Glaser d'un fichier de parois sous tous les climats prédéfinis."""
+    return condensation.evaluate(layers, _df)
+
+@st.cache_data(max_entries=16)
+def wall_results(version: str, profile: scoring.EcoProfile, layers: pd.DataFrame, _df: pd.DataFrame) -> pd.DataFrame:
+    """Résultats d'un fichier de parois, mémorisés par version, profil d'éco-score et contenu."""
+    risk = wall_condensation(version, layers, _df)
+    climats = (
+        risk[risk["condensation"]].groupby("assemblage", sort=False)["climat"].agg(", ".join)
+        .rename("climats_condensation")
+    )
+    return (
+        walls.evaluate(layers, _df)
+        .merge(transient.evaluate(layers, _df), on="assemblage", how="left")
+        .merge(climats, left_on="assemblage", right_index=True, how="left")
+        .fillna({"climats_condensation": ""})
+    )
+
+@st.fragment
+def batch_walls():
+    """Évaluation par lots : R, U, éco-score, CO₂ et coût de chaque paroi d'un fichier."""
+    st.markdown("### 📦 Évaluation de parois par lots")
+
+    st.write(
+        "Importe un fichier CSV ou JSON décrivant des parois, une ligne par couche "
+        "(de l’extérieur vers l’intérieur) : `assemblage`, `id` du matériau, `epaisseur_cm`. "
+        "Chaque paroi reçoit sa **résistance R**, son **coefficient U** "
+        f"(Rsi = {walls.RSI}, Rse = {walls.RSE} m²K/W), son **éco-score pondéré par l’épaisseur**, "
+        "son **CO₂ intrinsèque**, son **coût**, et en régime dynamique (journée d’été) son "
+        "**déphasage**, son **facteur d’amortissement** et sa **température de surface intérieure maximale**. "
+        "Les climats où la méthode de Glaser prévoit une condensation dans la paroi sont listés."
+    )
+
+    upload = st.file_uploader("Fichier de parois", type=["csv", "json"], key="walls_upload")
+    if upload is None:
+        return
+
+    try:
+        layers = walls.read_layers(upload.getvalue(), upload.name)
+    except (ValueError, TypeError) as exc:
+        st.error(f"Fichier illisible : {exc}")
+        return
+    if layers.empty:
+        st.info("Le fichier ne contient aucune couche.")
+        return
+
+    results = wall_results(DATA_VERSION, eco_profile, layers, df)
+
+    st.markdown(f"**{len(results)} paroi(s)** évaluée(s), {len(layers)} couche(s).")
+    if results["ids_inconnus"].any():
+        st.warning("Certaines couches référencent un id absent de la base : elles sont ignorées.")
+    st.dataframe(results, use_container_width=True, height=400)
+
+    st.download_button(
+        "📥 Télécharger les résultats (CSV)",
+        data=lambda: results.to_csv(index=False, sep=";").encode("utf-8"),
+        file_name="parois_resultats.csv",
+        mime="text/csv",
+        key="walls_download",
+        on_click="ignore",
+    )
+
+    with st.expander("💧 Détail de la vérification de condensation (Glaser)"):
+        st.dataframe(
+            condensation.CLIMATES.rename(columns={"hr_int": "HR int. (%)", "hr_ext": "HR ext. (%)"}),
+            hide_index=True,
+        )
+        st.dataframe(wall_condensation(DATA_VERSION, layers, df), use_container_width=True, height=300)
+
+@st.fragment
+def similar_finder(options):
+    """Substituts : plus proches voisins d'un matériau sur ses propriétés normalisées."""
+    st.markdown("### 🔁 Trouver un matériau de substitution")
+
+    st.write(
+        "Les propriétés numériques sont ramenées à leur rang dans le catalogue (0 à 1) ; la distance "
+        "est l’écart quadratique moyen sur les propriétés renseignées des deux côtés."
+    )
+
+    name_positions = load_key_index(DATA_VERSION, df)["nom"]
+    cs1, cs2, cs3 = st.columns([2, 2, 1])
+    with cs1:
+        ref = st.selectbox("Matériau de référence", options=options, key="similar_ref", persist_state="session")
+    with cs2:
+        types = st.multiselect(
+            "Limiter aux types (tous si vide)",
+            options=sorted(df["type"].dropna().astype(str).unique()) if "type" in df.columns else [],
+            key="similar_types",
+            persist_state="session",
+        )
+    with cs3:
+        k = st.number_input("Nombre", min_value=1, max_value=20, value=SIMILAR_K, step=1, key="similar_k", persist_state="session")
+
+    pos = name_positions.get(ref) if ref else None
+    if pos is None:
+        return
+    similaires = similar_materials(DATA_VERSION, int(pos), int(k), tuple(types), df)
+    if similaires.empty:
+        st.info("Aucun matériau comparable (trop peu de propriétés renseignées en commun).")
+        return
+
+    props = [c for c in ["masse_volumique_kg_m3", "conductivite_w_mk", "empreinte_carbone_kgco2e_kg", "cout_eur_m2", "eco_score"] if c in df.columns]
+    rows = np.r_[int(pos), similaires.index.to_numpy()]
+    table = df[["nom"] + props].iloc[rows].assign(distance=np.r_[0.0, similaires["distance"].to_numpy()])
+    st.dataframe(table, use_container_width=True, hide_index=True)
+
+@st.cache_data(max_entries=32)
+def wall_optimum(version: str, target: optimizer.WallTarget, k: int, _df: pd.DataFrame) -> pd.DataFrame:
+    """Meilleures parois pour un cahier des charges, mémorisées par version du catalogue."""
+    return optimizer.optimize(_df, target, k)
+
+@st.fragment
+def wall_optimizer():
+    """Optimiseur : parois atteignant R (ou U) au moindre carbone, coût ou compromis."""
+    st.markdown("### 🎯 Optimiseur de paroi")
+
+    st.write(
+        "Indique une performance à atteindre et une épaisseur maximale : l’optimiseur cherche dans "
+        "tout le catalogue les combinaisons de 1 à 3 couches (épaisseurs au centimètre) qui minimisent "
+        "le **CO₂ intrinsèque**, le **coût** ou un compromis des deux."
+    )
+
+    c1, c2, c3 = st.columns(3)
+    with c1:
+        cible = st.radio(
+            "Performance visée",
+            ["Résistance R", "Coefficient U"],
+            horizontal=True,
+            key="opt_cible",
+            persist_state="session",
+        )
+        if cible == "Résistance R":
+            r_min = st.number_input(
+                "R minimal (m²K/W)", min_value=0.5, max_value=15.0, value=4.0, step=0.5,
+                key="opt_r", persist_state="session",
+            )
+        else:
+            u_max = st.number_input(
+                "U maximal (W/m²K)", min_value=0.07, max_value=2.0, value=0.25, step=0.01,
+                key="opt_u", persist_state="session",
+            )
+            r_min = optimizer.WallTarget.r_from_u(u_max)
+    with c2:
+        max_cm = st.number_input(
+            "Épaisseur maximale (cm)", min_value=1.0, max_value=100.0, value=40.0, step=1.0,
+            key="opt_max_cm", persist_state="session",
+        )
+        max_layers = st.number_input(
+            "Nombre de couches max.", min_value=1, max_value=3, value=3, step=1,
+            key="opt_couches", persist_state="session",
+        )
+    with c3:
+        poids = st.slider(
+            "Poids du carbone (0 = coût seul, 1 = carbone seul)", 0.0, 1.0, 1.0, 0.1,
+            key="opt_carbone", persist_state="session",
+        )
+        k = st.number_input(
+            "Nombre de propositions", min_value=1, max_value=20, value=10, step=1,
+            key="opt_k", persist_state="session",
+        )
+
+    types = st.multiselect(
+        "Types de matériaux autorisés (tous si vide)",
+        options=sorted(df["type"].dropna().astype(str).unique()) if "type" in df.columns else [],
+        key="opt_types",
+        persist_state="session",
+    )
+
+    target = optimizer.WallTarget(
+        r_min=float(r_min),
+        max_cm=float(max_cm),
+        types=tuple(types),
+        carbon_weight=float(poids),
+        max_layers=int(max_layers),
+    )
+    results = wall_optimum(DATA_VERSION, target, int(k), df)
+
+    if results.empty:
+        st.info("Aucune combinaison n’atteint cette performance dans l’épaisseur permise.")
+        return
+
+    st.dataframe(
+        results.drop(columns=["ids", "epaisseurs_cm"]),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.download_button(
+        "📥 Télécharger ces parois (format d’évaluation par lots)",
+        data=lambda: optimizer.to_layers(results).to_csv(index=False, sep=";").encode("utf-8"),
+        file_name="parois_optimisees.csv",
+        mime="text/csv",
+        key="opt_download",
+        on_click="ignore",
+    )
+
+def view_comparaison():
+    """Onglet Comparaison : tableau, graphiques, scénario de paroi, substituts, optimiseur et parois par lots."""
     st.markdown("### 📊 Comparer plusieurs matériaux")
 
     if "nom" in df.columns:
@@ -633,6 +1122,8 @@ with tab2:
         "Sélectionne les matériaux à comparer (max 6)",
         options=options,
         max_selections=6,
+        key="compare_selection",
+        persist_state="session",
     )
 
     if not selected_for_compare:
@@ -650,6 +1141,10 @@ with tab2:
             "empreinte_carbone_kgco2e_kg",
             "cout_eur_m2",
             "eco_score",
+            "r_par_cm_m2kw",
+            "diffusivite_m2_s",
+            "effusivite_ws05_m2k",
+            "co2_m2r_kgco2e",
             "pays_origine",
         ]
         cols_to_show = [c for c in cols_to_show if c in comp_df.columns]
@@ -745,114 +1240,40 @@ with tab2:
             st.altair_chart(chart_eco, use_container_width=True)
 
         st.markdown("---")
-        st.markdown("### 🧱 Scénario de paroi (R thermique & éco-score)")
-
-        st.write(
-            "Compose une paroi en choisissant plusieurs couches de matériaux et leurs épaisseurs. "
-            "L’application calcule la **résistance thermique totale R** et un **éco-score moyen de la paroi**."
-        )
-
-        nb_couches = st.number_input(
-            "Nombre de couches",
-            min_value=1,
-            max_value=6,
-            value=3,
-            step=1,
-            key="nb_couches_paroi",
-        )
+        wall_builder(options)
 
-        couches = []
-        for i in range(int(nb_couches)):
-            cmat, cep = st.columns([2, 1])
-            with cmat:
-                mat = st.selectbox(
-                    f"Couche {i+1} – matériau",
-                    options=options,
-                    key=f"paroi_mat_{i}",
-                )
-            with cep:
-                ep_cm = st.number_input(
-                    f"Épaisseur {i+1} (cm)",
-                    min_value=0.0,
-                    max_value=200.0,
-                    value=10.0,
-                    step=0.5,
-                    key=f"paroi_ep_{i}",
-                )
-
-            if mat:
-                row_mat = df[df["nom"] == mat].iloc[0]
-                lam = pd.to_numeric(row_mat.get("conductivite_w_mk"), errors="coerce")
-                eco = pd.to_numeric(row_mat.get("eco_score"), errors="coerce")
-                if pd.notna(lam) and lam > 0:
-                    R_i = (ep_cm / 100.0) / lam
-                else:
-                    R_i = None
-                couches.append(
-                    {
-                        "Couche": i + 1,
-                        "Matériau": mat,
-                        "Épaisseur (cm)": ep_cm,
-                        "λ (W/m·K)": lam,
-                        "R (m²K/W)": R_i,
-                        "Éco-score": eco,
-                    }
-                )
+    st.markdown("---")
+    similar_finder(options)
 
-        if couches:
-            df_paroi = pd.DataFrame(couches)
+    st.markdown("---")
+    wall_optimizer()
 
-            R_total = df_paroi["R (m²K/W)"].dropna().sum()
-            # Éco-score moyen pondéré par l'épaisseur
-            if df_paroi["Épaisseur (cm)"].sum() > 0 and df_paroi["Éco-score"].notna().any():
-                eco_paroi = (
-                    (df_paroi["Épaisseur (cm)"] * df_paroi["Éco-score"])
-                    .sum()
-                    / df_paroi["Épaisseur (cm)"].sum()
-                )
-            else:
-                eco_paroi = None
-
-            st.markdown("#### Résultats du scénario")
-            colR, colE = st.columns(2)
-            with colR:
-                st.markdown("**Résistance thermique totale R :**")
-                if R_total > 0:
-                    st.markdown(f"👉 **R = {R_total:.3f} m²K/W**")
-                else:
-                    st.markdown("Données λ insuffisantes pour calculer R.")
-            with colE:
-                st.markdown("**Éco-score moyen de la paroi :**")
-                if eco_paroi is not None:
-                    st.markdown(f"👉 **{eco_paroi:.1f} / 100**")
-                else:
-                    st.markdown("Données éco-score insuffisantes.")
-
-            st.markdown("#### Détail des couches")
-            st.dataframe(df_paroi, use_container_width=True)
+    st.markdown("---")
+    batch_walls()
 
 # =========================
 # ONGLET 3 : STATISTIQUES
 # =========================
-with tab3:
+def view_statistiques():
+    """Onglet Statistiques : lectures dans le cube d'agrégats."""
     st.markdown("### 🌱 Statistiques globales (focus biosourcé)")
 
-    def is_biosourced(df_):
-        mask = pd.Series(False, index=df_.index)
-        for col in ["sous_type", "type", "origine"]:
-            if col in df_.columns:
-                mask = mask | df_[col].astype(str).str.contains("biosour", case=False, na=False)
-        return mask
-
-    if not df.empty:
-        bio_mask = is_biosourced(df)
-        df_bio = df[bio_mask].copy()
-        df_other = df[~bio_mask].copy()
+    # Agrégats lus dans le cube (toute la base, ou les seules lignes filtrées)
+    stats_on_filter = st.checkbox(
+        "Limiter aux matériaux filtrés (barre latérale)",
+        key="stats_on_filter",
+        persist_state="session",
+    )
+    stats_pos = filtered_pos if stats_on_filter else None
+    if eco_profile == scoring.DEFAULT_PROFILE:
+        stats_cube = load_cube(DATA_VERSION, df)
     else:
-        df_bio = df_other = df
+        stats_cube = load_eco_cube(DATA_VERSION, eco_profile, df)
+
+    by_bio = stats_cube.summary(["is_biosourced"], stats_pos)
 
-    total = len(df)
-    nb_bio = len(df_bio)
+    total = int(by_bio["lignes"].sum())
+    nb_bio = int(by_bio["lignes"].get(True, 0))
     share_bio = (nb_bio / total * 100) if total > 0 else 0
 
     mc1, mc2, mc3 = st.columns(3)
@@ -867,19 +1288,19 @@ with tab3:
 
     st.markdown("#### Propriétés moyennes : biosourcé vs autres")
 
-    def avg_or_none(df_, col):
-        if col in df_.columns and df_[col].notna().any():
-            return df_[col].mean()
+    def avg_or_none(summary, flag, col):
+        if flag in summary.index and summary.at[flag, f"{col}_count"] > 0:
+            return summary.at[flag, f"{col}_mean"]
         return None
 
-    dens_bio = avg_or_none(df_bio, "masse_volumique_kg_m3")
-    dens_other = avg_or_none(df_other, "masse_volumique_kg_m3")
-    lambda_bio = avg_or_none(df_bio, "conductivite_w_mk")
-    lambda_other = avg_or_none(df_other, "conductivite_w_mk")
-    co2_bio = avg_or_none(df_bio, "empreinte_carbone_kgco2e_kg")
-    co2_other = avg_or_none(df_other, "empreinte_carbone_kgco2e_kg")
-    eco_bio = avg_or_none(df_bio, "eco_score")
-    eco_other = avg_or_none(df_other, "eco_score")
+    dens_bio = avg_or_none(by_bio, True, "masse_volumique_kg_m3")
+    dens_other = avg_or_none(by_bio, False, "masse_volumique_kg_m3")
+    lambda_bio = avg_or_none(by_bio, True, "conductivite_w_mk")
+    lambda_other = avg_or_none(by_bio, False, "conductivite_w_mk")
+    co2_bio = avg_or_none(by_bio, True, "empreinte_carbone_kgco2e_kg")
+    co2_other = avg_or_none(by_bio, False, "empreinte_carbone_kgco2e_kg")
+    eco_bio = avg_or_none(by_bio, True, "eco_score")
+    eco_other = avg_or_none(by_bio, False, "eco_score")
 
     c1, c2, c3, c4 = st.columns(4)
     with c1:
@@ -918,11 +1339,12 @@ with tab3:
 
     with col_a:
         st.caption("Nombre de matériaux par type")
-        if "type" in df.columns:
+        if "type" in stats_cube.groups:
             counts_type = (
-                df.groupby("type")
-                .size()
-                .reset_index(name="nb_materiaux")
+                stats_cube.summary(["type"], stats_pos)["lignes"]
+                .rename("nb_materiaux")
+                .reset_index()
+                .dropna(subset=["type"])
             )
 
             chart_type = (
@@ -944,27 +1366,63 @@ with tab3:
     with col_b:
         st.caption("λ en fonction de la densité (coloré par type)")
         if "masse_volumique_kg_m3" in df.columns and "conductivite_w_mk" in df.columns:
-            scatter = (
-                alt.Chart(df)
-                .mark_circle(size=80)
-                .encode(
-                    x=alt.X("masse_volumique_kg_m3:Q", title="Densité (kg/m³)"),
-                    y=alt.Y("conductivite_w_mk:Q", title="λ (W/m·K)"),
-                    color="type:N" if "type" in df.columns else alt.value("steelblue"),
-                    tooltip=["nom", "type", "masse_volumique_kg_m3", "conductivite_w_mk"],
+            # Front de Pareto des matériaux filtrés sur les critères choisis
+            pareto_options = [c for c in numeric_cols + features.DERIVED_NUMERIC + ["eco_score"] if c in df.columns]
+            pareto_cols = st.multiselect(
+                "Critères du front de Pareto (entourés en noir)",
+                options=pareto_options,
+                default=[c for c in PARETO_DEFAULT if c in pareto_options],
+                key="pareto_criteria",
+                persist_state="session",
+            )
+            too_many = len(pareto_cols) > 3 and len(filtered_pos) > pareto.SFS_MAX_ROWS
+            if too_many:
+                st.warning(
+                    f"Front de Pareto à {len(pareto_cols)} critères non calculé au-delà de "
+                    f"{pareto.SFS_MAX_ROWS} matériaux filtrés : garde 3 critères au plus ou affine les filtres."
                 )
-                .properties(height=300)
+            front_pos = (
+                pareto_positions(DATA_VERSION, eco_profile, tuple(pareto_cols), filtered_pos, df)
+                if pareto_cols and not too_many else np.zeros(0, dtype=np.int64)
             )
-            st.altair_chart(scatter, use_container_width=True)
+
+            # Seules les colonnes tracées sont envoyées au navigateur
+            scatter_cols = [c for c in ["nom", "type", "masse_volumique_kg_m3", "conductivite_w_mk"] if c in df.columns]
+            scatter_rows = np.arange(len(df)) if stats_pos is None else stats_pos
+            scatter_df = df[scatter_cols].iloc[scatter_rows].assign(pareto=np.isin(scatter_rows, front_pos))
+            base = alt.Chart(scatter_df).encode(
+                x=alt.X("masse_volumique_kg_m3:Q", title="Densité (kg/m³)"),
+                y=alt.Y("conductivite_w_mk:Q", title="λ (W/m·K)"),
+                tooltip=["nom", "type", "masse_volumique_kg_m3", "conductivite_w_mk"],
+            )
+            scatter = base.mark_circle(size=80).encode(
+                color="type:N" if "type" in df.columns else alt.value("steelblue"),
+            )
+            front_ring = (
+                base.mark_point(size=220, shape="circle", filled=False, strokeWidth=2, color="black")
+                .transform_filter(alt.datum.pareto)
+            )
+            chart = scatter + front_ring if len(front_pos) else scatter
+            st.altair_chart(chart.properties(height=300), use_container_width=True)
+
+            if pareto_cols and not too_many:
+                maximized = [c for c in pareto_cols if c in pareto.HIGHER_IS_BETTER]
+                sens = f"à minimiser, sauf {', '.join(maximized)} à maximiser" if maximized else "tous à minimiser"
+                st.caption(f"{len(front_pos)} matériau(x) filtré(s) non dominé(s) sur : {', '.join(pareto_cols)} ({sens}).")
+                with st.expander("Matériaux du front de Pareto"):
+                    front_cols = [c for c in ["nom", "type"] + pareto_cols if c in df.columns]
+                    st.dataframe(df[front_cols].iloc[front_pos], use_container_width=True, hide_index=True)
         else:
             st.write("Données insuffisantes pour le nuage de points.")
 
     st.markdown("#### λ biosourcé par type")
-    if not df_bio.empty and "type" in df_bio.columns and "conductivite_w_mk" in df_bio.columns:
+    if nb_bio > 0 and "type" in stats_cube.groups and "conductivite_w_mk" in stats_cube.measures:
+        by_bio_type = stats_cube.summary(["is_biosourced", "type"], stats_pos)
         lambda_by_type_bio = (
-            df_bio.groupby("type")["conductivite_w_mk"]
-            .mean()
-            .reset_index(name="lambda_mean")
+            by_bio_type.loc[True, "conductivite_w_mk_mean"]
+            .rename("lambda_mean")
+            .reset_index()
+            .dropna()
         )
         chart_bio = (
             alt.Chart(lambda_by_type_bio)
@@ -982,13 +1440,16 @@ with tab3:
         st.write("Aucun matériau biosourcé permettant de tracer λ par type.")
 
     st.markdown("#### Distribution des éco-scores")
-    if "eco_score" in df.columns and df["eco_score"].notna().any():
+    eco_counts = stats_cube.histogram("eco_score", stats_pos) if "eco_score" in stats_cube.hist_bins else None
+    if eco_counts is not None and eco_counts["nb"].sum() > 0:
+        # Classes déjà comptées dans le cube : on trace les barres telles quelles
         eco_hist = (
-            alt.Chart(df.dropna(subset=["eco_score"]))
+            alt.Chart(eco_counts)
             .mark_bar()
             .encode(
-                x=alt.X("eco_score:Q", bin=alt.Bin(maxbins=15), title="Éco-score (0–100)"),
-                y=alt.Y("count():Q", title="Nombre de matériaux"),
+                x=alt.X("debut:Q", bin="binned", title="Éco-score (0–100)"),
+                x2="fin:Q",
+                y=alt.Y("nb:Q", title="Nombre de matériaux"),
             )
             .properties(height=250)
         )
@@ -999,7 +1460,25 @@ with tab3:
 # =========================
 # ONGLET 4 : GESTION (explorateur)
 # =========================
-with tab4:
+@st.cache_data(max_entries=64)
+def gestion_positions(version: str, search_raw: str, types: tuple, _df: pd.DataFrame) -> np.ndarray:
+    """Lignes de la vue Gestion, mémorisées par version, recherche et types."""
+    # Masque construit sur df partagé, une seule extraction à la fin
+    manage_mask = np.ones(len(_df), dtype=bool)
+
+    if search_raw:
+        # Sous-chaîne recherchée dans l'index trigrammes (casse et accents ignorés)
+        mask_any = np.zeros(len(_df), dtype=bool)
+        mask_any[load_search_index(version, _df).search(search_raw)] = True
+        manage_mask &= mask_any
+
+    if types and "type" in _df.columns:
+        manage_mask &= _df["type"].isin(types).to_numpy()
+
+    return np.flatnonzero(manage_mask)
+
+def view_gestion():
+    """Onglet Gestion : vue brute filtrable de la base."""
     st.markdown("### 🗂 Gestion / exploration de la base")
 
     st.write(
@@ -1009,33 +1488,31 @@ with tab4:
 
     col_f1, col_f2 = st.columns(2)
     with col_f1:
-        search_raw = st.text_input("🔎 Recherche texte (toutes colonnes)", "")
+        search_raw = st.text_input(
+            "🔎 Recherche texte (toutes colonnes)",
+            "",
+            key="gestion_search",
+            persist_state="session",
+        )
     with col_f2:
         type_raw = st.multiselect(
             "Filtrer par type",
-            options=sorted(df["type"].dropna().unique()) if "type" in df.columns else [],
+            options=category_options(df, "type"),
+            key="gestion_types",
+            persist_state="session",
         )
 
-    df_manage = df.copy()
-
-    if search_raw:
-        mask_any = pd.Series(False, index=df_manage.index)
-        for col in df_manage.columns:
-            mask_any = mask_any | df_manage[col].astype(str).str.contains(search_raw, case=False, na=False)
-        df_manage = df_manage[mask_any]
-
-    if type_raw and "type" in df_manage.columns:
-        df_manage = df_manage[df_manage["type"].isin(type_raw)]
+    manage_pos = gestion_positions(DATA_VERSION, search_raw, tuple(type_raw), df)
+    df_manage = df.iloc[manage_pos]
 
     st.markdown(f"**{len(df_manage)} ligne(s)** après filtrage.")
     st.dataframe(df_manage, use_container_width=True, height=400)
 
-    csv_manage = df_manage.to_csv(index=False, sep=";").encode("utf-8")
-    st.download_button(
-        "📤 Exporter la vue filtrée (CSV brut)",
-        data=csv_manage,
-        file_name="materiaux_gestion.csv",
-        mime="text/csv",
+    export_controls(
+        "📤 Exporter la vue filtrée (brut)",
+        manage_pos,
+        "materiaux_gestion",
+        "gestion",
     )
 
     st.markdown(
@@ -1043,3 +1520,23 @@ with tab4:
         "> il faudrait ajouter une couche de gestion de fichiers côté serveur. "
         "Ici, on reste sur une exploration sécurisée de la base."
     )
+
+
+# =========================
+# NAVIGATION
+# =========================
+# Onglets suivis par Streamlit (clé + rerun) : seul l'onglet ouvert est
+# calculé, les autres ne coûtent rien tant qu'on ne les affiche pas. Les
+# widgets des vues gardent leur valeur quand leur onglet est masqué
+# (persist_state="session").
+VIEWS = {
+    "📂 Parcours des matériaux": view_parcours,
+    "📊 Comparaison": view_comparaison,
+    "📈 Statistiques": view_statistiques,
+    "🗂 Gestion": view_gestion,
+}
+
+for tab, view in zip(st.tabs(list(VIEWS), key="onglet", on_change="rerun"), VIEWS.values()):
+    if tab.open:
+        with tab:
+            view()
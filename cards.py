@@ -0,0 +1,140 @@
+"""
+Rendu HTML des cartes matériaux de l'onglet Parcours.
+
+Chaque carte (image ou bandeau, titre, métriques clés, détails dépliables)
+est produite en une seule chaîne à partir d'un gabarit compilé une fois,
+puis envoyée au navigateur en un seul appel `st.markdown`.
+"""
+from html import escape
+from string import Template
+
+import pandas as pd
+
+
+def fmt(val, suffix=""):
+    """Formatage nombre + suffixe, ou tiret si NaN."""
+    try:
+        if pd.isna(val):
+            return "—"
+        val = float(val)
+        return f"{val:.2f}{suffix}"
+    except Exception:
+        return "—"
+
+
+def get_valid_image_url(row) -> str:
+    """Retourne une URL d'image propre ou '' si rien de valide."""
+    url = str(row.get("image_url", "")).strip()
+    if url.lower().startswith("http://") or url.lower().startswith("https://"):
+        return url
+    return ""
+
+
+def _compile(template: str) -> Template:
+    """
+    Gabarit sur une seule ligne : Markdown interpréterait une ligne HTML
+    indentée après une ligne vide comme un bloc de code.
+    """
+    return Template("".join(line.strip() for line in template.splitlines()))
+
+
+CARD_TEMPLATE = _compile("""
+    <div class="material-card">
+        $banner
+        <div class="material-content">
+            <div class="material-title">$nom</div>
+            <div class="material-subtitle">$type → $sous_type</div>
+            $resume
+            <div class="material-metrics">
+                <div><div class="metric-label">Densité</div><div class="metric-value">$densite</div></div>
+                <div><div class="metric-label">λ</div><div class="metric-value">$lambda_</div></div>
+                <div><div class="metric-label">CO₂</div><div class="metric-value">$co2</div></div>
+                <div><div class="metric-label">Éco-score</div><div class="metric-value">$eco</div></div>
+            </div>
+            <details class="material-details">
+                <summary>🔍 Afficher plus de détails</summary>
+                <div class="section-title">Propriétés physiques</div>
+                <div class="material-pairs">
+                    <div><div class="metric-label">Densité</div><div class="metric-value">$densite</div></div>
+                    <div><div class="metric-label">Conductivité thermique λ</div><div class="metric-value">$lambda_</div></div>
+                </div>
+                <div class="section-title">Thermique &amp; mécanique</div>
+                <div class="material-pairs">
+                    <div><div class="metric-label">Résistance en compression</div><div class="metric-value">$compression</div></div>
+                    <div><div class="metric-label">Capacité thermique massique</div><div class="metric-value">$capacite</div></div>
+                </div>
+                <div class="section-title">Environnement &amp; durabilité</div>
+                <div class="material-pairs">
+                    <div><div class="metric-label">Contenu recyclé</div><div class="metric-value">$recycle</div></div>
+                    <div><div class="metric-label">Empreinte carbone</div><div class="metric-value">$co2</div></div>
+                </div>
+                <div class="metric-label">Éco-score global</div>
+                <div class="metric-value">$eco</div>
+                <div class="section-title">Origine</div>
+                $origine
+            </details>
+        </div>
+    </div>
+""")
+
+IMAGE_TEMPLATE = _compile("""
+    <div class="material-img-wrapper">
+        <img src="$src" class="material-img" alt="$alt" loading="lazy">
+    </div>
+""")
+
+BANNER_HTML = "<div class='material-banner'></div>"
+
+
+def _text(row, key, default="—") -> str:
+    value = row.get(key)
+    if value is None or (not isinstance(value, str) and pd.isna(value)):
+        return default
+    return str(value)
+
+
+def render_card(row, image_src=None) -> str:
+    """
+    HTML complet d'une carte (toutes les valeurs sont échappées).
+    `image_src` remplace l'URL d'origine (miniature locale) ; "" affiche le bandeau.
+    """
+    nom = _text(row, "nom", "Matériau")
+
+    img_url = get_valid_image_url(row) if image_src is None else image_src
+    if img_url:
+        banner = IMAGE_TEMPLATE.substitute(src=escape(img_url), alt=escape(nom))
+    else:
+        banner = BANNER_HTML
+
+    # Description courte
+    resume = ""
+    desc = row.get("description")
+    if isinstance(desc, str) and desc.strip():
+        short = desc[:160].rstrip() + "..." if len(desc) > 160 else desc
+        resume = f"<p><strong>Résumé :</strong> {escape(short)}</p>"
+
+    eco = row.get("eco_score")
+    eco_txt = "—" if pd.isna(eco) else f"{eco:.1f}/100"
+
+    src_parts = []
+    for key, label in (("fabricant", "Fabricant"), ("pays_origine", "Pays"), ("origine", "Origine")):
+        value = row.get(key)
+        if isinstance(value, str) and value.strip():
+            src_parts.append(f"{label} : {escape(value)}")
+    origine = f"<p>{' | '.join(src_parts)}</p>" if src_parts else ""
+
+    return CARD_TEMPLATE.substitute(
+        banner=banner,
+        nom=escape(nom),
+        type=escape(_text(row, "type")),
+        sous_type=escape(_text(row, "sous_type")),
+        resume=resume,
+        densite=escape(fmt(row.get("masse_volumique_kg_m3"), " kg/m³")),
+        lambda_=escape(fmt(row.get("conductivite_w_mk"), " W/m·K")),
+        co2=escape(fmt(row.get("empreinte_carbone_kgco2e_kg"), " kgCO₂e/kg")),
+        eco=escape(eco_txt),
+        compression=escape(fmt(row.get("resistance_compression_mpa"), " MPa")),
+        capacite=escape(fmt(row.get("capacite_thermique_j_kgk"), " J/kg·K")),
+        recycle=escape(fmt(row.get("contenu_recycle_pct"), " %")),
+        origine=origine,
+    )
@@ -0,0 +1,67 @@
+"""
+Colonnes numériques partagées entre processus par projection mémoire (mmap).
+
+Chaque colonne est écrite une fois par version du jeu de données dans un
+fichier `.npy`, puis ouverte en lecture seule avec `np.load(mmap_mode="r")`.
+Les pages sont celles du cache disque du système : tous les workers
+Streamlit et toutes les sessions lisent la même mémoire physique, sans copie.
+"""
+import glob
+import os
+import shutil
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+from snapshot import FORMAT_VERSION, SNAPSHOT_DIR
+
+
+def store_dir(version: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"colonnes-v{FORMAT_VERSION}-{version}")
+
+
+def write_store(df: pd.DataFrame, columns: List[str], version: str) -> str:
+    """Écrit les colonnes en float64 dans le dossier de la version (écriture atomique)."""
+    final = store_dir(version)
+    if os.path.isdir(final):
+        return final
+
+    tmp = f"{final}.{os.getpid()}.tmp"
+    os.makedirs(tmp, exist_ok=True)
+    for col in columns:
+        values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+        np.save(os.path.join(tmp, f"{col}.npy"), values)
+
+    try:
+        os.rename(tmp, final)
+    except OSError:
+        # Un autre worker a écrit la même version entre-temps
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    for old in glob.glob(os.path.join(SNAPSHOT_DIR, "colonnes-*")):
+        if old != final and not old.endswith(".tmp"):
+            shutil.rmtree(old, ignore_errors=True)
+
+    return final
+
+
+def open_store(columns: List[str], version: str) -> Dict[str, np.ndarray]:
+    """Ouvre les colonnes de la version en lecture seule (tableaux numpy mmap)."""
+    path = store_dir(version)
+    return {
+        col: np.load(os.path.join(path, f"{col}.npy"), mmap_mode="r")
+        for col in columns
+    }
+
+
+def share_numeric(df: pd.DataFrame, columns: List[str], version: str) -> pd.DataFrame:
+    """
+    Retourne un DataFrame identique à `df` dont les colonnes `columns` sont
+    des vues sur les fichiers projetés en mémoire (lecture seule).
+    """
+    columns = [c for c in columns if c in df.columns]
+    write_store(df, columns, version)
+    mapped = open_store(columns, version)
+    data = {col: mapped[col] if col in mapped else df[col] for col in df.columns}
+    return pd.DataFrame(data, index=df.index, copy=False)
@@ -0,0 +1,187 @@
+"""
+Risque de condensation dans l'épaisseur des parois (méthode de Glaser).
+
+En régime permanent, pour chaque paroi et chaque climat :
+- la température décroît linéairement avec la résistance thermique cumulée
+  (Rse, e/λ des couches, Rsi) ;
+- la pression de vapeur décroît linéairement avec l'épaisseur d'air
+  équivalente cumulée Sd = μ · e, de l'intérieur vers l'extérieur ;
+- il y a condensation si cette droite dépasse la pression de saturation
+  à une interface entre couches.
+
+Avec condensation, le profil réel est l'enveloppe convexe inférieure des
+pressions imposées (extérieur, intérieur) et des pressions de saturation
+aux interfaces : les points de contact sont les plans de condensation, et
+la variation de pente en chacun donne le débit condensé (EN ISO 13788).
+
+Tout est calculé d'un bloc : parois (N), climats (K) et interfaces (L + 1),
+de l'extérieur (interface 0) vers l'intérieur (interface L).
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+import walls
+from walls import RSE, RSI
+
+# Perméabilité à la vapeur de l'air (kg / m·s·Pa), EN ISO 13788
+DELTA_AIR = 2e-10
+
+# Climats de vérification (intérieur chauffé, extérieur d'hiver)
+CLIMATES = pd.DataFrame(
+    [
+        ("Hiver doux", 20.0, 50.0, 5.0, 85.0),
+        ("Hiver froid", 20.0, 50.0, -5.0, 80.0),
+        ("Grand froid", 20.0, 50.0, -15.0, 80.0),
+        ("Pièce humide", 20.0, 65.0, -5.0, 80.0),
+    ],
+    columns=["climat", "t_int", "hr_int", "t_ext", "hr_ext"],
+)
+
+
+# Colonnes de `evaluate`
+RESULT_COLUMNS = ["assemblage", "climat", "condensation", "interface", "debit_g_m2h", "marge_min_pa", "condensation_surface"]
+
+
+def saturation_pressure(t: np.ndarray) -> np.ndarray:
+    """Pression de vapeur saturante (Pa), au-dessus de l'eau ou de la glace (EN ISO 13788)."""
+    t = np.asarray(t, dtype="float64")
+    water = 610.5 * np.exp(17.269 * t / (237.3 + t))
+    ice = 610.5 * np.exp(21.875 * t / (265.5 + t))
+    return np.where(t >= 0, water, ice)
+
+
+def _lower_envelope(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """
+    Enveloppe convexe inférieure de points (…, P) d'abscisses croissantes,
+    évaluée en chaque point : min de y_k et des cordes (i < k < j) au-dessus de x_k.
+    """
+    p = x.shape[-1]
+    env = y.copy()
+    xi, yi = x[..., :, None], y[..., :, None]
+    xj, yj = x[..., None, :], y[..., None, :]
+    span = xj - xi
+    slope = np.divide(yj - yi, span, out=np.zeros_like(span), where=span > 0)
+    idx = np.arange(p)
+    for k in range(1, p - 1):
+        pairs = (idx[:, None] < k) & (idx[None, :] > k) & (span > 0)
+        chord = np.where(pairs, yi + slope * (x[..., k, None, None] - xi), np.inf)
+        env[..., k] = np.minimum(env[..., k], chord.min(axis=(-2, -1)))
+    return env
+
+
+def glaser(
+    e_m: np.ndarray,
+    lam: np.ndarray,
+    mu: np.ndarray,
+    t_int,
+    hr_int,
+    t_ext,
+    hr_ext,
+) -> Dict[str, np.ndarray]:
+    """
+    Profils de Glaser de N parois (tableaux (N, L), épaisseur 0 = pas de
+    couche) sous K climats (scalaires ou tableaux (K,), HR en %).
+    Les profils sont de forme (N, K, L + 1) ; une paroi dont une couche n'a
+    pas λ ou μ (μ < 1 compté comme inconnu) n'est pas valide : profils NaN,
+    aucune condensation signalée.
+    """
+    e_m = np.nan_to_num(np.atleast_2d(np.asarray(e_m, dtype="float64")))
+    lam = np.atleast_2d(np.asarray(lam, dtype="float64"))
+    mu = np.atleast_2d(np.asarray(mu, dtype="float64"))
+    t_int, hr_int, t_ext, hr_ext = (np.atleast_1d(np.asarray(v, dtype="float64")) for v in (t_int, hr_int, t_ext, hr_ext))
+
+    present = e_m > 0
+    valid = ~(present & ~((lam > 0) & (mu >= 1))).any(axis=1) & present.any(axis=1)
+    nan = np.where(valid, 1.0, np.nan)
+
+    # Abscisses des interfaces : R thermique et Sd cumulés depuis l'extérieur
+    r_layer = np.where(present, e_m / np.where(lam > 0, lam, 1.0), 0.0)
+    sd_layer = np.where(present, e_m * np.where(mu >= 1, mu, 1.0), 0.0)
+    zero = np.zeros((len(e_m), 1))
+    r_cum = np.hstack([zero, np.cumsum(r_layer, axis=1)])
+    sd_cum = np.hstack([zero, np.cumsum(sd_layer, axis=1)])
+    r_total = RSE + r_cum[:, -1] + RSI
+
+    # (N, K, L + 1) : températures, saturation, vapeur sans condensation
+    share = ((RSE + r_cum) / r_total[:, None])[:, None, :]
+    temperature = t_ext[None, :, None] + (t_int - t_ext)[None, :, None] * share
+    p_sat = saturation_pressure(temperature)
+    p_ext = hr_ext / 100.0 * saturation_pressure(t_ext)
+    p_int = hr_int / 100.0 * saturation_pressure(t_int)
+    sd_share = np.divide(sd_cum, sd_cum[:, -1:], out=np.zeros_like(sd_cum), where=sd_cum[:, -1:] > 0)
+    p_vap = p_ext[None, :, None] + (p_int - p_ext)[None, :, None] * sd_share[:, None, :]
+
+    # Condensation interstitielle : interfaces entre couches seulement
+    excess = (p_vap - p_sat)[..., 1:-1]
+    condensation = (excess > 0).any(axis=-1) & valid[:, None]
+    first = np.where(condensation, np.argmax(excess > 0, axis=-1) + 1, -1)
+
+    # Profil de Glaser : enveloppe convexe sous les saturations intérieures
+    x = np.broadcast_to(sd_cum[:, None, :], p_vap.shape)
+    points = p_sat.copy()
+    points[..., 0] = p_ext[None, :]
+    points[..., -1] = p_int[None, :]
+    p_glaser = _lower_envelope(x, points)
+
+    # Débit condensé en chaque interface : flux entrant (côté intérieur)
+    # moins flux sortant (côté extérieur) ; les couches d'épaisseur nulle
+    # sont sautées en reprenant la pente voisine non dégénérée
+    dx = np.diff(x, axis=-1)
+    flux = np.divide(np.diff(p_glaser, axis=-1), dx, out=np.full(dx.shape, np.nan), where=dx > 0)
+    seg = np.arange(dx.shape[-1])
+    left = np.maximum.accumulate(np.where(dx > 0, seg, -1), axis=-1)
+    right = np.minimum.accumulate(np.where(dx > 0, seg, dx.shape[-1])[..., ::-1], axis=-1)[..., ::-1]
+    flux_out = np.take_along_axis(flux, np.clip(left, 0, None), axis=-1)
+    flux_in = np.take_along_axis(flux, np.clip(right, None, dx.shape[-1] - 1), axis=-1)
+    rate = np.zeros(p_vap.shape)
+    inner = (left[..., :-1] >= 0) & (right[..., 1:] < dx.shape[-1]) & (dx[..., :-1] > 0)
+    rate[..., 1:-1] = np.where(inner, flux_in[..., 1:] - flux_out[..., :-1], 0.0)
+    rate = np.maximum(np.nan_to_num(rate), 0.0) * DELTA_AIR * 3600 * 1000
+
+    scale = nan[:, None, None]
+    return {
+        "sd_m": sd_cum * nan[:, None],
+        "temperature": temperature * scale,
+        "p_sat": p_sat * scale,
+        "p_vap": p_vap * scale,
+        "p_glaser": p_glaser * scale,
+        "condensation": condensation,
+        "interface": first,
+        "condensation_g_m2h": rate * scale,
+        "condensation_surface": (p_int[None, :] > p_sat[..., -1]) & valid[:, None],
+        "valide": valid,
+    }
+
+
+def evaluate(layers: pd.DataFrame, df: pd.DataFrame, climates: pd.DataFrame = CLIMATES) -> pd.DataFrame:
+    """Une ligne par paroi et par climat : risque de condensation et débit condensé."""
+    names, e_m, props = walls.layer_arrays(layers, df, ["conductivite_w_mk", "permeabilite_vapeur_mu"])
+    if not len(names):
+        return pd.DataFrame(columns=RESULT_COLUMNS)
+    out = glaser(
+        e_m,
+        props["conductivite_w_mk"],
+        props["permeabilite_vapeur_mu"],
+        climates["t_int"].to_numpy(),
+        climates["hr_int"].to_numpy(),
+        climates["t_ext"].to_numpy(),
+        climates["hr_ext"].to_numpy(),
+    )
+    n, k = out["condensation"].shape
+    valid = np.repeat(out["valide"], k)
+    margin = (out["p_sat"] - out["p_vap"])[..., 1:-1]
+    return pd.DataFrame({
+        "assemblage": np.repeat(np.asarray(names), k),
+        "climat": np.tile(climates["climat"].to_numpy(), n),
+        "condensation": out["condensation"].reshape(-1),
+        "interface": out["interface"].reshape(-1),
+        "debit_g_m2h": np.where(valid, np.round(out["condensation_g_m2h"].sum(axis=-1).reshape(-1), 3), np.nan),
+        "marge_min_pa": np.where(
+            valid & (margin.shape[-1] > 0),
+            np.round(np.min(margin, axis=-1, initial=np.inf).reshape(-1), 0),
+            np.nan,
+        ),
+        "condensation_surface": out["condensation_surface"].reshape(-1),
+    })
@@ -0,0 +1,341 @@
+"""
+Cube d'agrégats de l'onglet Statistiques.
+
+Les lignes sont réparties en cellules (une par combinaison type × sous-type ×
+pays × biosourcé présente). Pour chaque cellule et chaque propriété
+numérique, on garde nombre de valeurs, somme, somme des carrés, minimum et
+maximum (plus un histogramme pour certaines colonnes). Toute statistique du
+tableau de bord (effectifs, moyennes, écarts-types, extrêmes, histogrammes)
+par n'importe quel regroupement de ces dimensions se déduit alors des
+cellules, sans reparcourir les lignes.
+
+Ces agrégats s'additionnent : un ajout de lignes met le cube à jour sans le
+reconstruire ; une suppression retranche nombres et sommes, et ne relit que
+les lignes restantes des cellules touchées pour leurs extrêmes. Une nouvelle
+version du catalogue ne traite ainsi que les lignes modifiées (`synced`).
+Un sous-ensemble filtré s'agrège en ne lisant que ses propres lignes, et une
+colonne recalculée (éco-score repondéré) ne réagrège que cette colonne.
+"""
+from typing import Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+GROUP_COLUMNS = ["type", "sous_type", "pays_origine", "is_biosourced"]
+
+# Statistiques additives conservées par cellule et par propriété
+STATS = ("count", "sum", "sumsq", "min", "max")
+
+
+def _cell_key(labels) -> tuple:
+    """Clé de cellule hashable (valeur manquante → None)."""
+    return tuple(None if pd.isna(k) else k for k in labels)
+
+
+def _row_ids(frame: pd.DataFrame) -> np.ndarray:
+    """Identifiant des lignes : colonne `id`, ou à défaut l'index."""
+    return frame["id"].to_numpy() if "id" in frame.columns else frame.index.to_numpy()
+
+
+class AggregateCube:
+    """Agrégats par cellule d'un DataFrame (construit une fois par version)."""
+
+    def __init__(
+        self,
+        df: pd.DataFrame,
+        measures: Sequence[str],
+        hist_bins: Optional[Dict[str, Sequence[float]]] = None,
+        groups: Sequence[str] = GROUP_COLUMNS,
+    ):
+        self.groups = [g for g in groups if g in df.columns]
+        self.measures = [m for m in measures if m in df.columns]
+        self.hist_bins = {
+            c: np.asarray(edges, dtype="float64")
+            for c, edges in (hist_bins or {}).items() if c in df.columns
+        }
+
+        # Clé combinée des dimensions (code + 1, 0 = valeur manquante)
+        key = np.zeros(len(df), dtype=np.int64)
+        labels = {}
+        for g in self.groups:
+            cat = df[g].astype("category")
+            labels[g] = cat.cat.categories
+            key = key * (len(labels[g]) + 1) + cat.cat.codes.to_numpy().astype(np.int64) + 1
+        cell_keys, row_cells = np.unique(key, return_inverse=True)
+        self.row_cells = row_cells.reshape(-1).astype(np.int32)
+
+        # Libellés des dimensions de chaque cellule (décodage de la clé)
+        keys = {}
+        rest = cell_keys
+        for g in reversed(self.groups):
+            size = len(labels[g]) + 1
+            codes = rest % size - 1
+            rest = rest // size
+            keys[g] = pd.Categorical.from_codes(codes, categories=labels[g])
+        self.keys = pd.DataFrame({g: keys[g] for g in self.groups})
+        self._cells = {
+            _cell_key(row): i for i, row in enumerate(self.keys.itertuples(index=False, name=None))
+        }
+
+        # Vues (sans copie) des colonnes, pour les sous-ensembles filtrés
+        self._values = self._frame_values(df)
+        self.stats = self._aggregate(self.row_cells, self._values, len(self.keys))
+
+        # Identifiant et empreinte du contenu de chaque ligne (mises à jour)
+        self.row_ids = _row_ids(df)
+        self.row_hash = self._row_hash(df)
+
+    @property
+    def n_cells(self) -> int:
+        return len(self.keys)
+
+    def _frame_values(self, frame: pd.DataFrame) -> Dict[str, np.ndarray]:
+        return {
+            c: pd.to_numeric(frame[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            for c in sorted(set(self.measures) | set(self.hist_bins))
+        }
+
+    def _row_hash(self, frame: pd.DataFrame) -> np.ndarray:
+        columns = self.groups + sorted(set(self.measures) | set(self.hist_bins))
+        return pd.util.hash_pandas_object(frame[columns], index=False).to_numpy()
+
+    # -------------------------
+    # CALCUL DES AGRÉGATS
+    # -------------------------
+    def _aggregate(
+        self,
+        cells: np.ndarray,
+        values: Dict[str, np.ndarray],
+        n_cells: int,
+        measures: Optional[Sequence[str]] = None,
+        hist_columns: Optional[Sequence[str]] = None,
+    ) -> Dict[str, np.ndarray]:
+        """
+        Agrégats par cellule des lignes données (`cells` : cellule de chaque
+        ligne), pour toutes les propriétés ou seulement `measures` / `hist_columns`.
+        """
+        measures = self.measures if measures is None else measures
+        hist_columns = list(self.hist_bins) if hist_columns is None else hist_columns
+        shape = (n_cells, len(measures))
+        out = {
+            "rows": np.bincount(cells, minlength=n_cells).astype(np.int64),
+            "count": np.zeros(shape, dtype=np.int64),
+            "sum": np.zeros(shape),
+            "sumsq": np.zeros(shape),
+            "min": np.full(shape, np.nan),
+            "max": np.full(shape, np.nan),
+        }
+
+        # Un seul tri par cellule, partagé par toutes les propriétés
+        order = np.argsort(cells, kind="stable")
+        sorted_cells = cells[order]
+        starts = np.flatnonzero(np.r_[True, sorted_cells[1:] != sorted_cells[:-1]]) if len(cells) else np.zeros(0, dtype=np.int64)
+        present = sorted_cells[starts]
+
+        for j, m in enumerate(measures):
+            v = values[m]
+            ok = ~np.isnan(v)
+            out["count"][:, j] = np.bincount(cells[ok], minlength=n_cells)
+            out["sum"][:, j] = np.bincount(cells[ok], weights=v[ok], minlength=n_cells)
+            out["sumsq"][:, j] = np.bincount(cells[ok], weights=v[ok] ** 2, minlength=n_cells)
+            if len(starts):
+                # fmin / fmax ignorent les NaN (NaN seulement si toute la cellule l'est)
+                out["min"][present, j] = np.fmin.reduceat(v[order], starts)
+                out["max"][present, j] = np.fmax.reduceat(v[order], starts)
+
+        for c in hist_columns:
+            edges = self.hist_bins[c]
+            nb = len(edges) - 1
+            v = values[c]
+            ok = (v >= edges[0]) & (v <= edges[-1])
+            bins = np.clip(np.searchsorted(edges, v[ok], side="right") - 1, 0, nb - 1)
+            out[f"hist:{c}"] = np.bincount(cells[ok] * nb + bins, minlength=n_cells * nb).reshape(n_cells, nb)
+
+        return out
+
+    def _subset_stats(self, positions: Optional[np.ndarray]) -> Dict[str, np.ndarray]:
+        if positions is None:
+            return self.stats
+        positions = np.asarray(positions, dtype=np.int64)
+        return self._aggregate(
+            self.row_cells[positions],
+            {c: v[positions] for c, v in self._values.items()},
+            self.n_cells,
+        )
+
+    # -------------------------
+    # MISES À JOUR INCRÉMENTALES
+    # -------------------------
+    # Les lignes ajoutées sont placées à la fin : les requêtes par `positions`
+    # suivent l'ordre courant des lignes (voir `synced` pour le réaligner).
+    def _cell_ids(self, frame: pd.DataFrame) -> np.ndarray:
+        """Cellule de chaque ligne de `frame` (les nouvelles combinaisons sont ajoutées)."""
+        ids = np.empty(len(frame), dtype=np.int64)
+        new_keys = []
+        for i, key in enumerate(frame[self.groups].itertuples(index=False, name=None)):
+            key = _cell_key(key)
+            if key not in self._cells:
+                self._cells[key] = self.n_cells + len(new_keys)
+                new_keys.append(key)
+            ids[i] = self._cells[key]
+
+        if new_keys:
+            added = pd.DataFrame(new_keys, columns=self.groups)
+            self.keys = pd.concat(
+                [self.keys.astype(object), added.astype(object)], ignore_index=True
+            )
+            for g in self.groups:
+                self.keys[g] = self.keys[g].astype("category")
+            for name, arr in self.stats.items():
+                pad = np.zeros((len(new_keys),) + arr.shape[1:], dtype=arr.dtype)
+                if name in ("min", "max"):
+                    pad[:] = np.nan
+                self.stats[name] = np.concatenate([arr, pad])
+        return ids
+
+    def add_rows(self, frame: pd.DataFrame) -> None:
+        """Ajoute les lignes de `frame` aux agrégats (sommes et extrêmes exacts)."""
+        cells = self._cell_ids(frame)
+        values = self._frame_values(frame)
+        delta = self._aggregate(cells, values, self.n_cells)
+        for name in self.stats:
+            if name == "min":
+                self.stats[name] = np.fmin(self.stats[name], delta[name])
+            elif name == "max":
+                self.stats[name] = np.fmax(self.stats[name], delta[name])
+            else:
+                self.stats[name] = self.stats[name] + delta[name]
+
+        self.row_cells = np.concatenate([self.row_cells, cells.astype(np.int32)])
+        self._values = {c: np.concatenate([v, values[c]]) for c, v in self._values.items()}
+        self.row_ids = np.concatenate([self.row_ids, _row_ids(frame)])
+        self.row_hash = np.concatenate([self.row_hash, self._row_hash(frame)])
+
+    def remove_rows(self, ids: Sequence) -> None:
+        """
+        Retire les lignes d'identifiants `ids`. Nombres, sommes et histogrammes
+        sont retranchés ; les extrêmes des seules cellules touchées sont
+        recalculés sur leurs lignes restantes.
+        """
+        gone = np.isin(self.row_ids, np.asarray(ids))
+        if not gone.any():
+            return
+        touched = np.unique(self.row_cells[gone])
+        delta = self._aggregate(self.row_cells[gone], {c: v[gone] for c, v in self._values.items()}, self.n_cells)
+
+        keep = ~gone
+        self.row_cells = self.row_cells[keep]
+        self._values = {c: v[keep] for c, v in self._values.items()}
+        self.row_ids = self.row_ids[keep]
+        self.row_hash = self.row_hash[keep]
+
+        rest = np.isin(self.row_cells, touched)
+        fresh = self._aggregate(
+            self.row_cells[rest], {c: v[rest] for c, v in self._values.items()}, self.n_cells, hist_columns=[]
+        )
+        for name in self.stats:
+            if name in ("min", "max"):
+                self.stats[name] = self.stats[name].copy()
+                self.stats[name][touched] = fresh[name][touched]
+            else:
+                self.stats[name] = self.stats[name] - delta[name]
+        # Pas de reste d'arrondi dans une cellule vidée
+        empty = self.stats["count"] == 0
+        self.stats["sum"] = np.where(empty, 0.0, self.stats["sum"])
+        self.stats["sumsq"] = np.where(empty, 0.0, self.stats["sumsq"])
+
+    def synced(self, df: pd.DataFrame) -> "AggregateCube":
+        """
+        Cube de la nouvelle version `df` du catalogue, obtenu en retirant les
+        lignes disparues ou modifiées (même id, contenu différent) et en ajoutant
+        les nouvelles ; les lignes suivent ensuite l'ordre de `df`. Le cube
+        courant n'est pas modifié.
+        """
+        columns = self.groups + self.measures + list(self.hist_bins)
+        if not all(c in df.columns for c in columns):
+            return AggregateCube(df, self.measures, self.hist_bins, self.groups)
+
+        new_ids = _row_ids(df)
+        new_hash = self._row_hash(df)
+        old = pd.Series(self.row_hash, index=self.row_ids)
+        same = old.reindex(new_ids).to_numpy() == new_hash
+        if 2 * (~same).sum() > len(df):
+            # Plus de la moitié des lignes changent : reconstruire coûte moins
+            return AggregateCube(df, self.measures, self.hist_bins, self.groups)
+        kept = new_ids[same]
+
+        cube = object.__new__(AggregateCube)
+        cube.__dict__.update(self.__dict__)
+        cube._cells = dict(self._cells)
+        cube.stats = dict(self.stats)
+        cube.remove_rows(self.row_ids[~np.isin(self.row_ids, kept)])
+        cube.add_rows(df[~same])
+
+        # Ordre des lignes de df : les positions des requêtes restent valables
+        order = pd.Index(cube.row_ids).get_indexer(new_ids)
+        cube.row_cells = cube.row_cells[order]
+        cube._values = {c: v[order] for c, v in cube._values.items()}
+        cube.row_ids = cube.row_ids[order]
+        cube.row_hash = cube.row_hash[order]
+        return cube
+
+    def with_column(self, column: str, values) -> "AggregateCube":
+        """
+        Copie du cube où `column` prend de nouvelles valeurs (mêmes lignes,
+        ex. éco-score repondéré) : seuls les agrégats de cette colonne sont recalculés.
+        """
+        cube = object.__new__(AggregateCube)
+        cube.__dict__.update(self.__dict__)
+        cube._values = dict(self._values)
+        cube._values[column] = pd.to_numeric(pd.Series(values), errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+        measures = [column] if column in self.measures else []
+        hist_columns = [column] if column in self.hist_bins else []
+        fresh = self._aggregate(self.row_cells, cube._values, self.n_cells, measures, hist_columns)
+        cube.stats = {k: v.copy() for k, v in self.stats.items()}
+        if measures:
+            j = self.measures.index(column)
+            for name in STATS:
+                cube.stats[name][:, j] = fresh[name][:, 0]
+        if hist_columns:
+            cube.stats[f"hist:{column}"] = fresh[f"hist:{column}"]
+        return cube
+
+    # -------------------------
+    # REQUÊTES
+    # -------------------------
+    def summary(self, by: Sequence[str] = (), positions: Optional[np.ndarray] = None) -> pd.DataFrame:
+        """
+        Statistiques regroupées par les dimensions `by` (toutes les lignes,
+        ou seulement `positions`). Colonnes : "lignes", puis pour chaque
+        propriété `<col>_count`, `_mean`, `_std`, `_min`, `_max`.
+        """
+        stats = self._subset_stats(positions)
+        cells = self.keys[list(by)].copy()
+        cells["lignes"] = stats["rows"]
+        agg = {"lignes": "sum"}
+        for j, m in enumerate(self.measures):
+            for name in STATS:
+                cells[f"{m}_{name}"] = stats[name][:, j]
+                agg[f"{m}_{name}"] = {"min": "min", "max": "max"}.get(name, "sum")
+
+        if by:
+            out = cells.groupby(list(by), observed=True, dropna=False).agg(agg)
+        else:
+            out = cells.agg(agg).to_frame().T
+
+        for m in self.measures:
+            count = out[f"{m}_count"].astype("float64")
+            mean = out[f"{m}_sum"] / count.where(count > 0)
+            out[f"{m}_mean"] = mean
+            out[f"{m}_std"] = np.sqrt(np.maximum(out[f"{m}_sumsq"] / count.where(count > 0) - mean ** 2, 0))
+            out = out.drop(columns=[f"{m}_sum", f"{m}_sumsq"])
+        return out[out["lignes"] > 0]
+
+    def histogram(self, column: str, positions: Optional[np.ndarray] = None, mask=None) -> pd.DataFrame:
+        """Histogramme de `column` (bornes fixées à la construction), cellules `mask` seulement."""
+        counts = self._subset_stats(positions)[f"hist:{column}"]
+        if mask is not None:
+            counts = counts[np.asarray(mask, dtype=bool)]
+        edges = self.hist_bins[column]
+        return pd.DataFrame({"debut": edges[:-1], "fin": edges[1:], "nb": counts.sum(axis=0)})
@@ -0,0 +1,113 @@
+"""
+Accès en lecture à la base SQLite `materiaux.db`.
+
+La table est lue en entier une fois par version (puis mise en instantané) :
+les facettes et curseurs de la barre latérale sont évalués sur les index en
+mémoire (`indexes`), pas en SQL. Chaque processus garde donc tout le
+catalogue en mémoire. La base sert encore la recherche texte : index plein
+texte FTS5, ou recherche littérale sur une ancienne base.
+"""
+import queue
+import re
+import sqlite3
+from contextlib import contextmanager
+from typing import Optional
+
+import pandas as pd
+
+from import_csv_to_db import DB_FILE, FTS_TABLE, TABLE
+
+# Nombre maximal de connexions gardées ouvertes par fichier de base
+POOL_SIZE = 4
+
+# Colonnes parcourues par la recherche texte
+SEARCH_COLUMNS = ["nom", "description"]
+
+
+# =========================
+# POOL DE CONNEXIONS
+# =========================
+def _contient(text, needle) -> bool:
+    """Recherche sans tenir compte de la casse (texte littéral, pas une regex)."""
+    if text is None or needle is None:
+        return False
+    return needle.casefold() in text.casefold()
+
+
+def _open(db_file: str) -> sqlite3.Connection:
+    """Ouvre une connexion en lecture seule, partageable entre threads."""
+    conn = sqlite3.connect(
+        f"file:{db_file}?mode=ro",
+        uri=True,
+        check_same_thread=False,
+    )
+    conn.create_function("contient", 2, _contient, deterministic=True)
+    return conn
+
+
+_pools = {}
+
+
+@contextmanager
+def connection(db_file: str = DB_FILE):
+    """Emprunte une connexion au pool du fichier, la rend à la sortie du bloc."""
+    pool = _pools.setdefault(db_file, queue.LifoQueue(maxsize=POOL_SIZE))
+    try:
+        conn = pool.get_nowait()
+    except queue.Empty:
+        conn = _open(db_file)
+    try:
+        yield conn
+    finally:
+        try:
+            pool.put_nowait(conn)
+        except queue.Full:
+            conn.close()
+
+
+# =========================
+# REQUÊTES
+# =========================
+def load_table(db_file: str = DB_FILE) -> pd.DataFrame:
+    """Charge toute la table `materiaux`, triée par id."""
+    with connection(db_file) as conn:
+        return pd.read_sql(f"SELECT * FROM {TABLE} ORDER BY id", conn)
+
+
+def _literal_search_ids(text: str, db_file: str) -> list:
+    """Recherche littérale (sans index) sur `SEARCH_COLUMNS`, pour une base sans FTS5."""
+    sql = f"SELECT id FROM {TABLE} WHERE " + " OR ".join(f'contient("{c}", ?)' for c in SEARCH_COLUMNS)
+    with connection(db_file) as conn:
+        return [row[0] for row in conn.execute(sql, [text] * len(SEARCH_COLUMNS))]
+
+
+def fts_query(text: str) -> str:
+    """
+    Expression MATCH FTS5 : chaque mot devient un préfixe entre guillemets
+    ("iso" trouve "isolant"), les mots sont combinés par ET. Les caractères
+    spéciaux saisis par l'utilisateur ne sont donc jamais interprétés.
+    """
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{w}"*' for w in words)
+
+
+def search_ids(text: str, db_file: str = DB_FILE) -> Optional[list]:
+    """
+    Id des matériaux correspondant à la recherche, du plus pertinent au moins
+    pertinent (bm25 de l'index plein texte, casse et accents ignorés).
+    Sans index plein texte (ancienne base), recherche littérale sur nom/description.
+    None si la recherche ne contient aucun mot (espaces, ponctuation) : pas de
+    filtre texte.
+    """
+    match = fts_query(text)
+    if not match:
+        return None
+    with connection(db_file) as conn:
+        try:
+            rows = conn.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY rank",
+                (match,),
+            ).fetchall()
+        except sqlite3.OperationalError:
+            return _literal_search_ids(text, db_file)
+    return [row[0] for row in rows]
@@ -0,0 +1,153 @@
+"""
+Exports (CSV, Parquet, XLSX) des lignes filtrées, générés à la demande.
+
+Le fichier n'est produit que lorsque l'utilisateur le demande. Il est écrit
+par paquets de lignes dans `static/exports/`, sous une clé calculée à partir
+de la version du jeu de données, du format et des lignes exportées (dans
+l'ordre) : une seconde demande avec les mêmes filtres, dans n'importe quelle
+session, retrouve simplement le fichier.
+
+Le téléchargement est servi par Streamlit (`enableStaticServing`, voir
+.streamlit/config.toml) directement depuis le disque : le contenu n'est
+jamais chargé en mémoire dans le processus de l'application.
+"""
+import glob
+import hashlib
+import os
+from typing import Dict, Tuple
+
+import numpy as np
+import pandas as pd
+
+from snapshot import HAS_PARQUET
+
+try:
+    import openpyxl
+    HAS_XLSX = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    HAS_XLSX = False
+
+# Fichiers servis par Streamlit sous l'URL relative "app/static/..."
+EXPORT_DIR = os.path.join("static", "exports")
+STATIC_URL = "app/static/exports"
+
+# Taille maximale d'un fichier servi par Streamlit (au-delà : erreur 404)
+STATIC_MAX_BYTES = 200 * 1024 * 1024
+
+# Lignes sérialisées par paquet (mémoire bornée pour les gros exports)
+CHUNK_ROWS = 50_000
+
+# Nombre de fichiers gardés en cache (les plus anciens sont supprimés)
+MAX_EXPORT_FILES = 20
+
+# Limite de lignes d'une feuille Excel (en-tête compris)
+EXCEL_MAX_ROWS = 1_048_576
+
+# Libellé → (extension, type MIME)
+FORMATS: Dict[str, Tuple[str, str]] = {
+    "CSV": ("csv", "text/csv"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet"),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
+
+
+def available_formats(n_rows: int) -> list:
+    """Formats utilisables ici (dépendances installées, taille compatible)."""
+    formats = ["CSV"]
+    if HAS_PARQUET:
+        formats.append("Parquet")
+    if HAS_XLSX and n_rows < EXCEL_MAX_ROWS:
+        formats.append("XLSX")
+    return formats
+
+
+def _chunks(positions: np.ndarray):
+    for start in range(0, len(positions), CHUNK_ROWS):
+        yield positions[start:start + CHUNK_ROWS]
+
+
+def _write_csv(df: pd.DataFrame, positions: np.ndarray, path: str) -> None:
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        if len(positions) == 0:
+            df.iloc[:0].to_csv(f, index=False, sep=";")
+        for i, chunk in enumerate(_chunks(positions)):
+            df.iloc[chunk].to_csv(f, index=False, sep=";", header=(i == 0))
+
+
+def _write_parquet(df: pd.DataFrame, positions: np.ndarray, path: str) -> None:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # Schéma fixé sur le cadre complet : une colonne vide dans un paquet
+    # ne doit pas changer de type d'un groupe de lignes à l'autre
+    schema = pa.Schema.from_pandas(df.iloc[:1], preserve_index=False)
+    with pq.ParquetWriter(path, schema) as writer:
+        for chunk in _chunks(positions):
+            table = pa.Table.from_pandas(df.iloc[chunk], schema=schema, preserve_index=False)
+            writer.write_table(table)
+
+
+def _write_xlsx(df: pd.DataFrame, positions: np.ndarray, path: str) -> None:
+    # Classeur en écriture seule : les lignes sont écrites au fil de l'eau
+    wb = openpyxl.Workbook(write_only=True)
+    ws = wb.create_sheet("materiaux")
+    ws.append([str(c) for c in df.columns])
+    for chunk in _chunks(positions):
+        part = df.iloc[chunk].astype(object)
+        part = part.where(part.notna(), None)
+        for row in part.itertuples(index=False, name=None):
+            ws.append(list(row))
+    wb.save(path)
+
+
+WRITERS = {"CSV": _write_csv, "Parquet": _write_parquet, "XLSX": _write_xlsx}
+
+
+def export_key(version: str, fmt: str, positions: np.ndarray, columns) -> str:
+    """Clé du fichier : version, format, colonnes et lignes exportées (dans l'ordre)."""
+    h = hashlib.sha1(f"{version}|{fmt}|{'|'.join(map(str, columns))}".encode("utf-8"))
+    h.update(np.ascontiguousarray(positions, dtype=np.int64).tobytes())
+    return h.hexdigest()[:20]
+
+
+def export_path(df: pd.DataFrame, positions: np.ndarray, fmt: str, version: str, name: str) -> str:
+    """Chemin du fichier d'export (qu'il soit déjà écrit ou non)."""
+    ext, _ = FORMATS[fmt]
+    positions = np.asarray(positions, dtype=np.int64)
+    return os.path.join(EXPORT_DIR, f"{name}-{export_key(version, fmt, positions, df.columns)}.{ext}")
+
+
+def export_file(df: pd.DataFrame, positions: np.ndarray, fmt: str, version: str, name: str) -> str:
+    """Chemin du fichier d'export (écrit s'il n'est pas déjà en cache)."""
+    positions = np.asarray(positions, dtype=np.int64)
+    path = export_path(df, positions, fmt, version, name)
+    if os.path.exists(path):
+        os.utime(path)
+        return path
+
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    try:
+        WRITERS[fmt](df, positions, tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+    old = sorted(
+        (p for p in glob.glob(os.path.join(EXPORT_DIR, "*")) if not p.endswith(".tmp")),
+        key=os.path.getmtime,
+        reverse=True,
+    )
+    for p in old[MAX_EXPORT_FILES:]:
+        try:
+            os.remove(p)
+        except OSError:
+            pass
+
+    return path
+
+
+def export_url(path: str) -> str:
+    """URL relative (servie par Streamlit) d'un fichier d'export."""
+    return f"{STATIC_URL}/{os.path.basename(path)}"
@@ -0,0 +1,67 @@
+"""
+Colonnes dérivées calculées une fois au chargement (et stockées dans
+l'instantané), pour que les onglets les lisent au lieu de les recalculer.
+
+- is_biosourced : "biosour" dans le type, le sous-type ou l'origine
+- r_par_cm_m2kw : résistance thermique d'1 cm de matériau, 0,01 / λ (m²K/W)
+- diffusivite_m2_s : diffusivité thermique a = λ / (ρ·c) (m²/s)
+- effusivite_ws05_m2k : effusivité thermique b = √(λ·ρ·c) (W·s½/m²·K)
+- co2_m2r_kgco2e : CO₂ d'1 m² de paroi d'épaisseur donnant R = 1 m²K/W,
+  soit ρ·λ·CO₂ (kgCO₂e par m² et par m²K/W)
+"""
+import numpy as np
+import pandas as pd
+
+BIOSOURCED_COLUMNS = ["sous_type", "type", "origine"]
+
+# Colonnes numériques dérivées (float64, NaN si une donnée manque)
+DERIVED_NUMERIC = [
+    "r_par_cm_m2kw",
+    "diffusivite_m2_s",
+    "effusivite_ws05_m2k",
+    "co2_m2r_kgco2e",
+]
+
+DERIVED_COLUMNS = ["is_biosourced"] + DERIVED_NUMERIC
+
+
+def _numeric(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def biosourced_mask(df: pd.DataFrame) -> np.ndarray:
+    """Lignes dont le type, le sous-type ou l'origine contient "biosour"."""
+    mask = np.zeros(len(df), dtype=bool)
+    for col in BIOSOURCED_COLUMNS:
+        if col not in df.columns:
+            continue
+        values = df[col]
+        if isinstance(values.dtype, pd.CategoricalDtype):
+            # Test sur le vocabulaire seulement, puis lecture par code
+            # (le code -1 des valeurs manquantes tombe sur le False final)
+            hit = values.cat.categories.astype(str).str.contains("biosour", case=False, regex=False)
+            mask |= np.append(hit, False)[values.cat.codes.to_numpy()]
+        else:
+            mask |= values.astype(str).str.contains("biosour", case=False, na=False, regex=False).to_numpy()
+    return mask
+
+
+def add_derived_features(df: pd.DataFrame) -> pd.DataFrame:
+    """Ajoute (sur place) les colonnes dérivées et retourne `df`."""
+    lam = _numeric(df, "conductivite_w_mk")
+    rho = _numeric(df, "masse_volumique_kg_m3")
+    cp = _numeric(df, "capacite_thermique_j_kgk")
+    co2 = _numeric(df, "empreinte_carbone_kgco2e_kg")
+
+    lam = np.where(lam > 0, lam, np.nan)
+    heat = rho * cp
+    heat = np.where(heat > 0, heat, np.nan)
+
+    df["is_biosourced"] = biosourced_mask(df)
+    df["r_par_cm_m2kw"] = 0.01 / lam
+    df["diffusivite_m2_s"] = lam / heat
+    df["effusivite_ws05_m2k"] = np.sqrt(lam * heat)
+    df["co2_m2r_kgco2e"] = rho * lam * co2
+    return df
@@ -1,5 +1,7 @@
+import argparse
+import sqlite3
+
 import pandas as pd
-from sqlalchemy import create_engine
 
 # Nom du fichier CSV (il doit être dans le même dossier que ce script)
 CSV_FILE = "Modèle_base_materiaux_complet(tableau) (1).csv"
@@ -8,13 +10,11 @@ CSV_FILE = "Modèle_base_materiaux_complet(tableau) (1).csv"
 # Nom du fichier SQLite à créer
 DB_FILE = "materiaux.db"
 
-print("📥 Étape 1 : lecture du fichier CSV...")
-
-# On lit le CSV. Le séparateur est ";" (typique des fichiers Excel français).
-df = pd.read_csv(CSV_FILE, sep=";", encoding="utf-8-sig")
+# Nom de la table dans la base
+TABLE = "materiaux"
 
-print("Colonnes trouvées dans le fichier :")
-print(df.columns.tolist())
+# Nombre de lignes lues (et écrites dans une même transaction) en mode incrémental
+CHUNK_SIZE = 5000
 
 # Liste des colonnes qui contiennent des nombres (mais écrits avec des virgules)
 numeric_cols = [
@@ -33,31 +33,342 @@ numeric_cols = [
     "durabilite_ans",
 ]
 
-print("🧹 Étape 2 : nettoyage des nombres (virgules → points)...")
+# Colonnes texte à faible cardinalité (codées en catégories dans l'application)
+categorical_cols = [
+    "type",
+    "sous_type",
+    "pays_origine",
+    "fabricant",
+    "reaction_feu_classe_euro",
+    "recyclable",
+    "origine",
+]
+
+# Colonnes couvertes par l'index plein texte (recherche de la barre latérale)
+search_cols = [
+    "nom",
+    "description",
+    "domaine_application",
+    "sources",
+]
+
+# Table FTS5 de recherche plein texte (casse et accents ignorés : "beton" = "Béton")
+FTS_TABLE = f"{TABLE}_fts"
+
+# Colonnes indexées : celles sur lesquelles l'application filtre
+indexed_cols = [
+    "type",
+    "sous_type",
+    "pays_origine",
+    "fabricant",
+    "masse_volumique_kg_m3",
+    "conductivite_w_mk",
+]
+
+
+def clean_chunk(df: pd.DataFrame) -> pd.DataFrame:
+    """Nettoie un morceau du CSV : colonnes parasites, espaces et nombres à virgule."""
+    # Supprimer les colonnes parasites Unnamed (points-virgules en fin de ligne)
+    unnamed = [c for c in df.columns if str(c).startswith("Unnamed")]
+    if unnamed:
+        df = df.drop(columns=unnamed)
+
+    # Texte : espaces en début/fin et espaces multiples (les filtres comparent
+    # les valeurs exactes, "Biosourcé " doit devenir "Biosourcé")
+    for col in df.columns:
+        if col in numeric_cols or col == "id":
+            continue
+        if pd.api.types.is_string_dtype(df[col]):
+            df[col] = df[col].str.strip().str.replace(r"\s+", " ", regex=True)
+
+    for col in numeric_cols:
+        if col in df.columns:
+            # On convertit en texte, remplace la virgule par un point, enlève les espaces
+            df[col] = (
+                df[col]
+                .astype(str)
+                .str.replace(",", ".", regex=False)
+                .str.replace(" ", "", regex=False)
+                .replace({"nan": None, "": None})
+            )
+            # Puis on convertit en nombres (float). Les valeurs invalides deviennent NaN.
+            df[col] = pd.to_numeric(df[col], errors="coerce")
+
+    return df
+
+
+def import_full(csv_file: str = CSV_FILE, db_file: str = DB_FILE) -> None:
+    """Recrée entièrement la table à partir du CSV (tout est chargé en mémoire)."""
+    print("📥 Étape 1 : lecture du fichier CSV...")
+
+    # On lit le CSV. Le séparateur est ";" (typique des fichiers Excel français).
+    df = pd.read_csv(csv_file, sep=";", encoding="utf-8-sig")
+
+    print("Colonnes trouvées dans le fichier :")
+    print(df.columns.tolist())
+
+    print("🧹 Étape 2 : nettoyage des nombres (virgules → points)...")
+    df = clean_chunk(df)
+    print("✅ Nombres nettoyés.")
+
+    # Lignes sans id insérées en dernier : SQLite leur attribue un id après
+    # ceux du CSV, sans collision avec une ligne suivante
+    if "id" in df.columns:
+        no_id = df["id"].isna()
+        df = pd.concat([df[~no_id], df[no_id]])
+
+    print("🗄️ Étape 3 : création de la base SQLite...")
+
+    # Création de la connexion vers un fichier SQLite
+    conn = connect(db_file)
+    try:
+        # Table recréée et remplie dans une seule transaction :
+        # les lecteurs voient l'ancienne version jusqu'au commit
+        with conn:
+            conn.execute("BEGIN")
+            conn.execute(f"DROP TABLE IF EXISTS {FTS_TABLE}")
+            conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+            create_schema(conn, df.columns.tolist())
+            conn.executemany(_insert_sql(df.columns.tolist()), _to_rows(df))
+        conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    print(f"✅ Base de données créée : {db_file}")
+    print(f"✅ Table créée : {TABLE}")
+
+
+def connect(db_file: str = DB_FILE) -> sqlite3.Connection:
+    """Connexion en écriture, journal en mode WAL (lectures possibles pendant l'import)."""
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode=WAL")
+    return conn
+
+
+def create_schema(conn: sqlite3.Connection, columns: list) -> None:
+    """
+    Crée la table typée et ses index :
+    - id en INTEGER PRIMARY KEY (alias du rowid, attribué si absent) ;
+    - REAL pour les colonnes de `numeric_cols`, TEXT pour le reste ;
+    - un index par colonne de `indexed_cols` ;
+    - l'index plein texte (voir `create_search_index`).
+    """
+    defs = []
+    for col in columns:
+        if col == "id":
+            defs.append('"id" INTEGER PRIMARY KEY')
+        elif col in numeric_cols:
+            defs.append(f'"{col}" REAL')
+        else:
+            defs.append(f'"{col}" TEXT')
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {TABLE} ({', '.join(defs)})")
+
+    for col in indexed_cols:
+        if col in columns:
+            conn.execute(
+                f'CREATE INDEX IF NOT EXISTS idx_{TABLE}_{col} ON {TABLE} ("{col}")'
+            )
+
+    create_search_index(conn, columns)
+
+
+def create_search_index(conn: sqlite3.Connection, columns: list) -> None:
+    """
+    Table FTS5 sur `search_cols` (contenu lu dans `materiaux`, clé = id),
+    tenue à jour par des triggers : les imports complets comme incrémentaux
+    la mettent à jour sans étape supplémentaire.
+    """
+    cols = [c for c in search_cols if c in columns]
+    if not cols:
+        return
+
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (FTS_TABLE,)
+    ).fetchone()
+
+    col_list = ", ".join(f'"{c}"' for c in cols)
+    new_values = ", ".join(f'new."{c}"' for c in cols)
+    old_values = ", ".join(f'old."{c}"' for c in cols)
+
+    conn.execute(
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5({col_list}, "
+        f"content='{TABLE}', content_rowid='id', "
+        f"tokenize='unicode61 remove_diacritics 2')"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_ai AFTER INSERT ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE} (rowid, {col_list}) VALUES (new.id, {new_values}); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_ad AFTER DELETE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {col_list}) "
+        f"VALUES ('delete', old.id, {old_values}); END"
+    )
+    conn.execute(
+        f"CREATE TRIGGER IF NOT EXISTS {TABLE}_fts_au AFTER UPDATE ON {TABLE} BEGIN "
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {col_list}) "
+        f"VALUES ('delete', old.id, {old_values}); "
+        f"INSERT INTO {FTS_TABLE} (rowid, {col_list}) VALUES (new.id, {new_values}); END"
+    )
+
+    # Base existante sans index plein texte : on l'alimente une fois
+    if not exists:
+        conn.execute(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')")
+
+
+def _to_rows(df: pd.DataFrame) -> list:
+    """Lignes prêtes pour sqlite3 : NaN → NULL, types numpy → types Python."""
+    rows = df.astype(object).where(df.notna(), None)
+    return list(rows.itertuples(index=False, name=None))
+
+
+def _insert_sql(columns: list) -> str:
+    cols = ", ".join(f'"{c}"' for c in columns)
+    placeholders = ", ".join("?" for _ in columns)
+    return f"INSERT INTO {TABLE} ({cols}) VALUES ({placeholders})"
+
+
+def _id_is_unique(conn: sqlite3.Connection) -> bool:
+    """Vrai si `id` est déjà la clé primaire, ou porte seul un index unique complet."""
+    pk = [row[1] for row in conn.execute(f"PRAGMA table_info({TABLE})") if row[5] > 0]
+    if pk == ["id"]:
+        return True
+    for _, name, unique, _, partial in conn.execute(f"PRAGMA index_list({TABLE})"):
+        if unique and not partial:
+            cols = [row[2] for row in conn.execute(f'PRAGMA index_info("{name}")')]
+            if cols == ["id"]:
+                return True
+    return False
+
+
+def _ensure_upsert_table(conn: sqlite3.Connection, chunk: pd.DataFrame) -> None:
+    """Crée la table si besoin et garantit l'unicité de `id` (cible de l'upsert)."""
+    exists = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)
+    ).fetchone()
+    if not exists:
+        create_schema(conn, chunk.columns.tolist())
+    else:
+        # Anciennes bases créées par `to_sql` : pas de clé primaire sur id,
+        # ni d'index plein texte
+        if not _id_is_unique(conn):
+            conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_{TABLE}_id ON {TABLE} (id)")
+        with conn:
+            create_search_index(conn, chunk.columns.tolist())
+
+
+def _upsert_sql(columns: list) -> str:
+    """Requête INSERT ... ON CONFLICT qui n'écrit que les lignes réellement modifiées."""
+    others = [c for c in columns if c != "id"]
+    updates = ", ".join(f'"{c}" = excluded."{c}"' for c in others)
+    changed = " OR ".join(f'"{c}" IS NOT excluded."{c}"' for c in others)
+    return (
+        f"{_insert_sql(columns)} "
+        f"ON CONFLICT(id) DO UPDATE SET {updates} WHERE {changed}"
+    )
+
+
+def import_incremental(
+    csv_file: str = CSV_FILE,
+    db_file: str = DB_FILE,
+    chunksize: int = CHUNK_SIZE,
+) -> dict:
+    """
+    Met à jour la table par morceaux de `chunksize` lignes :
+    - insère les nouveaux id, met à jour uniquement les lignes qui ont changé ;
+    - supprime à la fin les id absents du CSV ;
+    - les lignes sans id reçoivent un nouvel id, comme dans `import_full` :
+      elles sont mises de côté puis insérées après la suppression, une fois
+      tous les id du CSV connus (pas de collision avec un id d'un morceau suivant) ;
+    - une transaction par morceau, la mémoire reste bornée par `chunksize`.
+    """
+    print(f"📥 Lecture du CSV par morceaux de {chunksize} lignes...")
+
+    stats = {"lues": 0, "ecrites": 0, "supprimees": 0, "sans_id": 0}
+    conn = connect(db_file)
+    try:
+        # Liste des id vus dans le CSV, gardée côté SQLite plutôt qu'en mémoire
+        conn.execute("CREATE TEMP TABLE import_ids (id INTEGER PRIMARY KEY)")
+        new_cols = None
+
+        sql = None
+        reader = pd.read_csv(csv_file, sep=";", encoding="utf-8-sig", chunksize=chunksize)
+        for chunk in reader:
+            chunk = clean_chunk(chunk)
+            stats["lues"] += len(chunk)
+
+            if sql is None:
+                _ensure_upsert_table(conn, chunk)
+                sql = _upsert_sql(chunk.columns.tolist())
+                new_cols = ", ".join(f'"{c}"' for c in chunk.columns if c != "id")
+                conn.execute(f"CREATE TEMP TABLE import_new ({new_cols})")
+
+            # Sans id, impossible de savoir quelle ligne mettre à jour : la
+            # ligne sera ajoutée à la fin, avec un nouvel id
+            no_id = chunk["id"].isna()
+            if no_id.any():
+                stats["sans_id"] += int(no_id.sum())
+                new_rows = chunk.loc[no_id].drop(columns="id")
+                placeholders = ", ".join("?" for _ in new_rows.columns)
+                conn.executemany(f"INSERT INTO import_new VALUES ({placeholders})", _to_rows(new_rows))
+                chunk = chunk[~no_id]
+            chunk = chunk.astype({"id": "int64"})
+
+            rows = _to_rows(chunk)
+
+            # rowcount ne compte que les lignes de la table (pas les triggers)
+            with conn:
+                cur = conn.executemany(sql, rows)
+            stats["ecrites"] += cur.rowcount
+            conn.executemany(
+                "INSERT OR IGNORE INTO import_ids (id) VALUES (?)",
+                ((r[chunk.columns.get_loc("id")],) for r in rows),
+            )
+
+        if sql is not None:
+            # Lignes sans id de l'import précédent comprises : elles sont
+            # supprimées ici puis recréées depuis le CSV
+            with conn:
+                cur = conn.execute(
+                    f"DELETE FROM {TABLE} WHERE id NOT IN (SELECT id FROM import_ids)"
+                )
+                stats["supprimees"] = cur.rowcount
+                cur = conn.execute(
+                    f"INSERT INTO {TABLE} ({new_cols}) SELECT {new_cols} FROM import_new ORDER BY rowid"
+                )
+                stats["ecrites"] += cur.rowcount
+            conn.execute("ANALYZE")
+    finally:
+        conn.close()
+
+    if stats["sans_id"]:
+        print(f"⚠️ {stats['sans_id']} ligne(s) sans id ajoutée(s) avec un nouvel id.")
+    print(
+        f"✅ {stats['lues']} ligne(s) lue(s), {stats['ecrites']} écrite(s), "
+        f"{stats['supprimees']} supprimée(s)."
+    )
+    return stats
 
-for col in numeric_cols:
-    if col in df.columns:
-        # On convertit en texte, remplace la virgule par un point, enlève les espaces
-        df[col] = (
-            df[col]
-            .astype(str)
-            .str.replace(",", ".", regex=False)
-            .str.replace(" ", "", regex=False)
-            .replace({"nan": None, "": None})
-        )
-        # Puis on convertit en nombres (float). Les valeurs invalides deviennent NaN.
-        df[col] = pd.to_numeric(df[col], errors="coerce")
 
-print("✅ Nombres nettoyés.")
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Import du CSV matériaux dans SQLite.")
+    parser.add_argument("csv_file", nargs="?", default=CSV_FILE)
+    parser.add_argument("db_file", nargs="?", default=DB_FILE)
+    parser.add_argument(
+        "--upsert",
+        action="store_true",
+        help="Mise à jour incrémentale par id au lieu de recréer toute la table.",
+    )
+    parser.add_argument("--chunksize", type=int, default=CHUNK_SIZE)
+    args = parser.parse_args()
 
-print("🗄️ Étape 3 : création de la base SQLite...")
+    if args.upsert:
+        import_incremental(args.csv_file, args.db_file, args.chunksize)
+    else:
+        import_full(args.csv_file, args.db_file)
 
-# Création de la connexion vers un fichier SQLite
-engine = create_engine(f"sqlite:///{DB_FILE}", echo=False)
+    print("👍 Tu peux maintenant l'utiliser dans l'application Streamlit.")
 
-# On écrit tout le DataFrame dans une table appelée "materiaux"
-df.to_sql("materiaux", con=engine, if_exists="replace", index=False)
 
-print(f"✅ Base de données créée : {DB_FILE}")
-print("✅ Table créée : materiaux")
-print("👍 Tu peux maintenant l'utiliser dans l'application Streamlit.")
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+"""
+Index en mémoire construits une fois par version du jeu de données.
+
+Les ensembles de lignes sont manipulés sous forme de bitmaps compactés
+(`np.packbits`, 1 bit par ligne) : une sélection de la barre latérale se
+résume à quelques OU / ET bit à bit, et seules les positions finales sont
+extraites.
+"""
+from dataclasses import dataclass
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+# Une valeur présente sur moins d'une ligne sur 32 est stockée sous forme de
+# liste de positions (int32, 4 octets par ligne) plutôt qu'en bitmap (n/8 octets).
+SPARSE_RATIO = 32
+
+
+# =========================
+# FILTRES
+# =========================
+@dataclass(frozen=True)
+class Filters:
+    """État des filtres de la barre latérale (vide = pas de filtre)."""
+    search_text: str = ""
+    types: Tuple[str, ...] = ()
+    subtypes: Tuple[str, ...] = ()
+    density_range: Optional[Tuple[float, float]] = None
+    lambda_range: Optional[Tuple[float, float]] = None
+    countries: Tuple[str, ...] = ()
+    manufacturers: Tuple[str, ...] = ()
+
+
+# Filtres "liste de valeurs" (FacetIndex) : colonne → attribut de Filters
+FACET_COLUMNS = {
+    "type": "types",
+    "sous_type": "subtypes",
+    "pays_origine": "countries",
+    "fabricant": "manufacturers",
+}
+
+# Filtres "intervalle" (RangeIndex, les valeurs manquantes sont conservées)
+RANGE_COLUMNS = {
+    "masse_volumique_kg_m3": "density_range",
+    "conductivite_w_mk": "lambda_range",
+}
+
+
+# =========================
+# BITMAPS
+# =========================
+def empty_bitmap(n: int) -> np.ndarray:
+    return np.zeros((n + 7) // 8, dtype=np.uint8)
+
+
+def bitmap_from_positions(positions: np.ndarray, n: int) -> np.ndarray:
+    """Bitmap compacté dont les bits `positions` sont à 1."""
+    bits = empty_bitmap(n)
+    set_positions(bits, positions)
+    return bits
+
+
+def set_positions(bits: np.ndarray, positions: np.ndarray) -> None:
+    """Met à 1 (sur place) les bits `positions` d'un bitmap compacté."""
+    positions = np.asarray(positions, dtype=np.int64)
+    np.bitwise_or.at(bits, positions >> 3, (128 >> (positions & 7)).astype(np.uint8))
+
+
+def bitmap_to_positions(bits: np.ndarray, n: int) -> np.ndarray:
+    """Positions (triées) des bits à 1."""
+    return np.flatnonzero(np.unpackbits(bits, count=n))
+
+
+def positions_for_ids(id_values: np.ndarray, ids, keep_order: bool = False) -> np.ndarray:
+    """
+    Positions des `ids` dans `id_values` (triée par id croissant) ; ids inconnus
+    ignorés. Triées, sauf `keep_order=True` (ordre des `ids`, ex. pertinence).
+    """
+    ids = np.asarray(ids, dtype=id_values.dtype)
+    if len(id_values) == 0 or len(ids) == 0:
+        return np.zeros(0, dtype=np.int64)
+    pos = np.minimum(np.searchsorted(id_values, ids), len(id_values) - 1)
+    pos = pos[id_values[pos] == ids]
+    return pos if keep_order else np.sort(pos)
+
+
+def key_positions(values: pd.Series) -> Dict[object, int]:
+    """
+    Table de hachage valeur → position de sa première occurrence (même ligne
+    que `df[df[col] == valeur].iloc[0]`, sans parcourir la colonne).
+    """
+    positions = pd.Series(np.arange(len(values)), index=values.to_numpy())
+    return positions[~positions.index.duplicated()].to_dict()
+
+
+# =========================
+# INDEX DE FACETTES
+# =========================
+class FacetIndex:
+    """
+    Un bitmap par valeur de chaque colonne catégorielle.
+    `select` fait un OU entre les valeurs d'une même facette, puis un ET
+    entre facettes.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[str]):
+        self.n = len(df)
+        self.dense: Dict[str, Dict[str, np.ndarray]] = {}
+        self.sparse: Dict[str, Dict[str, np.ndarray]] = {}
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            cat = df[col].astype("category")
+            codes = cat.cat.codes.to_numpy()
+
+            # Positions regroupées par code en un seul tri
+            order = np.argsort(codes, kind="stable").astype(np.int32)
+            bounds = np.searchsorted(codes[order], np.arange(len(cat.cat.categories) + 1))
+
+            self.dense[col] = {}
+            self.sparse[col] = {}
+            for k, value in enumerate(cat.cat.categories):
+                positions = order[bounds[k]:bounds[k + 1]]
+                if len(positions) * SPARSE_RATIO >= self.n:
+                    self.dense[col][value] = bitmap_from_positions(positions, self.n)
+                else:
+                    self.sparse[col][value] = positions
+
+    def facet_bitmap(self, column: str, values: Sequence) -> np.ndarray:
+        """OU des bitmaps des valeurs choisies pour une colonne."""
+        bits = empty_bitmap(self.n)
+        for value in values:
+            if value in self.dense[column]:
+                bits |= self.dense[column][value]
+            elif value in self.sparse[column]:
+                set_positions(bits, self.sparse[column][value])
+        return bits
+
+    def select(self, selections: Dict[str, Sequence]) -> Optional[np.ndarray]:
+        """
+        ET des facettes sélectionnées (colonne → valeurs choisies).
+        Retourne None si aucune facette n'est active (pas de restriction).
+        """
+        result = None
+        for column, values in selections.items():
+            if not values or column not in self.dense:
+                continue
+            bits = self.facet_bitmap(column, values)
+            result = bits if result is None else result & bits
+        return result
+
+
+# =========================
+# INDEX D'INTERVALLES
+# =========================
+class RangeIndex:
+    """
+    Pour chaque colonne numérique : positions des lignes triées par valeur,
+    et positions des valeurs manquantes à part. Un intervalle [bas, haut]
+    devient deux recherches dichotomiques et une tranche.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[str]):
+        self.n = len(df)
+        self.order: Dict[str, np.ndarray] = {}
+        self.sorted_values: Dict[str, np.ndarray] = {}
+        self.nan_positions: Dict[str, np.ndarray] = {}
+
+        for col in columns:
+            if col not in df.columns:
+                continue
+            values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            missing = np.isnan(values)
+            present = np.flatnonzero(~missing)
+            order = present[np.argsort(values[present], kind="stable")]
+            self.order[col] = order.astype(np.int32)
+            self.sorted_values[col] = values[order]
+            self.nan_positions[col] = np.flatnonzero(missing).astype(np.int32)
+
+    def positions(self, column: str, low: float, high: float, keep_nan: bool = True) -> np.ndarray:
+        """Positions (non triées) des lignes avec bas <= valeur <= haut (+ NaN si demandé)."""
+        values = self.sorted_values[column]
+        start = np.searchsorted(values, low, side="left")
+        stop = np.searchsorted(values, high, side="right")
+        positions = self.order[column][start:stop]
+        if keep_nan:
+            positions = np.concatenate([positions, self.nan_positions[column]])
+        return positions
+
+    def bitmap(self, column: str, low: float, high: float, keep_nan: bool = True) -> np.ndarray:
+        return bitmap_from_positions(self.positions(column, low, high, keep_nan), self.n)
+
+
+def intersect(a: Optional[np.ndarray], b: Optional[np.ndarray]) -> Optional[np.ndarray]:
+    """ET de deux bitmaps, None signifiant "toutes les lignes"."""
+    if a is None:
+        return b
+    if b is None:
+        return a
+    return a & b
+
+
+# =========================
+# INDEX TRIGRAMMES (recherche toutes colonnes)
+# =========================
+# Séparateur de colonnes dans le document d'une ligne : jamais saisi par
+# l'utilisateur, donc aucune correspondance "à cheval" sur deux colonnes.
+COLUMN_SEP = "\x1f"
+
+
+def fold_text(s: pd.Series) -> pd.Series:
+    """Minuscules et accents retirés ("Béton" → "beton"), de façon vectorisée."""
+    return (
+        s.str.normalize("NFKD")
+        .str.replace("[\u0300-\u036f]", "", regex=True)
+        .str.casefold()
+    )
+
+
+def _column_text(col: pd.Series) -> pd.Series:
+    """Texte recherchable d'une colonne : nombres sans ".0" superflu, NaN → ""."""
+    text = col.astype(object).where(col.notna(), "").astype(str)
+    if pd.api.types.is_numeric_dtype(col):
+        text = text.str.replace(r"\.0$", "", regex=True)
+    return text
+
+
+class TrigramIndex:
+    """
+    Un document normalisé par ligne (toutes les colonnes, minuscules, sans
+    accents) et, pour chaque trigramme, la liste triée des lignes qui le
+    contiennent. Une recherche intersecte les listes des trigrammes de la
+    requête, puis vérifie la sous-chaîne sur ces seuls candidats.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Optional[Sequence[str]] = None):
+        columns = list(columns) if columns is not None else list(df.columns)
+        self.n = len(df)
+
+        parts = [_column_text(df[c]).reset_index(drop=True) for c in columns]
+        docs = parts[0].str.cat(parts[1:], sep=COLUMN_SEP) if parts else pd.Series([""] * self.n)
+        docs = fold_text(docs)
+        self.docs = docs.to_numpy(dtype=object)
+
+        # Tous les documents bout à bout ("\x1e" entre deux lignes), en points de code
+        codes = np.frombuffer("\x1e".join(self.docs).encode("utf-32-le"), dtype=np.uint32)
+        rows = np.repeat(np.arange(self.n, dtype=np.int64), docs.str.len().to_numpy() + 1)[: len(codes)]
+
+        # Alphabet réduit : chaque caractère présent reçoit un numéro 0..A-1,
+        # un trigramme tient alors dans un entier < A³ (A³ × lignes reste
+        # loin de 2⁶³ pour quelques centaines de caractères distincts)
+        present = np.flatnonzero(np.bincount(codes)) if len(codes) else np.zeros(0, dtype=np.int64)
+        self.letters = np.full(int(present[-1]) + 1 if len(present) else 1, -1, dtype=np.int64)
+        self.letters[present] = np.arange(len(present))
+        self.size = max(len(present), 1)
+
+        if len(codes) >= 3:
+            letters = self.letters[codes]
+            trigrams = self._trigrams(letters)
+            is_sep = (codes == ord(COLUMN_SEP)) | (codes == 0x1E)
+            valid = ~(is_sep[:-2] | is_sep[1:-1] | is_sep[2:])
+            # (trigramme, ligne) combinés en un seul entier : un tri sur place
+            # ordonne par trigramme puis par ligne, les doublons deviennent voisins
+            pairs = trigrams[valid] * max(self.n, 1) + rows[:-2][valid]
+            pairs.sort()
+            pairs = pairs[np.r_[True, pairs[1:] != pairs[:-1]]]
+            keys, rows = pairs // max(self.n, 1), (pairs % max(self.n, 1)).astype(np.int32)
+        else:
+            keys, rows = np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int32)
+
+        # Format compact : trigrammes distincts + début de chaque liste dans `rows`
+        starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) if len(keys) else np.zeros(0, dtype=np.int64)
+        self.keys = keys[starts]
+        self.offsets = np.r_[starts, len(keys)]
+        self.rows = rows
+
+    def _trigrams(self, letters: np.ndarray) -> np.ndarray:
+        return (letters[:-2] * self.size + letters[1:-1]) * self.size + letters[2:]
+
+    def _postings(self, key: int) -> np.ndarray:
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return np.zeros(0, dtype=np.int32)
+        return self.rows[self.offsets[i]:self.offsets[i + 1]]
+
+    def search(self, query: str) -> np.ndarray:
+        """Positions (triées) des lignes dont une colonne contient `query` (sous-chaîne)."""
+        q = fold_text(pd.Series([query])).iloc[0]
+        if not q:
+            return np.arange(self.n)
+
+        if len(q) < 3:
+            # Trop court pour un trigramme : parcours des documents
+            return np.flatnonzero(pd.Series(self.docs).str.contains(q, regex=False).to_numpy(dtype=bool))
+
+        codes = np.frombuffer(q.encode("utf-32-le"), dtype=np.uint32)
+        if codes.max() >= len(self.letters) or (self.letters[codes] < 0).any():
+            # Un caractère absent de toute la base : aucun résultat possible
+            return np.zeros(0, dtype=np.int64)
+
+        keys = np.unique(self._trigrams(self.letters[codes]))
+        lists = sorted((self._postings(k) for k in keys), key=len)
+        candidates = lists[0]
+        for other in lists[1:]:
+            if len(candidates) == 0:
+                break
+            candidates = np.intersect1d(candidates, other, assume_unique=True)
+
+        found = pd.Series(self.docs[candidates]).str.contains(q, regex=False).to_numpy(dtype=bool)
+        return candidates[found].astype(np.int64)
@@ -0,0 +1,186 @@
+"""
+Recherche de matériaux similaires (k plus proches voisins).
+
+Chaque propriété numérique est normalisée par son rang centile (0 = plus
+petite valeur du catalogue, 1 = plus grande) : les unités et les valeurs
+extrêmes (λ de l'acier, μ des métaux) n'écrasent pas les autres critères.
+
+Distance tolérante aux valeurs manquantes : moyenne des écarts au carré sur
+les seules propriétés renseignées des deux côtés (racine prise à la fin) ;
+deux matériaux partageant moins de `MIN_SHARED` propriétés ne sont pas
+comparables.
+
+Index : arbre k-d (construit une fois par version), un pour tout le
+catalogue et un par type. Chaque nœud garde sa boîte englobante et les
+propriétés renseignées dans toutes ses lignes / dans au moins une ; la
+borne inférieure d'un nœud ne compte que les premières, divisées par le
+nombre des secondes, et reste donc valable malgré les trous.
+"""
+import heapq
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+LEAF_SIZE = 64
+MIN_SHARED = 3
+
+
+def percentile_ranks(df: pd.DataFrame, columns: Sequence[str]) -> np.ndarray:
+    """Matrice (lignes × colonnes) des rangs centiles (NaN conservés)."""
+    out = np.full((len(df), len(columns)), np.nan)
+    for j, col in enumerate(columns):
+        values = pd.to_numeric(df[col], errors="coerce")
+        count = values.notna().sum()
+        if count > 1:
+            out[:, j] = ((values.rank(method="average") - 1) / (count - 1)).to_numpy(dtype="float64", na_value=np.nan)
+        elif count == 1:
+            out[:, j] = np.where(values.notna(), 0.5, np.nan)
+    return out
+
+
+class KDTree:
+    """Arbre k-d sur des lignes `rows` de `X` (NaN admis), stocké en tableaux."""
+
+    def __init__(self, X: np.ndarray, rows: np.ndarray, leaf_size: int = LEAF_SIZE):
+        self.X = X
+        self.perm = np.asarray(rows, dtype=np.int64).copy()
+        self.start: List[int] = []
+        self.end: List[int] = []
+        self.children: List[Tuple[int, int]] = []
+        lo, hi, all_present, any_present = [], [], [], []
+
+        stack = [(0, len(self.perm))]
+        parents = [-1]
+        while stack:
+            s, e = stack.pop()
+            parent = parents.pop()
+            node = len(self.start)
+            if parent >= 0:
+                left, right = self.children[parent]
+                self.children[parent] = (node, right) if left < 0 else (left, node)
+            block = X[self.perm[s:e]]
+            present = ~np.isnan(block)
+            any_p = present.any(axis=0)
+            with np.errstate(invalid="ignore"):
+                b_lo = np.where(any_p, np.nanmin(np.where(present, block, np.inf), axis=0), np.nan)
+                b_hi = np.where(any_p, np.nanmax(np.where(present, block, -np.inf), axis=0), np.nan)
+            self.start.append(s)
+            self.end.append(e)
+            self.children.append((-1, -1))
+            lo.append(b_lo)
+            hi.append(b_hi)
+            all_present.append(present.all(axis=0))
+            any_present.append(any_p)
+
+            if e - s <= leaf_size:
+                continue
+            spread = np.nan_to_num(b_hi - b_lo, nan=-1.0)
+            dim = int(np.argmax(spread))
+            if spread[dim] <= 0:
+                continue
+            col = block[:, dim]
+            threshold = np.nanmedian(col)
+            # Valeurs manquantes à gauche : la boîte de chaque nœud est
+            # recalculée sur ses lignes, la répartition n'affecte que l'efficacité
+            go_left = ~(col > threshold)
+            n_left = int(go_left.sum())
+            if n_left in (0, e - s):
+                continue
+            order = np.argsort(~go_left, kind="stable")
+            self.perm[s:e] = self.perm[s:e][order]
+            stack.extend([(s + n_left, e), (s, s + n_left)])
+            parents.extend([node, node])
+
+        self.lo = np.array(lo)
+        self.hi = np.array(hi)
+        self.all_present = np.array(all_present)
+        self.any_present = np.array(any_present)
+
+    def lower_bound(self, node: int, q: np.ndarray, q_present: np.ndarray) -> float:
+        """Borne inférieure de la distance (au carré) entre `q` et toute ligne du nœud."""
+        shared_max = int((q_present & self.any_present[node]).sum())
+        if shared_max < MIN_SHARED:
+            return np.inf
+        sure = q_present & self.all_present[node]
+        gap = np.maximum(self.lo[node][sure] - q[sure], 0) + np.maximum(q[sure] - self.hi[node][sure], 0)
+        return float((gap ** 2).sum() / shared_max)
+
+    def leaf_distances(self, node: int, q: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        rows = self.perm[self.start[node]:self.end[node]]
+        return rows, distances(self.X[rows], q)
+
+
+def distances(block: np.ndarray, q: np.ndarray, min_shared: int = MIN_SHARED) -> np.ndarray:
+    """Distances au carré tolérantes aux NaN entre les lignes de `block` et `q`."""
+    diff = block - q[None, :]
+    shared = (~np.isnan(diff)).sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        d2 = np.nansum(diff ** 2, axis=1) / shared
+    return np.where(shared >= min_shared, d2, np.inf)
+
+
+class SimilarityIndex:
+    """Index des plus proches voisins d'un catalogue (construit une fois par version)."""
+
+    def __init__(self, df: pd.DataFrame, columns: Sequence[str], group: Optional[str] = "type"):
+        self.columns = [c for c in columns if c in df.columns]
+        self.X = percentile_ranks(df, self.columns)
+        rows = np.arange(len(df))
+        self.tree = KDTree(self.X, rows)
+        self.groups: Dict[object, KDTree] = {}
+        if group and group in df.columns:
+            labels = df[group].astype(str).where(df[group].notna())
+            for value, idx in labels.groupby(labels, sort=False).indices.items():
+                self.groups[value] = KDTree(self.X, rows[idx])
+
+    def query(
+        self,
+        position: int,
+        k: int = 5,
+        types: Optional[Sequence[str]] = None,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Positions et distances (croissantes) des k matériaux les plus proches
+        de la ligne `position` (elle-même exclue), parmi `types` si donné.
+        """
+        return self.query_vector(self.X[position], k, types, exclude=position)
+
+    def query_vector(
+        self,
+        q: np.ndarray,
+        k: int = 5,
+        types: Optional[Sequence[str]] = None,
+        exclude: int = -1,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        q = np.asarray(q, dtype="float64")
+        q_present = ~np.isnan(q)
+        trees = [self.tree] if types is None else [self.groups[t] for t in types if t in self.groups]
+
+        # Parcours « meilleur d'abord » de toutes les racines, avec un seul
+        # tas des k meilleurs (distances de signe opposé) partagé entre les arbres
+        best: List[Tuple[float, int]] = []
+        frontier = [(t.lower_bound(0, q, q_present), i, 0) for i, t in enumerate(trees)]
+        heapq.heapify(frontier)
+        while frontier:
+            bound, t, node = heapq.heappop(frontier)
+            if bound == np.inf or (len(best) == k and bound >= -best[0][0]):
+                break
+            tree = trees[t]
+            left, right = tree.children[node]
+            if left < 0:
+                rows, d2 = tree.leaf_distances(node, q)
+                worst = -best[0][0] if len(best) == k else np.inf
+                keep = (d2 < worst) & (rows != exclude)
+                for r, d in zip(rows[keep].tolist(), d2[keep].tolist()):
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, r))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, r))
+                continue
+            for child in (left, right):
+                heapq.heappush(frontier, (tree.lower_bound(child, q, q_present), t, child))
+
+        best.sort(key=lambda b: -b[0])
+        positions = np.array([r for _, r in best], dtype=np.int64)
+        return positions, np.sqrt(np.array([-d for d, _ in best], dtype="float64"))
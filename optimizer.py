@@ -0,0 +1,252 @@
+"""
+Optimiseur de parois : combinaisons de couches atteignant une résistance R
+cible au moindre carbone, au moindre coût ou à un compromis des deux.
+
+Même modèle que l'évaluation des parois (`walls`) : R = Σ e · (R par cm),
+CO₂ = Σ ρ · e · CO₂/kg, coût = Σ coût au m² des couches. Le carbone est donc
+linéaire en épaisseur, le coût fixe par couche.
+
+Recherche :
+1. élagage des matériaux par dominance : un matériau moins isolant par cm,
+   plus carboné par cm et plus cher qu'au moins k + max_layers - 1 autres
+   ne peut pas entrer dans les k meilleures parois (« k-skyband ») ;
+2. énumération des combinaisons de 1 à `max_layers` couches, sur une grille
+   d'épaisseurs : toutes les couches sauf la dernière parcourent la grille,
+   la dernière reçoit la meilleure épaisseur (exact sur la grille) ;
+3. une combinaison dont la borne inférieure (coûts fixes + carbone minimal
+   à épaisseur admissible) dépasse le k-ième meilleur score est sautée.
+
+Le carbone peut être négatif (stockage biogénique) : la paroi la moins
+carbonée est alors souvent la plus épaisse permise.
+"""
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+from walls import RSE, RSI
+
+# Taille maximale d'un bloc de calcul (combinaisons × grille d'épaisseurs)
+CHUNK_CELLS = 2_000_000
+
+
+@dataclass(frozen=True)
+class WallTarget:
+    """
+    Cahier des charges (hashable : sert de clé de cache). `carbon_weight`
+    vaut 1 pour le carbone seul, 0 pour le coût seul ; entre les deux, les
+    deux critères sont normalisés par leur médiane (en valeur absolue) sur le
+    catalogue admissible.
+    """
+
+    r_min: float
+    max_cm: float
+    types: Tuple[str, ...] = ()
+    carbon_weight: float = 1.0
+    max_layers: int = 3
+    min_cm: float = 1.0
+    step_cm: float = 1.0
+
+    @staticmethod
+    def r_from_u(u: float) -> float:
+        """R des couches donnant un coefficient U (W/m²K), hors résistances superficielles."""
+        return 1.0 / u - RSI - RSE
+
+
+def _numeric(df: pd.DataFrame, col: str) -> np.ndarray:
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+
+def candidates(df: pd.DataFrame, target: WallTarget) -> pd.DataFrame:
+    """Matériaux utilisables : type autorisé, λ connu et critères pondérés connus."""
+    r_cm = _numeric(df, "r_par_cm_m2kw")
+    co2_cm = _numeric(df, "masse_volumique_kg_m3") * _numeric(df, "empreinte_carbone_kgco2e_kg") / 100.0
+    cost = _numeric(df, "cout_eur_m2")
+
+    ok = r_cm > 0
+    if target.types:
+        ok &= df["type"].astype(str).isin(target.types).to_numpy()
+    if target.carbon_weight > 0:
+        ok &= ~np.isnan(co2_cm)
+    else:
+        co2_cm = np.nan_to_num(co2_cm)
+    if target.carbon_weight < 1:
+        ok &= ~np.isnan(cost)
+    else:
+        cost = np.nan_to_num(cost)
+
+    pos = np.flatnonzero(ok)
+    return pd.DataFrame({"pos": pos, "r_cm": r_cm[pos], "co2_cm": co2_cm[pos], "cost": cost[pos]})
+
+
+def skyband(r_cm: np.ndarray, co2_cm: np.ndarray, cost: np.ndarray, k: int) -> np.ndarray:
+    """Indices des matériaux dominés (au sens large, strictement sur un critère) par moins de k autres."""
+    n = len(r_cm)
+    dominated = np.zeros(n, dtype=np.int64)
+    step = max(1, CHUNK_CELLS // max(n, 1))
+    for start in range(0, n, step):
+        sl = slice(start, start + step)
+        better_eq = (r_cm[None, :] >= r_cm[sl, None]) & (co2_cm[None, :] <= co2_cm[sl, None]) & (cost[None, :] <= cost[sl, None])
+        strict = (r_cm[None, :] > r_cm[sl, None]) | (co2_cm[None, :] < co2_cm[sl, None]) | (cost[None, :] < cost[sl, None])
+        dominated[sl] = (better_eq & strict).sum(axis=1)
+    return np.flatnonzero(dominated < k)
+
+
+def _combination_blocks(n: int, m: int, size: int):
+    """Combinaisons (triées) de m indices parmi n, par blocs d'environ `size` lignes."""
+    if m == 1:
+        for start in range(0, n, size):
+            yield np.arange(start, min(start + size, n))[:, None]
+        return
+    pending, count = [], 0
+    for i in range(n - m + 1):
+        # Toutes les combinaisons de premier indice i, d'un seul tenant
+        if m == 2:
+            tails = [np.arange(i + 1, n)[:, None]]
+        elif m == 3 and (n - i - 1) ** 2 <= 2 * size:
+            tails = [np.column_stack(np.triu_indices(n - i - 1, k=1)) + i + 1]
+        else:
+            tails = (tail + i + 1 for tail in _combination_blocks(n - i - 1, m - 1, size))
+        for tail in tails:
+            pending.append(np.hstack([np.full((len(tail), 1), i), tail]))
+            count += len(tail)
+            if count >= size:
+                yield np.vstack(pending)
+                pending, count = [], 0
+    if pending:
+        yield np.vstack(pending)
+
+
+def _free_thicknesses(grid: np.ndarray, count: int, room: float) -> np.ndarray:
+    """Épaisseurs (P, count) de `count` couches sur la grille, de somme au plus `room`."""
+    if count == 0:
+        return np.zeros((1, 0))
+    mesh = np.stack(np.meshgrid(*[grid] * count, indexing="ij"), axis=-1).reshape(-1, count)
+    return mesh[mesh.sum(axis=1) <= room + 1e-9]
+
+
+def optimize(df: pd.DataFrame, target: WallTarget, k: int = 10) -> pd.DataFrame:
+    """
+    Les k meilleures parois (une par ensemble de matériaux), triées par score
+    croissant. Colonnes : couches (texte), ids, épaisseurs, épaisseur totale,
+    R, U, CO₂, coût et score.
+    """
+    cand = candidates(df, target)
+    if not len(cand) or target.r_min <= 0 or target.max_cm < target.min_cm:
+        return _results(df, cand.iloc[:0], [], target)
+
+    # Normalisation du compromis : échelles positives (médianes de |CO₂/R|·R
+    # et du coût) sur tout le catalogue admissible, avant l'élagage
+    w_co2 = target.carbon_weight
+    w_cost = 1.0 - w_co2
+    if 0 < w_co2 < 1:
+        co2_scale = np.median(np.abs(cand["co2_cm"] / cand["r_cm"])) * target.r_min
+        cost_scale = np.median(np.abs(cand["cost"]))
+        w_co2 /= co2_scale if co2_scale > 0 else 1.0
+        w_cost /= cost_scale if cost_scale > 0 else 1.0
+
+    # Une paroi de m couches peut garder un matériau dominé par m - 1 de ses
+    # propres couches : il faut k + max_layers - 1 dominants pour l'écarter
+    band = k + target.max_layers - 1
+    cand = cand.iloc[skyband(cand["r_cm"].to_numpy(), cand["co2_cm"].to_numpy(), cand["cost"].to_numpy(), band)]
+    r_cm, co2_cm, cost = (cand[c].to_numpy() for c in ("r_cm", "co2_cm", "cost"))
+    # Matériaux les plus prometteurs d'abord : le seuil se resserre plus tôt
+    alone = w_cost * cost + w_co2 * np.minimum(co2_cm / r_cm * target.r_min, co2_cm * target.max_cm)
+    cand = cand.iloc[np.argsort(alone, kind="stable")]
+    r_cm, co2_cm, cost = (cand[c].to_numpy() for c in ("r_cm", "co2_cm", "cost"))
+
+    step = target.step_cm
+    grid = np.arange(target.min_cm, target.max_cm + 1e-9, step)
+    # Borne du carbone : chaque couche à l'épaisseur minimale, plus le reste
+    # de l'épaisseur dans le matériau le plus stockeur (CO₂ négatif) ; sans
+    # stockage, au moins le meilleur rapport CO₂/R pour atteindre R
+    ratio = co2_cm / r_cm
+    found = []  # (score, indices, épaisseurs)
+    threshold = np.inf
+
+    for m in range(1, target.max_layers + 1):
+        free = _free_thicknesses(grid, m - 1, target.max_cm - target.min_cm)
+        free_cm = free.sum(axis=1)
+        # Dernière couche : indice de grille de la plus grande épaisseur qui tient
+        room = np.floor((target.max_cm - free_cm - target.min_cm) / step + 1e-9)
+        per_chunk = max(1, CHUNK_CELLS // (len(free) * m))
+        for combos in _combination_blocks(len(cand), m, per_chunk):
+            # Élagage : borne inférieure et faisabilité en épaisseur
+            c = co2_cm[combos]
+            c_min = c.min(axis=1)
+            co2_bound = c.sum(axis=1) * target.min_cm + np.minimum(c_min, 0) * (target.max_cm - m * target.min_cm)
+            co2_bound = np.where(c_min < 0, co2_bound, np.maximum(co2_bound, ratio[combos].min(axis=1) * target.r_min))
+            bound = w_cost * cost[combos].sum(axis=1) + w_co2 * co2_bound
+            # R maximal : la meilleure couche prend toute l'épaisseur laissée
+            # par les autres, qui restent à l'épaisseur minimale
+            r = r_cm[combos]
+            r_max = r.max(axis=1)
+            r_reach = r_max * (target.max_cm - (m - 1) * target.min_cm) + (r.sum(axis=1) - r_max) * target.min_cm
+            feasible = r_reach >= target.r_min - 1e-9
+            block = combos[feasible & (bound <= threshold)]
+            if not len(block):
+                continue
+
+            # Les m - 1 premières couches parcourent toute la grille ; la
+            # dernière prend alors la meilleure épaisseur : la plus petite qui
+            # atteint R, ou la plus grande qui tient si elle stocke du carbone.
+            # Le résultat est exact sur la grille d'épaisseurs.
+            r_last = r_cm[block[:, -1]][:, None]
+            c_last = co2_cm[block[:, -1]][:, None]
+            r_free = r_cm[block[:, :-1]] @ free.T
+            co2_free = co2_cm[block[:, :-1]] @ free.T
+            need = np.ceil(((target.r_min - r_free) / r_last - target.min_cm) / step - 1e-9)
+            last_j = np.where(w_co2 * c_last < 0, room[None, :], np.maximum(need, 0))
+            last_cm = target.min_cm + last_j * step
+            ok = (last_j <= room[None, :]) & (r_free + last_cm * r_last >= target.r_min - 1e-9)
+
+            score = w_co2 * (co2_free + last_cm * c_last) + w_cost * cost[block].sum(axis=1)[:, None]
+            # À score égal (coût seul notamment), la paroi la plus mince
+            score = np.where(ok, score + 1e-9 * (free_cm[None, :] + last_cm), np.inf)
+            j = score.argmin(axis=1)
+            rows = np.arange(len(block))
+            best_score = score[rows, j]
+            best_thick = np.column_stack([free[j], last_cm[rows, j]])
+
+            for i in np.flatnonzero(np.isfinite(best_score)):
+                found.append((best_score[i], block[i], best_thick[i]))
+            if len(found) >= k:
+                found.sort(key=lambda f: f[0])
+                del found[k:]
+                threshold = found[-1][0]
+
+    found.sort(key=lambda f: f[0])
+    return _results(df, cand, found[:k], target)
+
+
+def _results(df: pd.DataFrame, cand: pd.DataFrame, found, target: WallTarget) -> pd.DataFrame:
+    rows = []
+    names = df["nom"].astype(str).to_numpy() if "nom" in df.columns else df["id"].astype(str).to_numpy()
+    for rank, (score, idx, thick) in enumerate(found, start=1):
+        sel = cand.iloc[idx]
+        r_total = float((sel["r_cm"].to_numpy() * thick).sum())
+        rows.append({
+            "rang": rank,
+            "couches": " + ".join(f"{names[p]} {e:g} cm" for p, e in zip(sel["pos"], thick)),
+            "ids": [int(i) for i in df["id"].to_numpy()[sel["pos"].to_numpy()]],
+            "epaisseurs_cm": [float(e) for e in thick],
+            "epaisseur_cm": float(thick.sum()),
+            "R_m2kw": round(r_total, 3),
+            "U_w_m2k": round(1.0 / (RSI + r_total + RSE), 3),
+            "co2_kgco2e_m2": round(float((sel["co2_cm"].to_numpy() * thick).sum()), 2),
+            "cout_eur_m2": round(float(sel["cost"].sum()), 2),
+            "score": round(float(score), 4),
+        })
+    columns = ["rang", "couches", "ids", "epaisseurs_cm", "epaisseur_cm", "R_m2kw", "U_w_m2k", "co2_kgco2e_m2", "cout_eur_m2", "score"]
+    return pd.DataFrame(rows, columns=columns)
+
+
+def to_layers(results: pd.DataFrame, prefix: str = "optimum") -> pd.DataFrame:
+    """Table de couches (format `walls`) des parois proposées, pour l'évaluation par lots."""
+    rows = [
+        {"assemblage": f"{prefix}_{r.rang}", "couche": j + 1, "id": i, "epaisseur_cm": e}
+        for r in results.itertuples(index=False)
+        for j, (i, e) in enumerate(zip(r.ids, r.epaisseurs_cm))
+    ]
+    return pd.DataFrame(rows, columns=["assemblage", "couche", "id", "epaisseur_cm"])
@@ -0,0 +1,165 @@
+"""
+Front de Pareto (skyline) sur des critères numériques choisis.
+
+Un matériau est sur le front si aucun autre n'est au moins aussi bon sur
+tous les critères et strictement meilleur sur l'un d'eux. Chaque critère est
+ramené à « plus petit = meilleur » (les critères à maximiser changent de signe),
+puis :
+- 1 ou 2 critères : tri puis balayage avec minimum courant, O(n log n) ;
+- 3 critères : diviser pour régner sur l'ordre lexicographique, tous les
+  blocs d'un niveau en une passe vectorisée, O(n log² n) ;
+- 4 critères ou plus : tri par somme des rangs (un point dominant a toujours
+  une somme plus petite), puis les points, par blocs, ne sont comparés qu'au
+  front déjà trouvé et à leur bloc (« sort-filter-skyline » vectorisé). Le
+  coût est O(n · taille du front) : rapide si le front est petit, mais
+  quadratique pour des critères opposés, d'où la limite `SFS_MAX_ROWS`.
+
+Les lignes dont un critère manque ne sont pas comparables et sont exclues.
+"""
+from typing import Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+# Critères où une valeur haute est meilleure (les autres sont minimisés)
+HIGHER_IS_BETTER = {
+    "eco_score",
+    "contenu_recycle_pct",
+    "resistance_compression_mpa",
+    "capacite_thermique_j_kgk",
+    "r_par_cm_m2kw",
+}
+
+# Dimension 4 ou plus : candidats traités par blocs, et taille maximale d'un
+# tableau de comparaisons (points × front)
+SFS_BLOCK = 512
+BLOCK_CELLS = 4_000_000
+
+# Au-delà, l'application ne calcule pas de front à 4 critères ou plus
+SFS_MAX_ROWS = 20_000
+
+
+def _front_2d(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    """Masque du front (minimisation) de points 2-D, par balayage sur x."""
+    n = len(x)
+    order = np.lexsort((y, x))
+    xs, ys = x[order], y[order]
+    starts = np.flatnonzero(np.r_[True, xs[1:] != xs[:-1]])
+    group_min = np.minimum.reduceat(ys, starts)
+    # Meilleur y des groupes d'x strictement plus petit
+    before = np.r_[np.inf, np.minimum.accumulate(group_min)[:-1]]
+    sizes = np.diff(np.r_[starts, n])
+    keep = (ys == np.repeat(group_min, sizes)) & (ys < np.repeat(before, sizes))
+    mask = np.zeros(n, dtype=bool)
+    mask[order[keep]] = True
+    return mask
+
+
+def _ranks(col: np.ndarray) -> np.ndarray:
+    """Rangs denses (0 = plus petite valeur, ex æquo au même rang)."""
+    return np.unique(col, return_inverse=True)[1].reshape(-1)
+
+
+def _front_3d(x: np.ndarray, y: np.ndarray, z: np.ndarray) -> np.ndarray:
+    """
+    Masque du front (minimisation) de points 3-D, par diviser pour régner
+    sur l'ordre lexicographique.
+
+    Entre points distincts, un dominant précède toujours le point dominé
+    dans l'ordre (x, y, z) : il suffit, à chaque niveau, de chercher pour
+    chaque point d'un bloc de droite un point du bloc de gauche voisin au
+    moins aussi bon en y et en z. Tous les blocs d'un niveau sont traités
+    ensemble (tri par bloc puis y, minimum cumulé de z) : O(n log² n),
+    sans boucle Python sur les points.
+    """
+    points, inverse = np.unique(np.column_stack([x, y, z]), axis=0, return_inverse=True)
+    n = len(points)
+    yr, zr = _ranks(points[:, 1]), _ranks(points[:, 2])
+    # Valeur des points de droite dans le minimum cumulé (plus grande que tout rang),
+    # et décalage par bloc pour que le minimum ne déborde pas d'un bloc à l'autre
+    right_value, offset = n, n + 1
+    dominated = np.zeros(n, dtype=bool)
+    idx = np.arange(n, dtype=np.int64)
+    size = 1
+    while size < n:
+        pair = idx // (2 * size)
+        right = (idx // size) & 1
+        order = np.lexsort((right, yr, pair))
+        value = np.where(right[order] == 1, right_value, zr[order]) - offset * pair[order]
+        best = np.minimum.accumulate(value) + offset * pair[order]
+        hit = (right[order] == 1) & (best <= zr[order])
+        dominated[order[hit]] = True
+        size *= 2
+    return ~dominated[inverse.reshape(-1)]
+
+
+def _dominated(points: np.ndarray, by: np.ndarray) -> np.ndarray:
+    """Masque des `points` dominés par au moins une ligne de `by` (par tranches de `by`)."""
+    out = np.zeros(len(points), dtype=bool)
+    step = max(1, BLOCK_CELLS // max(len(points), 1))
+    for s in range(0, len(by), step):
+        b = by[s:s + step]
+        # Critère par critère : pas de tableau (points × front × critères)
+        le = b[None, :, 0] <= points[:, 0, None]
+        lt = b[None, :, 0] < points[:, 0, None]
+        for j in range(1, points.shape[1]):
+            le &= b[None, :, j] <= points[:, j, None]
+            lt |= b[None, :, j] < points[:, j, None]
+        out |= (le & lt).any(axis=1)
+    return out
+
+
+def _front_sfs(values: np.ndarray) -> np.ndarray:
+    """Masque du front (minimisation) en dimension quelconque, préordonné par somme des rangs."""
+    n = len(values)
+    ranks = np.column_stack([_ranks(col) for col in values.T])
+    order = np.argsort(ranks.sum(axis=1), kind="stable")
+    front = np.empty_like(values)
+    size = 0
+    mask = np.zeros(n, dtype=bool)
+    for start in range(0, n, SFS_BLOCK):
+        # Un dominant a une somme des rangs plus petite : il est déjà dans le
+        # front ou dans le même bloc, filtré d'abord contre l'un puis l'autre
+        idx = order[start:start + SFS_BLOCK]
+        idx = idx[~_dominated(values[idx], front[:size])]
+        idx = idx[~_dominated(values[idx], values[idx])]
+        mask[idx] = True
+        front[size:size + len(idx)] = values[idx]
+        size += len(idx)
+    return mask
+
+
+def skyline(values: np.ndarray, maximize: Optional[Sequence[bool]] = None) -> np.ndarray:
+    """Indices (croissants) des lignes non dominées de `values` (n, d), NaN exclus."""
+    values = np.asarray(values, dtype="float64")
+    if values.ndim == 1:
+        values = values[:, None]
+    if maximize is not None:
+        values = np.where(np.asarray(maximize, dtype=bool)[None, :], -values, values)
+
+    complete = np.flatnonzero(~np.isnan(values).any(axis=1))
+    v = values[complete]
+    d = v.shape[1]
+    if not len(v):
+        return complete
+    if d == 1:
+        mask = v[:, 0] == v[:, 0].min()
+    elif d == 2:
+        mask = _front_2d(v[:, 0], v[:, 1])
+    elif d == 3:
+        mask = _front_3d(v[:, 0], v[:, 1], v[:, 2])
+    else:
+        mask = _front_sfs(v)
+    return complete[mask]
+
+
+def pareto_front(df: pd.DataFrame, columns: Sequence[str], positions: Optional[np.ndarray] = None) -> np.ndarray:
+    """Positions (dans `df`) des matériaux non dominés sur `columns`, parmi `positions` (toutes si None)."""
+    columns = [c for c in columns if c in df.columns]
+    if not columns:
+        return np.zeros(0, dtype=np.int64)
+    values = np.column_stack([
+        pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan) for c in columns
+    ])
+    rows = np.arange(len(df)) if positions is None else np.asarray(positions, dtype=np.int64)
+    return rows[skyline(values[rows], [c in HIGHER_IS_BETTER for c in columns])]
@@ -0,0 +1,113 @@
+"""
+Éco-score (0-100) : moyenne pondérée de critères normalisés entre 0 et 1.
+
+Les critères sont lus une fois dans une matrice (lignes × critères) ; un
+profil de pondération (poids, sens de chaque critère, écrêtage optionnel aux
+centiles) se calcule ensuite en quelques opérations vectorisées, sans
+recopier le jeu de données.
+"""
+from dataclasses import dataclass, replace
+from typing import Tuple
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class Criterion:
+    """Un critère : colonne, poids et sens (haut = bien ou bas = bien)."""
+
+    column: str
+    label: str
+    weight: float = 1.0
+    higher_is_better: bool = False
+
+
+@dataclass(frozen=True)
+class EcoProfile:
+    """
+    Profil de calcul de l'éco-score (hashable : sert de clé de cache).
+    `clip_pct` > 0 borne chaque critère à ses centiles [p, 100 - p] avant la
+    normalisation, pour qu'une valeur extrême n'écrase pas les autres.
+    """
+
+    criteria: Tuple[Criterion, ...]
+    clip_pct: float = 0.0
+
+    def tuned(self, weights, clip_pct: float = 0.0) -> "EcoProfile":
+        """Même critères avec d'autres poids (dans l'ordre des critères) et écrêtage."""
+        return EcoProfile(
+            criteria=tuple(replace(c, weight=float(w)) for c, w in zip(self.criteria, weights)),
+            clip_pct=float(clip_pct),
+        )
+
+
+DEFAULT_PROFILE = EcoProfile(criteria=(
+    Criterion("cout_eur_m2", "Coût"),
+    Criterion("empreinte_carbone_kgco2e_kg", "Empreinte carbone"),
+    Criterion("conductivite_w_mk", "Conductivité λ"),
+    Criterion("contenu_recycle_pct", "Contenu recyclé", higher_is_better=True),
+))
+
+
+def _quantile(sorted_values: np.ndarray, pct: float) -> float:
+    """Centile (interpolation linéaire) d'un tableau déjà trié sans NaN."""
+    pos = pct / 100 * (len(sorted_values) - 1)
+    lo = int(np.floor(pos))
+    hi = min(lo + 1, len(sorted_values) - 1)
+    return sorted_values[lo] + (sorted_values[hi] - sorted_values[lo]) * (pos - lo)
+
+
+class EcoScorer:
+    """Matrice des critères d'un jeu de données, prête à être notée selon un profil."""
+
+    def __init__(self, df: pd.DataFrame, columns=None):
+        columns = [c.column for c in DEFAULT_PROFILE.criteria] if columns is None else list(columns)
+        self.columns = [c for c in columns if c in df.columns]
+        self.n = len(df)
+        self.matrix = np.column_stack([
+            pd.to_numeric(df[c], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            for c in self.columns
+        ]) if self.columns else np.zeros((self.n, 0))
+        # Valeurs triées (sans NaN) par critère : min, max et centiles en O(1)
+        self.sorted = [np.sort(col[~np.isnan(col)]) for col in self.matrix.T]
+
+    def _bounds(self, j: int, clip_pct: float) -> Tuple[float, float]:
+        values = self.sorted[j]
+        if len(values) == 0:
+            return np.nan, np.nan
+        if clip_pct > 0:
+            return _quantile(values, clip_pct), _quantile(values, 100 - clip_pct)
+        return values[0], values[-1]
+
+    def score(self, profile: EcoProfile = DEFAULT_PROFILE) -> np.ndarray:
+        """
+        Éco-score de chaque ligne (arrondi à 0,1), NaN si un critère utilisé
+        manque. Un critère sans dispersion (min = max) ou de poids nul est ignoré.
+        """
+        idx, lo, hi, weights, higher = [], [], [], [], []
+        for c in profile.criteria:
+            if c.weight <= 0 or c.column not in self.columns:
+                continue
+            j = self.columns.index(c.column)
+            mn, mx = self._bounds(j, profile.clip_pct)
+            if not mx > mn:
+                continue
+            idx.append(j)
+            lo.append(mn)
+            hi.append(mx)
+            weights.append(c.weight)
+            higher.append(c.higher_is_better)
+
+        if not idx:
+            return np.full(self.n, np.nan)
+
+        lo, hi = np.array(lo), np.array(hi)
+        x = self.matrix[:, idx]
+        if profile.clip_pct > 0:
+            x = np.clip(x, lo, hi)
+        norm = np.where(higher, x - lo, hi - x) / (hi - lo)
+
+        weights = np.array(weights)
+        eco = norm @ (weights / weights.sum())
+        return np.round(eco * 100, 1)
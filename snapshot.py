@@ -0,0 +1,75 @@
+"""
+Instantané colonnaire (Parquet) du jeu de données nettoyé.
+
+Au démarrage à froid d'un worker, relire un fichier Parquet déjà typé est
+bien plus rapide que relire la base puis renettoyer chaque colonne texte.
+L'instantané est identifié par la version de la source (taille + date de
+modification de `materiaux.db` et de son journal WAL) : un nouvel import
+produit une nouvelle version, donc un nouvel instantané.
+"""
+import glob
+import hashlib
+import os
+from typing import Callable
+
+import pandas as pd
+
+# Dossier des instantanés (ignoré par git)
+SNAPSHOT_DIR = ".cache"
+
+# À incrémenter quand le contenu d'un instantané change (nouvelles colonnes,
+# nouveaux types...) : les instantanés déjà écrits ne seront plus relus.
+FORMAT_VERSION = 4
+
+try:
+    import pyarrow  # noqa: F401
+    HAS_PARQUET = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    HAS_PARQUET = False
+
+
+def source_version(path: str) -> str:
+    """Identifiant court de la version d'un fichier source (taille, mtime, WAL)."""
+    parts = []
+    for p in (path, path + "-wal"):
+        if os.path.exists(p):
+            st_ = os.stat(p)
+            # Un journal WAL vide est (re)créé par chaque lecteur : on l'ignore
+            if st_.st_size == 0:
+                continue
+            parts.append(f"{p}:{st_.st_size}:{st_.st_mtime_ns}")
+    return hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()[:16]
+
+
+def snapshot_path(name: str, version: str) -> str:
+    return os.path.join(SNAPSHOT_DIR, f"{name}-v{FORMAT_VERSION}-{version}.parquet")
+
+
+def load_or_build(name: str, version: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+    """
+    Relit l'instantané `name` de cette version, ou le construit avec `build()`
+    puis l'écrit (écriture atomique, anciens instantanés supprimés).
+    Sans pyarrow, on se contente d'appeler `build()`.
+    """
+    if not HAS_PARQUET:
+        return build()
+
+    path = snapshot_path(name, version)
+    if os.path.exists(path):
+        return pd.read_parquet(path)
+
+    df = build()
+
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    df.to_parquet(tmp, index=False)
+    os.replace(tmp, path)
+
+    for old in glob.glob(os.path.join(SNAPSHOT_DIR, f"{name}-*.parquet")):
+        if old != path:
+            try:
+                os.remove(old)
+            except OSError:
+                pass
+
+    return df
@@ -0,0 +1,35 @@
+import numpy as np
+import pandas as pd
+
+import condensation
+
+MATERIAUX = pd.DataFrame({
+    "id": [1, 2],
+    "nom": ["Laine", "Béton"],
+    "conductivite_w_mk": [0.04, 2.0],
+    "permeabilite_vapeur_mu": [1.0, 100.0],
+})
+
+
+def test_evaluate_sans_paroi():
+    layers = pd.DataFrame(columns=["assemblage", "couche", "id", "epaisseur_cm"])
+    out = condensation.evaluate(layers, MATERIAUX)
+    assert out.empty
+    assert list(out.columns) == condensation.RESULT_COLUMNS
+
+
+def test_evaluate_pare_vapeur_cote_froid():
+    # Béton étanche côté extérieur, laine ouverte côté intérieur : condensation
+    layers = pd.DataFrame({
+        "assemblage": ["mur", "mur"],
+        "couche": [1, 2],
+        "id": [2, 1],
+        "epaisseur_cm": [20.0, 10.0],
+    })
+    out = condensation.evaluate(layers, MATERIAUX)
+    assert list(out.columns) == condensation.RESULT_COLUMNS
+    assert len(out) == len(condensation.CLIMATES)
+    froid = out.set_index("climat").loc["Grand froid"]
+    assert froid["condensation"]
+    assert froid["debit_g_m2h"] > 0
+    assert np.isfinite(out["marge_min_pa"]).all()
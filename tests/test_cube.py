@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import cube
+
+MEASURES = ["conductivite_w_mk", "cout_eur_m2"]
+HIST = {"eco_score": np.arange(0, 101, 10)}
+
+
+def _catalogue(n, seed, start_id=1):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "id": np.arange(start_id, start_id + n),
+        "type": rng.choice(["Minéral", "Biosourcé", "Métal", None], n),
+        "sous_type": rng.choice(["A", "B", "C"], n),
+        "pays_origine": rng.choice(["France", "Italie", None], n),
+        "is_biosourced": rng.choice([True, False], n),
+        "conductivite_w_mk": rng.lognormal(-2, 1, n),
+        "cout_eur_m2": rng.uniform(5, 80, n),
+        "eco_score": rng.uniform(0, 100, n),
+    })
+    df.loc[rng.random(n) < 0.2, "conductivite_w_mk"] = np.nan
+    return df
+
+
+def _build(df):
+    return cube.AggregateCube(df, MEASURES + ["eco_score"], hist_bins=HIST)
+
+
+def _norm(summary, by):
+    """Résumé comparable : dimensions en colonnes objet, ordre fixe."""
+    if not by:
+        return summary.reset_index(drop=True)
+    out = summary.reset_index()
+    out[list(by)] = out[list(by)].astype(object)
+    return out.sort_values(list(by)).reset_index(drop=True)
+
+
+def _assert_same(a, b, df, by=cube.GROUP_COLUMNS):
+    pos = np.arange(0, len(df), 3)
+    for args in [(by,), ((),), (["type"], pos)]:
+        pd.testing.assert_frame_equal(
+            _norm(a.summary(*args), args[0]), _norm(b.summary(*args), args[0]),
+            check_dtype=False, rtol=1e-7, atol=1e-5,
+        )
+    pd.testing.assert_frame_equal(a.histogram("eco_score"), b.histogram("eco_score"))
+
+
+def test_ajout_puis_retrait_egal_reconstruction():
+    base = _catalogue(400, 0)
+    extra = _catalogue(150, 1, start_id=1000)
+    extra.loc[:9, "type"] = "Nouveau"  # nouvelles cellules
+
+    rng = np.random.default_rng(2)
+    removed = rng.choice(np.r_[base["id"], extra["id"]], 180, replace=False)
+    # Retire en particulier le minimum et le maximum d'une cellule
+    cell = base[(base["type"] == "Minéral") & base["conductivite_w_mk"].notna()]
+    removed = np.r_[removed, cell.loc[cell["conductivite_w_mk"].idxmin(), "id"], cell.loc[cell["conductivite_w_mk"].idxmax(), "id"]]
+
+    incremental = _build(base)
+    incremental.add_rows(extra)
+    incremental.remove_rows(removed)
+
+    final = pd.concat([base, extra], ignore_index=True)
+    final = final[~final["id"].isin(removed)].reset_index(drop=True)
+    _assert_same(incremental, _build(final), final)
+
+
+def test_retrait_de_toute_une_cellule():
+    base = _catalogue(200, 3)
+    incremental = _build(base)
+    incremental.remove_rows(base.loc[base["type"] == "Métal", "id"])
+    final = base[base["type"] != "Métal"].reset_index(drop=True)
+    _assert_same(incremental, _build(final), final)
+    assert "Métal" not in set(incremental.summary(["type"]).index.dropna())
+
+
+@pytest.mark.parametrize("changed", [0, 25])
+def test_synced_egal_reconstruction(changed):
+    old = _catalogue(300, 4)
+    new = pd.concat([old.iloc[20:], _catalogue(30, 5, start_id=5000)], ignore_index=True)
+    new.loc[: changed - 1, "cout_eur_m2"] += 1.0
+    new = new.sort_values("id").reset_index(drop=True)
+
+    previous = _build(old)
+    before = previous.summary().copy()
+    synced = previous.synced(new)
+    _assert_same(synced, _build(new), new)
+    # Le cube de la version précédente reste intact
+    pd.testing.assert_frame_equal(previous.summary(), before)
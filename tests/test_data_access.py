@@ -0,0 +1,51 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import data_access
+import import_csv_to_db
+
+
+@pytest.fixture
+def db_file(tmp_path):
+    csv_file = tmp_path / "materiaux.csv"
+    pd.DataFrame({
+        "id": [1, 2, 3],
+        "nom": ["Béton cellulaire", "Laine de bois", "Béton de chanvre"],
+        "type": ["Minéral", "Biosourcé", "Biosourcé"],
+        "description": ["Bloc isolant", "Panneau souple", "Mélange chaux-chanvre"],
+        "conductivite_w_mk": ["0,11", "0,038", "0,07"],
+    }).to_csv(csv_file, sep=";", index=False)
+    path = str(tmp_path / "materiaux.db")
+    import_csv_to_db.import_full(str(csv_file), path)
+    return path
+
+
+def test_fts_query_mots_en_prefixe():
+    assert data_access.fts_query('béton "cellulaire"') == '"béton"* "cellulaire"*'
+
+
+@pytest.mark.parametrize("text", ["", "   ", "!!!", " - ? ; "])
+def test_fts_query_sans_mot(text):
+    assert data_access.fts_query(text) == ""
+
+
+def test_search_ids_accents_et_pertinence(db_file):
+    assert set(data_access.search_ids("beton", db_file)) == {1, 3}
+    assert data_access.search_ids("chanvre", db_file)[0] == 3
+    assert data_access.search_ids("iso", db_file) == [1]
+
+
+@pytest.mark.parametrize("text", ["   ", "!!!", '"*'])
+def test_search_ids_sans_mot_ne_filtre_pas(db_file, text):
+    assert data_access.search_ids(text, db_file) is None
+
+
+def test_search_ids_sans_index_plein_texte(db_file):
+    # Ancienne base : recherche littérale (casse ignorée, accents non)
+    with sqlite3.connect(db_file) as conn:
+        conn.execute(f"DROP TABLE {import_csv_to_db.FTS_TABLE}")
+    data_access._pools.pop(db_file, None)
+    assert data_access.search_ids("BÉTON", db_file) == [1, 3]
+    assert data_access.search_ids("souple", db_file) == [2]
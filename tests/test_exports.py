@@ -0,0 +1,50 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import exports
+
+DF = pd.DataFrame({
+    "id": np.arange(1, 11),
+    "nom": [f"mat {i}" for i in range(1, 11)],
+    "conductivite_w_mk": np.linspace(0.03, 2.0, 10),
+})
+
+
+@pytest.fixture(autouse=True)
+def export_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(exports, "EXPORT_DIR", str(tmp_path / "exports"))
+    # Petits paquets : l'écriture par morceaux est réellement exercée
+    monkeypatch.setattr(exports, "CHUNK_ROWS", 3)
+
+
+def test_csv_par_paquets_dans_l_ordre_demande():
+    positions = np.array([7, 2, 0, 9, 4, 5, 1])
+    path = exports.export_file(DF, positions, "CSV", "v1", "materiaux")
+    out = pd.read_csv(path, sep=";")
+    pd.testing.assert_frame_equal(out, DF.iloc[positions].reset_index(drop=True))
+    assert exports.export_url(path) == f"{exports.STATIC_URL}/{os.path.basename(path)}"
+
+
+def test_cache_par_cle():
+    positions = np.arange(5)
+    path = exports.export_file(DF, positions, "CSV", "v1", "materiaux")
+    assert exports.export_path(DF, positions, "CSV", "v1", "materiaux") == path
+    # Même demande : même fichier ; autres lignes ou autre version : autre clé
+    assert exports.export_file(DF, positions, "CSV", "v1", "materiaux") == path
+    assert exports.export_path(DF, positions[::-1], "CSV", "v1", "materiaux") != path
+    assert exports.export_path(DF, positions, "CSV", "v2", "materiaux") != path
+
+
+def test_export_vide():
+    path = exports.export_file(DF, np.array([], dtype=np.int64), "CSV", "v1", "vide")
+    assert list(pd.read_csv(path, sep=";").columns) == list(DF.columns)
+
+
+@pytest.mark.skipif(not exports.HAS_PARQUET, reason="pyarrow absent")
+def test_parquet_par_paquets():
+    positions = np.arange(10)[::-1]
+    path = exports.export_file(DF, positions, "Parquet", "v1", "materiaux")
+    pd.testing.assert_frame_equal(pd.read_parquet(path), DF.iloc[positions].reset_index(drop=True))
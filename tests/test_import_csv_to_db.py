@@ -0,0 +1,91 @@
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import import_csv_to_db
+from import_csv_to_db import TABLE
+
+
+def _write_csv(path, noms, ids=None):
+    pd.DataFrame({
+        "id": list(range(1, len(noms) + 1)) if ids is None else ids,
+        "nom": noms,
+        "conductivite_w_mk": ["0,04"] * len(noms),
+    }).to_csv(path, sep=";", index=False)
+
+
+def _rows(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return conn.execute(f"SELECT id, nom, conductivite_w_mk FROM {TABLE} ORDER BY id").fetchall()
+
+
+def _index_names(db_file):
+    with sqlite3.connect(db_file) as conn:
+        return {row[1] for row in conn.execute(f"PRAGMA index_list({TABLE})")}
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / "materiaux.csv"
+    _write_csv(path, ["Laine", "Liège"])
+    return path
+
+
+def test_incremental_sur_cle_primaire_sans_index_redondant(tmp_path, csv_file):
+    db_file = str(tmp_path / "materiaux.db")
+    import_csv_to_db.import_full(str(csv_file), db_file)
+    _write_csv(csv_file, ["Laine", "Liège expansé", "Chanvre"])
+
+    stats = import_csv_to_db.import_incremental(str(csv_file), db_file)
+    assert stats["ecrites"] == 2
+    assert f"idx_{TABLE}_id" not in _index_names(db_file)
+
+
+def test_incremental_sur_ancienne_base(tmp_path, csv_file):
+    # Base créée par to_sql : id sans clé primaire ni index unique
+    db_file = str(tmp_path / "materiaux.db")
+    with sqlite3.connect(db_file) as conn:
+        import_csv_to_db.clean_chunk(pd.read_csv(csv_file, sep=";")).to_sql(TABLE, conn, index=False)
+    _write_csv(csv_file, ["Laine", "Liège expansé"])
+
+    stats = import_csv_to_db.import_incremental(str(csv_file), db_file)
+    assert stats["ecrites"] == 1
+    assert f"idx_{TABLE}_id" in _index_names(db_file)
+    with sqlite3.connect(db_file) as conn:
+        assert conn.execute(f"SELECT nom FROM {TABLE} WHERE id = 2").fetchone() == ("Liège expansé",)
+
+
+def test_incremental_par_morceaux_egal_import_complet(tmp_path, csv_file):
+    db_file = str(tmp_path / "materiaux.db")
+    noms = [f"mat {i}" for i in range(1, 12)]
+    _write_csv(csv_file, noms)
+    import_csv_to_db.import_full(str(csv_file), db_file)
+
+    # Deux lignes modifiées, une supprimée, deux ajoutées ; morceaux de 3 lignes
+    ids = [i for i in range(1, 12) if i != 6] + [20, 21]
+    noms = [f"mat {i}" for i in ids]
+    noms[1], noms[8] = "mat 2 bis", "mat 10 bis"
+    _write_csv(csv_file, noms, ids)
+    stats = import_csv_to_db.import_incremental(str(csv_file), db_file, chunksize=3)
+    assert stats == {"lues": 12, "ecrites": 4, "supprimees": 1, "sans_id": 0}
+
+    full_db = str(tmp_path / "complet.db")
+    import_csv_to_db.import_full(str(csv_file), full_db)
+    assert _rows(db_file) == _rows(full_db)
+
+
+def test_lignes_sans_id_conservees(tmp_path, csv_file):
+    db_file = str(tmp_path / "materiaux.db")
+    _write_csv(csv_file, ["Laine", "Sans id", "Liège", "Chanvre", "Sans id 2"], [1, None, 2, 3, None])
+    import_csv_to_db.import_full(str(csv_file), db_file)
+    noms = sorted(r[1] for r in _rows(db_file))
+
+    # Même CSV en incrémental : les lignes sans id ne disparaissent pas et ne
+    # sont pas dupliquées ; un id d'un morceau suivant n'est pas écrasé
+    stats = import_csv_to_db.import_incremental(str(csv_file), db_file, chunksize=2)
+    assert stats["sans_id"] == 2
+    assert sorted(r[1] for r in _rows(db_file)) == noms
+    stats = import_csv_to_db.import_incremental(str(csv_file), db_file, chunksize=2)
+    assert sorted(r[1] for r in _rows(db_file)) == noms
+    assert [r for r in _rows(db_file) if r[0] <= 3] == [(1, "Laine", 0.04), (2, "Liège", 0.04), (3, "Chanvre", 0.04)]
@@ -0,0 +1,125 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import indexes
+
+
+def _catalogue(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        # "Bois", "Métal" denses ; "Rare*" présents sur quelques lignes (listes)
+        "type": rng.choice(["Bois", "Métal", "Minéral"], n),
+        "pays_origine": rng.choice(["France", "Italie", None], n, p=[0.6, 0.3, 0.1]),
+    })
+    rare = rng.choice(n, 12, replace=False)
+    df.loc[rare[:5], "type"] = "Rare A"
+    df.loc[rare[5:], "type"] = "Rare B"
+    return df
+
+
+def _positions(bits, n):
+    return np.arange(n) if bits is None else indexes.bitmap_to_positions(bits, n)
+
+
+def test_bitmaps_aller_retour():
+    positions = np.array([0, 3, 7, 8, 63, 64, 99])
+    bits = indexes.bitmap_from_positions(positions, 100)
+    np.testing.assert_array_equal(indexes.bitmap_to_positions(bits, 100), positions)
+    np.testing.assert_array_equal(indexes.bitmap_to_positions(indexes.empty_bitmap(13), 13), [])
+
+
+def test_facettes_denses_et_creuses():
+    df = _catalogue()
+    index = indexes.FacetIndex(df, ["type", "pays_origine", "absente"])
+    assert {"Rare A", "Rare B"} <= set(index.sparse["type"])
+    assert {"Bois", "Métal"} <= set(index.dense["type"])
+
+    cases = [
+        {"type": ["Bois"]},
+        {"type": ["Rare A", "Métal"]},
+        {"type": ["Rare A", "Rare B", "Inconnu"]},
+        {"type": ["Bois", "Rare B"], "pays_origine": ["Italie"]},
+        {"type": [], "pays_origine": ["France", "Italie"]},
+    ]
+    for selection in cases:
+        expected = np.ones(len(df), dtype=bool)
+        for col, values in selection.items():
+            if values:
+                expected &= df[col].isin(values).to_numpy()
+        got = _positions(index.select(selection), len(df))
+        np.testing.assert_array_equal(got, np.flatnonzero(expected), err_msg=str(selection))
+
+
+def test_facettes_sans_selection():
+    df = _catalogue(50)
+    index = indexes.FacetIndex(df, ["type"])
+    assert index.select({}) is None
+    assert index.select({"type": [], "absente": ["x"]}) is None
+
+
+def test_intersect():
+    a = indexes.bitmap_from_positions(np.array([1, 2, 5]), 10)
+    b = indexes.bitmap_from_positions(np.array([2, 5, 9]), 10)
+    assert indexes.intersect(None, None) is None
+    assert indexes.intersect(a, None) is a
+    np.testing.assert_array_equal(indexes.bitmap_to_positions(indexes.intersect(a, b), 10), [2, 5])
+
+
+@pytest.mark.parametrize("keep_nan", [True, False])
+def test_intervalles_bornes_incluses_et_nan(keep_nan):
+    rng = np.random.default_rng(1)
+    values = np.round(rng.uniform(0, 10, 500), 1)  # nombreux ex æquo
+    values[rng.random(500) < 0.15] = np.nan
+    df = pd.DataFrame({"conductivite_w_mk": values, "texte": ["x"] * 500})
+    index = indexes.RangeIndex(df, ["conductivite_w_mk", "texte", "absente"])
+    col = df["conductivite_w_mk"]
+
+    for low, high in [(2.0, 5.0), (3.3, 3.3), (-1.0, 0.0), (9.9, 20.0), (6.0, 4.0)]:
+        expected = col.between(low, high)
+        if keep_nan:
+            expected |= col.isna()
+        got = np.sort(index.positions("conductivite_w_mk", low, high, keep_nan))
+        np.testing.assert_array_equal(got, np.flatnonzero(expected.to_numpy()), err_msg=f"{low}-{high}")
+        bits = index.bitmap("conductivite_w_mk", low, high, keep_nan)
+        np.testing.assert_array_equal(indexes.bitmap_to_positions(bits, len(df)), got)
+
+    # Colonne non numérique : toutes les valeurs sont manquantes
+    assert len(index.positions("texte", 0, 1, keep_nan=False)) == 0
+
+
+def _text_catalogue():
+    return pd.DataFrame({
+        "nom": ["Béton cellulaire", "Laine de bois", "Liège expansé", "Brique", None, "BETON armé"],
+        "description": ["Bloc isolant", "Panneau souple", None, "Terre cuite", "Chaux", "Acier + béton"],
+        "masse_volumique_kg_m3": [500.0, 50.0, 110.0, np.nan, 1600.0, 2400.0],
+    })
+
+
+def _expected(df, query):
+    q = indexes.fold_text(pd.Series([query])).iloc[0]
+    mask = np.zeros(len(df), dtype=bool)
+    for col in df.columns:
+        text = indexes.fold_text(indexes._column_text(df[col]))
+        mask |= text.str.contains(q, regex=False).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+@pytest.mark.parametrize("query", [
+    "béton", "BETON", "beton arme", "liege", "ÉXPANS",  # accents et casse
+    "e", "bo", "é", " ",                                    # moins de 3 caractères
+    "500", "2400", "110", "50",                             # nombres sans ".0"
+    "ton cel", "zzz", "ß", "panneau souple!",               # milieu de mot, absents
+])
+def test_trigrammes_egal_recherche_pandas(query):
+    df = _text_catalogue()
+    index = indexes.TrigramIndex(df)
+    np.testing.assert_array_equal(index.search(query), _expected(df, query))
+
+
+def test_trigrammes_pas_de_correspondance_a_cheval():
+    df = _text_catalogue()
+    index = indexes.TrigramIndex(df)
+    # "Bloc isolant" suivi de la colonne suivante : pas de "isolant500"
+    assert len(index.search("isolant500")) == 0
+    np.testing.assert_array_equal(index.search(""), np.arange(len(df)))
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import neighbors
+
+COLUMNS = ["a", "b", "c", "d", "e", "f"]
+
+
+@pytest.fixture(scope="module")
+def catalogue():
+    rng = np.random.default_rng(11)
+    n = 2000
+    df = pd.DataFrame(rng.lognormal(0, 1, (n, len(COLUMNS))), columns=COLUMNS)
+    # Trous : 25 % des valeurs, et quelques lignes presque vides
+    df = df.mask(rng.random(df.shape) < 0.25)
+    df.iloc[:20, 1:] = np.nan
+    df["type"] = rng.choice(["isolant", "structure", "finition"], n)
+    df.loc[rng.choice(n, 50, replace=False), "type"] = None
+    return df
+
+
+def _brute_force(X, position, k, allowed=None):
+    d2 = neighbors.distances(X, X[position])
+    d2[position] = np.inf
+    if allowed is not None:
+        d2[~allowed] = np.inf
+    order = np.argsort(d2, kind="stable")
+    order = order[np.isfinite(d2[order])][:k]
+    return order, np.sqrt(d2[order])
+
+
+def test_percentile_ranks():
+    df = pd.DataFrame({"x": [10.0, np.nan, 30.0, 20.0, 20.0], "y": [np.nan, 1.0, np.nan, np.nan, np.nan]})
+    X = neighbors.percentile_ranks(df, ["x", "y"])
+    np.testing.assert_allclose(X[:, 0], [0.0, np.nan, 1.0, 0.5, 0.5])
+    np.testing.assert_allclose(X[:, 1], [np.nan, 0.5, np.nan, np.nan, np.nan])
+
+
+def test_query_egal_force_brute(catalogue):
+    index = neighbors.SimilarityIndex(catalogue, COLUMNS)
+    rng = np.random.default_rng(0)
+    # Lignes tirées au hasard, plus des lignes à trous (dont les presque vides)
+    for position in [*rng.choice(len(catalogue), 40, replace=False), 0, 5, 25]:
+        got_pos, got_d = index.query(position, k=8)
+        exp_pos, exp_d = _brute_force(index.X, position, 8)
+        np.testing.assert_allclose(got_d, exp_d)
+        assert position not in got_pos
+        if len(exp_d):
+            # À distance égale l'ordre est libre : comparaison des ensembles
+            assert set(got_pos[got_d < exp_d[-1]]) == set(exp_pos[exp_d < exp_d[-1]])
+
+
+def test_query_par_type_egal_force_brute(catalogue):
+    index = neighbors.SimilarityIndex(catalogue, COLUMNS)
+    types = ["isolant", "finition"]
+    allowed = catalogue["type"].isin(types).to_numpy()
+    for position in range(30, 60):
+        got_pos, got_d = index.query(position, k=5, types=types)
+        exp_pos, exp_d = _brute_force(index.X, position, 5, allowed)
+        np.testing.assert_allclose(got_d, exp_d)
+        assert allowed[got_pos].all()
+
+
+def test_trop_peu_de_proprietes_communes():
+    df = pd.DataFrame({
+        "a": [1.0, 2.0, 3.0],
+        "b": [1.0, 2.0, 3.0],
+        "c": [1.0, np.nan, 3.0],
+        "d": [np.nan, 1.0, 2.0],
+    })
+    index = neighbors.SimilarityIndex(df, ["a", "b", "c", "d"], group=None)
+    # Les lignes 0 et 1 ne partagent que « a » et « b » : non comparables
+    pos, _ = index.query(0, k=5)
+    assert pos.tolist() == [2]
@@ -0,0 +1,72 @@
+import itertools
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import optimizer
+from optimizer import WallTarget
+
+
+def _materiaux(seed: int, n: int = 8) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return features.add_derived_features(pd.DataFrame({
+        "id": np.arange(1, n + 1),
+        "nom": [f"m{i}" for i in range(1, n + 1)],
+        "type": rng.choice(["isolant", "structure"], n),
+        "conductivite_w_mk": rng.uniform(0.025, 0.3, n),
+        "masse_volumique_kg_m3": rng.uniform(20, 800, n),
+        # Quelques matériaux biosourcés stockent du carbone (valeur négative)
+        "empreinte_carbone_kgco2e_kg": rng.uniform(-1.0, 3.0, n),
+        "cout_eur_m2": rng.uniform(5, 60, n).round(2),
+    }))
+
+
+def _brute_force(df: pd.DataFrame, target: WallTarget, k: int) -> list:
+    """k meilleurs scores (un par ensemble de matériaux) sur toute la grille d'épaisseurs."""
+    cand = optimizer.candidates(df, target)
+    w_co2, w_cost = target.carbon_weight, 1 - target.carbon_weight
+    if 0 < w_co2 < 1:
+        co2_scale = np.median(np.abs(cand["co2_cm"] / cand["r_cm"])) * target.r_min
+        cost_scale = np.median(np.abs(cand["cost"]))
+        w_co2 /= co2_scale if co2_scale > 0 else 1.0
+        w_cost /= cost_scale if cost_scale > 0 else 1.0
+
+    grid = np.arange(target.min_cm, target.max_cm + 1e-9, target.step_cm)
+    best = []
+    for m in range(1, target.max_layers + 1):
+        for combo in itertools.combinations(range(len(cand)), m):
+            sel = cand.iloc[list(combo)]
+            thick = np.array(list(itertools.product(grid, repeat=m)))
+            ok = (thick.sum(axis=1) <= target.max_cm + 1e-9) & (thick @ sel["r_cm"].to_numpy() >= target.r_min - 1e-9)
+            if ok.any():
+                score = w_co2 * thick[ok] @ sel["co2_cm"].to_numpy() + w_cost * sel["cost"].sum()
+                best.append(score.min())
+    return sorted(best)[:k]
+
+
+@pytest.mark.parametrize("seed, carbon_weight, max_layers", [
+    (0, 1.0, 2), (25, 1.0, 2), (26, 0.5, 2), (27, 0.0, 2),
+    (1, 1.0, 3), (31, 0.5, 3), (31, 0.0, 3),
+])
+def test_optimize_egal_recherche_exhaustive(seed, carbon_weight, max_layers):
+    df = _materiaux(seed)
+    target = WallTarget(r_min=1.5, max_cm=12.0, carbon_weight=carbon_weight, max_layers=max_layers)
+    got = optimizer.optimize(df, target, k=4)
+    assert len(got) == 4
+    np.testing.assert_allclose(got["score"], _brute_force(df, target, k=4), atol=1e-4)
+
+    # Chaque paroi proposée respecte le cahier des charges
+    assert (got["R_m2kw"] >= target.r_min - 1e-3).all()
+    assert (got["epaisseur_cm"] <= target.max_cm).all()
+
+
+def test_optimize_filtre_de_type_et_cible_inatteignable():
+    df = _materiaux(6)
+    target = WallTarget(r_min=2.0, max_cm=12.0, types=("isolant",), max_layers=2)
+    got = optimizer.optimize(df, target, k=3)
+    isolants = set(df.loc[df["type"] == "isolant", "id"])
+    assert all(set(ids) <= isolants for ids in got["ids"])
+
+    assert optimizer.optimize(df, WallTarget(r_min=100.0, max_cm=12.0), k=3).empty
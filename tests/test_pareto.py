@@ -0,0 +1,41 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import pareto
+
+
+def _brute(values):
+    keep = []
+    for i, p in enumerate(values):
+        if np.isnan(p).any():
+            continue
+        others = values[~np.isnan(values).any(axis=1)]
+        if not ((others <= p).all(axis=1) & (others < p).any(axis=1)).any():
+            keep.append(i)
+    return np.array(keep, dtype=np.int64)
+
+
+@pytest.mark.parametrize("d", [1, 2, 3, 4, 5])
+@pytest.mark.parametrize("seed", range(6))
+def test_skyline_egal_force_brute(d, seed):
+    rng = np.random.default_rng(seed)
+    n = int(rng.integers(1, 400))
+    if seed % 2:
+        values = rng.integers(0, 4, (n, d)).astype(float)  # nombreux ex æquo
+    else:
+        values = rng.normal(size=(n, d))
+        if d > 1:
+            values[:, -1] = -values[:, :-1].sum(axis=1)  # critères opposés
+    values[rng.random(n) < 0.05, 0] = np.nan
+    np.testing.assert_array_equal(pareto.skyline(values), _brute(values))
+
+
+def test_pareto_front_sens_des_criteres():
+    df = pd.DataFrame({
+        "cout_eur_m2": [10.0, 20.0, 30.0, 10.0],
+        "eco_score": [50.0, 80.0, 40.0, 50.0],
+    })
+    # eco_score est maximisé ; les doublons restent tous deux sur le front
+    np.testing.assert_array_equal(pareto.pareto_front(df, ["cout_eur_m2", "eco_score"]), [0, 1, 3])
+    np.testing.assert_array_equal(pareto.pareto_front(df, ["cout_eur_m2", "eco_score"], np.array([1, 2])), [1])
@@ -0,0 +1,63 @@
+import numpy as np
+import pandas as pd
+
+import scoring
+
+
+def _baseline_eco_score(df: pd.DataFrame) -> pd.Series:
+    """Formule d'origine de l'application (moyenne des critères min-max)."""
+    scores = []
+    for col, higher in [("cout_eur_m2", False), ("empreinte_carbone_kgco2e_kg", False),
+                        ("conductivite_w_mk", False), ("contenu_recycle_pct", True)]:
+        values = pd.to_numeric(df[col], errors="coerce")
+        mn, mx = values.min(), values.max()
+        if mx > mn:
+            scores.append((values - mn) / (mx - mn) if higher else (mx - values) / (mx - mn))
+    return (sum(scores) / len(scores) * 100).round(1)
+
+
+def _materiaux(n: int = 300) -> pd.DataFrame:
+    rng = np.random.default_rng(3)
+    df = pd.DataFrame({
+        "cout_eur_m2": rng.uniform(5, 120, n).round(2),
+        "empreinte_carbone_kgco2e_kg": rng.lognormal(0, 1, n),
+        "conductivite_w_mk": rng.uniform(0.03, 2.5, n),
+        "contenu_recycle_pct": rng.integers(0, 101, n).astype(float),
+    })
+    df.loc[rng.choice(n, 20, replace=False), "empreinte_carbone_kgco2e_kg"] = np.nan
+    df.loc[rng.choice(n, 20, replace=False), "contenu_recycle_pct"] = np.nan
+    return df
+
+
+def test_profil_par_defaut_egal_formule_d_origine():
+    df = _materiaux()
+    expected = _baseline_eco_score(df).to_numpy()
+    got = scoring.EcoScorer(df).score(scoring.DEFAULT_PROFILE)
+    np.testing.assert_array_equal(np.isnan(got), np.isnan(expected))
+    # Même formule, ordre de sommation différent : au plus un écart d'arrondi
+    np.testing.assert_allclose(got, expected, atol=0.1 + 1e-9, equal_nan=True)
+    assert np.mean(got[~np.isnan(got)] == expected[~np.isnan(expected)]) > 0.99
+
+
+def test_critere_constant_ignore_comme_a_l_origine():
+    df = _materiaux(50)
+    df["conductivite_w_mk"] = 0.04
+    expected = _baseline_eco_score(df).to_numpy()
+    got = scoring.EcoScorer(df).score(scoring.DEFAULT_PROFILE)
+    np.testing.assert_allclose(got, expected, atol=0.1 + 1e-9, equal_nan=True)
+
+
+def test_poids_et_ecretage():
+    df = _materiaux()
+    scorer = scoring.EcoScorer(df)
+    # Seul le coût compte : score = (max - x) / (max - min)
+    profile = scoring.DEFAULT_PROFILE.tuned([1, 0, 0, 0])
+    cost = df["cout_eur_m2"]
+    expected = ((cost.max() - cost) / (cost.max() - cost.min()) * 100).round(1)
+    np.testing.assert_allclose(scorer.score(profile), expected, atol=1e-9)
+
+    # Écrêtage aux centiles 5-95 : bornes de numpy.percentile
+    profile = scoring.DEFAULT_PROFILE.tuned([1, 0, 0, 0], clip_pct=5)
+    lo, hi = np.percentile(cost, [5, 95])
+    expected = ((hi - cost.clip(lo, hi)) / (hi - lo) * 100).round(1)
+    np.testing.assert_allclose(scorer.score(profile), expected, atol=1e-9)
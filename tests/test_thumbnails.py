@@ -0,0 +1,104 @@
+import io
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+import thumbnails
+
+
+def _png(color) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", (800, 600), color).save(out, "PNG")
+    return out.getvalue()
+
+
+IMAGES = {"/rouge.png": _png((200, 30, 30)), "/bleu.png": _png((30, 30, 200))}
+
+
+@pytest.fixture
+def server():
+    hits = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            hits.append(self.path)
+            data = IMAGES.get(self.path)
+            if data is None:
+                self.send_error(404)
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "image/png")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", hits
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture(autouse=True)
+def cache_dirs(tmp_path, monkeypatch):
+    monkeypatch.setattr(thumbnails, "THUMB_DIR", str(tmp_path / "thumbs"))
+    monkeypatch.setattr(thumbnails, "INDEX_DIR", str(tmp_path / "index"))
+    monkeypatch.setattr(thumbnails, "_failed", {})
+    monkeypatch.setattr(thumbnails, "_pending", set())
+
+
+def test_generation_puis_cache(server):
+    base, hits = server
+    url = f"{base}/rouge.png"
+    assert thumbnails.thumbnail_url(url) is None
+
+    name = thumbnails.ensure_thumbnail(url)
+    path = os.path.join(thumbnails.THUMB_DIR, name)
+    with Image.open(path) as img:
+        assert img.size == thumbnails.THUMB_SIZE
+    assert thumbnails.thumbnail_url(url) == f"{thumbnails.STATIC_URL}/{name}"
+
+    # Deuxième appel : servi par le cache, sans nouveau téléchargement
+    assert thumbnails.ensure_thumbnail(url) == name
+    assert hits == ["/rouge.png"]
+
+
+def test_eviction_la_moins_recente(server):
+    base, _ = server
+    old = thumbnails.ensure_thumbnail(f"{base}/rouge.png")
+    old_path = os.path.join(thumbnails.THUMB_DIR, old)
+    os.utime(old_path, (time.time() - 60, time.time() - 60))
+    new = thumbnails.ensure_thumbnail(f"{base}/bleu.png")
+    new_size = os.path.getsize(os.path.join(thumbnails.THUMB_DIR, new))
+
+    assert thumbnails.evict(max_bytes=new_size) == 1
+    assert not os.path.exists(old_path)
+    assert thumbnails.cached_name(f"{base}/rouge.png") is None
+    assert thumbnails.cached_name(f"{base}/bleu.png") == new
+
+
+def test_echec_memorise_puis_retente(server, monkeypatch):
+    base, hits = server
+    url = f"{base}/absente.png"
+    thumbnails.request_thumbnail(url)
+    deadline = time.monotonic() + 10
+    while not thumbnails.has_failed(url) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert thumbnails.has_failed(url)
+
+    # Pas de nouvel essai tant que le délai n'est pas écoulé
+    thumbnails.request_thumbnail(url)
+    time.sleep(0.1)
+    assert hits == ["/absente.png"]
+
+    monkeypatch.setattr(thumbnails, "RETRY_FAILED_S", 0)
+    assert not thumbnails.has_failed(url)
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+import features
+import walls
+
+MATERIAUX = features.add_derived_features(pd.DataFrame({
+    "id": [1, 2, 3],
+    "nom": ["Laine", "Béton", "Plâtre"],
+    "conductivite_w_mk": [0.04, 2.0, 0.25],
+    "masse_volumique_kg_m3": [30.0, 2400.0, 900.0],
+    "capacite_thermique_j_kgk": [1030.0, 880.0, 1000.0],
+    "empreinte_carbone_kgco2e_kg": [1.2, 0.15, 0.12],
+    "cout_eur_m2": [12.0, 40.0, 8.0],
+    "eco_score": [80.0, 40.0, 60.0],
+}))
+
+CSV = b"""assemblage;couche;id;epaisseur_cm
+mur;1;2;20
+mur;2;1;10
+mur;3;3;1,3
+toit;1;1;24
+toit;2;99;2
+"""
+
+
+def test_read_layers_csv_et_json():
+    layers = walls.read_layers(CSV, "parois.csv")
+    assert list(layers.columns) == walls.LAYER_COLUMNS
+    assert layers["epaisseur_cm"].tolist() == [20.0, 10.0, 1.3, 24.0, 2.0]
+
+    json_data = b"""[{"assemblage": "mur", "couches": [{"id": 2, "epaisseur_cm": 20},
+                                                     {"id": 1, "epaisseur_cm": 10}]}]"""
+    layers = walls.read_layers(json_data, "parois.json")
+    assert layers["couche"].tolist() == [1, 2]
+    assert layers["id"].tolist() == [2, 1]
+
+
+def test_read_layers_colonne_manquante():
+    with pytest.raises(ValueError, match="epaisseur_cm"):
+        walls.read_layers(b"assemblage;id\nmur;1\n", "parois.csv")
+
+
+def test_evaluate_calcul_a_la_main():
+    out = walls.evaluate(walls.read_layers(CSV, "parois.csv"), MATERIAUX).set_index("assemblage")
+
+    # Mur : béton 20 cm, laine 10 cm, plâtre 1,3 cm ; R_i = e / λ
+    r_mur = 0.20 / 2.0 + 0.10 / 0.04 + 0.013 / 0.25
+    mur = out.loc["mur"]
+    assert mur["nb_couches"] == 3
+    assert mur["epaisseur_cm"] == pytest.approx(31.3)
+    assert mur["R_m2kw"] == pytest.approx(r_mur)
+    assert mur["U_w_m2k"] == pytest.approx(1 / (0.13 + r_mur + 0.04))
+    assert mur["co2_kgco2e_m2"] == pytest.approx(2400 * 0.20 * 0.15 + 30 * 0.10 * 1.2 + 900 * 0.013 * 0.12)
+    assert mur["cout_eur_m2"] == pytest.approx(60.0)
+    assert mur["eco_score"] == pytest.approx(round((20 * 40 + 10 * 80 + 1.3 * 60) / 31.3, 1))
+    assert mur["couches_incompletes"] == 0
+    assert mur["ids_inconnus"] == 0
+
+    # Toit : la couche d'id inconnu ne compte ni dans R ni dans les coûts,
+    # mais reste dans l'épaisseur et est signalée
+    r_toit = 0.24 / 0.04
+    toit = out.loc["toit"]
+    assert toit["R_m2kw"] == pytest.approx(r_toit)
+    assert toit["U_w_m2k"] == pytest.approx(1 / (walls.RSI + r_toit + walls.RSE))
+    assert toit["epaisseur_cm"] == pytest.approx(26.0)
+    assert toit["cout_eur_m2"] == pytest.approx(12.0)
+    assert toit["couches_incompletes"] == 1
+    assert toit["ids_inconnus"] == 1
+
+
+def test_layer_arrays():
+    layers = walls.read_layers(CSV, "parois.csv")
+    names, e_m, values = walls.layer_arrays(layers, MATERIAUX, ["conductivite_w_mk"])
+    assert list(names) == ["mur", "toit"]
+    np.testing.assert_allclose(e_m, [[0.20, 0.10, 0.013], [0.24, 0.02, 0.0]])
+    np.testing.assert_allclose(values["conductivite_w_mk"], [[2.0, 0.04, 0.25], [0.04, np.nan, np.nan]])
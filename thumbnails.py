@@ -0,0 +1,231 @@
+"""
+Miniatures locales des images `image_url`.
+
+Chaque image source est téléchargée une seule fois, réduite à la taille d'une
+carte (WebP, ou JPEG si Pillow n'a pas WebP) puis rangée dans un cache
+adressé par contenu : `static/thumbnails/<sha256>.webp`, servi par Streamlit
+(`enableStaticServing`, voir .streamlit/config.toml). Le cache est borné en
+taille : les miniatures les moins récemment affichées sont supprimées.
+
+Usage pour préremplir le cache après un import :
+    python thumbnails.py [materiaux.db]
+"""
+import hashlib
+import io
+import os
+import sqlite3
+import sys
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+
+try:
+    from PIL import Image, ImageOps
+    ENABLED = True
+except ImportError:  # pragma: no cover - dépend de l'environnement
+    ENABLED = False
+
+from import_csv_to_db import DB_FILE, TABLE
+from snapshot import SNAPSHOT_DIR
+
+# Fichiers servis par Streamlit sous l'URL relative "app/static/..."
+THUMB_DIR = os.path.join("static", "thumbnails")
+STATIC_URL = "app/static/thumbnails"
+
+# URL source → nom du fichier miniature (hors du dossier servi)
+INDEX_DIR = os.path.join(SNAPSHOT_DIR, "thumbnails-index")
+
+# Bandeau de 140 px de haut : on génère le double pour les écrans haute densité
+THUMB_SIZE = (560, 280)
+WEBP_QUALITY = 80
+
+# Taille maximale du cache et d'une image source téléchargée
+MAX_CACHE_BYTES = 200 * 1024 * 1024
+MAX_SOURCE_BYTES = 30 * 1024 * 1024
+FETCH_TIMEOUT = 15
+
+# Délai avant de retenter une image introuvable ou illisible
+RETRY_FAILED_S = 3600
+USER_AGENT = "base-materiaux-thumbnails/1.0"
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def cached_name(url: str) -> Optional[str]:
+    """Nom du fichier miniature de `url` s'il est en cache, sinon None."""
+    try:
+        with open(os.path.join(INDEX_DIR, _url_key(url)), encoding="utf-8") as f:
+            name = f.read().strip()
+    except OSError:
+        return None
+    if name and os.path.exists(os.path.join(THUMB_DIR, name)):
+        return name
+    return None
+
+
+def thumbnail_url(url: str) -> Optional[str]:
+    """URL locale de la miniature si elle existe (et la marque comme récemment utilisée)."""
+    name = cached_name(url)
+    if name is None:
+        return None
+    try:
+        os.utime(os.path.join(THUMB_DIR, name))
+    except OSError:
+        pass
+    return f"{STATIC_URL}/{name}"
+
+
+def fetch(url: str) -> bytes:
+    """Télécharge l'image source (taille bornée)."""
+    request = urllib.request.Request(url, headers={"User-Agent": USER_AGENT})
+    with urllib.request.urlopen(request, timeout=FETCH_TIMEOUT) as response:
+        data = response.read(MAX_SOURCE_BYTES + 1)
+    if len(data) > MAX_SOURCE_BYTES:
+        raise ValueError(f"image trop volumineuse : {url}")
+    return data
+
+
+def make_thumbnail(data: bytes):
+    """Recadre et réduit l'image à THUMB_SIZE. Retourne (octets, extension)."""
+    with Image.open(io.BytesIO(data)) as img:
+        img = ImageOps.exif_transpose(img)
+        img = ImageOps.fit(img.convert("RGB"), THUMB_SIZE, Image.LANCZOS)
+        out = io.BytesIO()
+        try:
+            img.save(out, "WEBP", quality=WEBP_QUALITY, method=4)
+            return out.getvalue(), "webp"
+        except (KeyError, OSError):
+            out = io.BytesIO()
+            img.save(out, "JPEG", quality=WEBP_QUALITY, optimize=True, progressive=True)
+            return out.getvalue(), "jpg"
+
+
+def _write_atomic(path: str, data: bytes) -> None:
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def store(url: str, thumb: bytes, ext: str) -> str:
+    """Range la miniature sous le hash de son contenu et l'associe à `url`."""
+    os.makedirs(THUMB_DIR, exist_ok=True)
+    os.makedirs(INDEX_DIR, exist_ok=True)
+
+    name = f"{hashlib.sha256(thumb).hexdigest()}.{ext}"
+    path = os.path.join(THUMB_DIR, name)
+    if not os.path.exists(path):
+        _write_atomic(path, thumb)
+    _write_atomic(os.path.join(INDEX_DIR, _url_key(url)), name.encode("utf-8"))
+
+    evict()
+    return name
+
+
+def evict(max_bytes: int = MAX_CACHE_BYTES) -> int:
+    """Supprime les miniatures les moins récemment utilisées au-delà de `max_bytes`."""
+    try:
+        entries = [e for e in os.scandir(THUMB_DIR) if e.is_file() and not e.name.endswith(".tmp")]
+    except OSError:
+        return 0
+    total = sum(e.stat().st_size for e in entries)
+    removed = 0
+    for entry in sorted(entries, key=lambda e: e.stat().st_mtime):
+        if total <= max_bytes:
+            break
+        size = entry.stat().st_size
+        try:
+            os.remove(entry.path)
+        except OSError:
+            continue
+        total -= size
+        removed += 1
+    # Les entrées d'index orphelines sont simplement ignorées par cached_name
+    return removed
+
+
+def ensure_thumbnail(url: str) -> Optional[str]:
+    """Nom de la miniature de `url`, téléchargée et générée si besoin."""
+    name = cached_name(url)
+    if name is not None:
+        return name
+    thumb, ext = make_thumbnail(fetch(url))
+    return store(url, thumb, ext)
+
+
+# =========================
+# TÉLÉCHARGEMENTS EN ARRIÈRE-PLAN
+# =========================
+_executor = None
+_pending = set()
+_failed = {}  # URL → date du dernier échec
+_lock = threading.Lock()
+
+
+def _run(url: str) -> None:
+    try:
+        ensure_thumbnail(url)
+    except Exception:
+        # Image introuvable ou illisible : pas de nouvel essai avant RETRY_FAILED_S
+        with _lock:
+            _failed[url] = time.monotonic()
+    finally:
+        with _lock:
+            _pending.discard(url)
+
+
+def has_failed(url: str) -> bool:
+    """Vrai si la génération de la miniature de `url` a échoué récemment."""
+    with _lock:
+        failed_at = _failed.get(url)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at >= RETRY_FAILED_S:
+            del _failed[url]
+            return False
+        return True
+
+
+def request_thumbnail(url: str) -> None:
+    """Lance (une seule fois) la génération de la miniature en arrière-plan."""
+    global _executor
+    if not ENABLED or has_failed(url):
+        return
+    with _lock:
+        if url in _pending:
+            return
+        _pending.add(url)
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="thumbnails")
+    _executor.submit(_run, url)
+
+
+def main() -> None:
+    """Préremplit le cache avec toutes les images de la base."""
+    if not ENABLED:
+        print("❌ Pillow n'est pas installé : pas de miniatures.")
+        return
+    db_file = sys.argv[1] if len(sys.argv) > 1 else DB_FILE
+    conn = sqlite3.connect(db_file)
+    urls = [
+        row[0] for row in conn.execute(f"SELECT DISTINCT image_url FROM {TABLE} WHERE image_url LIKE 'http%'")
+    ]
+    conn.close()
+
+    print(f"🖼️ {len(urls)} image(s) à traiter...")
+    ok = 0
+    for url in urls:
+        try:
+            ensure_thumbnail(url.strip())
+            ok += 1
+        except Exception as exc:
+            print(f"⚠️ {url} : {exc}")
+    print(f"✅ {ok} miniature(s) en cache dans {THUMB_DIR}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,201 @@
+"""
+Thermique dynamique 1-D des parois (confort d'été).
+
+Chaque paroi est découpée en mailles (volumes finis) ; la température
+extérieure suit un signal périodique (sinusoïde journalière par défaut),
+l'air intérieur est à température constante. Le schéma implicite (Euler
+arrière) est inconditionnellement stable : le pas de temps ne dépend pas
+de la finesse des mailles. Toutes les parois sont calculées ensemble : la
+matrice tridiagonale de chaque paroi est factorisée une seule fois, puis
+chaque pas de temps n'est qu'une descente / remontée vectorisée sur les
+parois.
+
+Résultats (sur la dernière période, régime périodique établi) :
+- déphasage (h) entre le maximum extérieur et le maximum de surface intérieure ;
+- facteur d'amortissement : amplitude en surface intérieure / amplitude extérieure ;
+- température de surface intérieure au cours de la période.
+"""
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+import walls
+from walls import RSE, RSI
+
+PERIOD_S = 24 * 3600
+DT_S = 900
+
+# Signal extérieur par défaut (journée d'été) et air intérieur
+T_EXT_MEAN = 25.0
+T_EXT_AMPLITUDE = 10.0
+T_INT = 20.0
+
+# Taille de maille visée et bornes du nombre de mailles par couche
+DX_TARGET_M = 0.01
+MIN_CELLS = 2
+MAX_CELLS = 20
+
+# Périodes simulées avant la mesure (mise en régime)
+WARMUP_PERIODS = 5
+
+# Couche absente (tableaux complétés) : quasi sans épaisseur ni inertie
+_PAD_E, _PAD_LAMBDA, _PAD_HEAT = 1e-6, 1e3, 1.0
+
+
+def _mesh(e_m, lam, rho, cp):
+    """Mailles (N, M) : épaisseur, conductivité et capacité volumique de chaque maille."""
+    present = e_m > 0
+    e_m = np.where(present, e_m, _PAD_E)
+    lam = np.where(present, lam, _PAD_LAMBDA)
+    heat = np.where(present, rho * cp, _PAD_HEAT)
+
+    # Même nombre de mailles pour une colonne de couches : les couches
+    # minces des autres parois sont simplement maillées plus finement
+    cells = np.clip(np.ceil(np.nanmax(e_m, axis=0) / DX_TARGET_M), MIN_CELLS, MAX_CELLS).astype(int)
+    repeat = np.repeat(np.arange(e_m.shape[1]), cells)
+    dx = e_m[:, repeat] / cells[repeat]
+    return dx, lam[:, repeat], heat[:, repeat]
+
+
+def _factorize(lower, diag, upper):
+    """Élimination de Thomas (une fois) : coefficients réutilisés à chaque pas."""
+    n, m = diag.shape
+    c = np.zeros((n, m))
+    inv = np.zeros((n, m))
+    inv[:, 0] = 1.0 / diag[:, 0]
+    c[:, 0] = upper[:, 0] * inv[:, 0]
+    for i in range(1, m):
+        inv[:, i] = 1.0 / (diag[:, i] - lower[:, i] * c[:, i - 1])
+        c[:, i] = upper[:, i] * inv[:, i]
+    return c, inv
+
+
+def _solve(lower, c, inv, rhs):
+    """Résout le système factorisé pour toutes les parois à la fois."""
+    n, m = rhs.shape
+    y = np.empty((n, m))
+    y[:, 0] = rhs[:, 0] * inv[:, 0]
+    for i in range(1, m):
+        y[:, i] = (rhs[:, i] - lower[:, i] * y[:, i - 1]) * inv[:, i]
+    for i in range(m - 2, -1, -1):
+        y[:, i] -= c[:, i] * y[:, i + 1]
+    return y
+
+
+def simulate(
+    e_m: np.ndarray,
+    lam: np.ndarray,
+    rho: np.ndarray,
+    cp: np.ndarray,
+    t_mean: float = T_EXT_MEAN,
+    amplitude: float = T_EXT_AMPLITUDE,
+    t_int: float = T_INT,
+    period: float = PERIOD_S,
+    dt: float = DT_S,
+) -> Dict[str, np.ndarray]:
+    """
+    Réponse périodique de N parois de L couches (tableaux (N, L), de
+    l'extérieur vers l'intérieur ; épaisseur 0 ou NaN = pas de couche).
+    Une paroi dont une couche n'a pas λ, ρ ou c reçoit des résultats NaN.
+    """
+    e_m = np.nan_to_num(np.atleast_2d(np.asarray(e_m, dtype="float64")))
+    lam, rho, cp = (np.atleast_2d(np.asarray(a, dtype="float64")) for a in (lam, rho, cp))
+    present = e_m > 0
+    valid = ~(present & (np.isnan(lam) | np.isnan(rho) | np.isnan(cp) | (lam <= 0))).any(axis=1)
+    valid &= present.any(axis=1)
+
+    steps = int(round(period / dt))
+    times = np.arange(1, steps + 1) * dt
+    t_ext = t_mean + amplitude * np.sin(2 * np.pi * times / period)
+    if not e_m.size:
+        # Aucune paroi, ou parois sans couche : résultats vides ou NaN
+        nan = np.full(len(e_m), np.nan)
+        return {
+            "dephasage_h": nan,
+            "amortissement": nan.copy(),
+            "t_si": np.full((len(e_m), steps), np.nan),
+            "t_si_max": nan.copy(),
+            "t_ext": t_ext,
+            "heures": times / 3600,
+        }
+
+    dx, k, heat = _mesh(e_m, np.nan_to_num(lam, nan=1.0), np.nan_to_num(rho, nan=1.0), np.nan_to_num(cp, nan=1.0))
+    n, m = dx.shape
+
+    # Conductances (W/m²K) entre centres de mailles, et vers les deux ambiances
+    half = dx / (2 * k)
+    g_inner = 1.0 / (half[:, :-1] + half[:, 1:])
+    g_ext = 1.0 / (RSE + half[:, 0])
+    g_int = 1.0 / (RSI + half[:, -1])
+    cap = heat * dx / dt
+
+    lower = np.zeros((n, m))
+    upper = np.zeros((n, m))
+    lower[:, 1:] = -g_inner
+    upper[:, :-1] = -g_inner
+    diag = cap.copy()
+    diag[:, 1:] += g_inner
+    diag[:, :-1] += g_inner
+    diag[:, 0] += g_ext
+    diag[:, -1] += g_int
+    c, inv = _factorize(lower, diag, upper)
+
+    # Départ au régime permanent moyen, puis mise en régime périodique
+    temp = np.full((n, m), (t_mean + t_int) / 2)
+    t_si = np.empty((n, steps))
+    for p in range(WARMUP_PERIODS + 1):
+        for s in range(steps):
+            rhs = cap * temp
+            rhs[:, 0] += g_ext * t_ext[s]
+            rhs[:, -1] += g_int * t_int
+            temp = _solve(lower, c, inv, rhs)
+            if p == WARMUP_PERIODS:
+                # Surface intérieure : flux de la dernière maille vers l'air
+                t_si[:, s] = t_int + (temp[:, -1] - t_int) * RSI / (RSI + half[:, -1])
+
+    # Premier harmonique : amplitude et phase, plus robustes qu'un argmax
+    omega = 2 * np.pi / period
+    basis = np.exp(-1j * omega * times)
+    h_ext = (t_ext * basis).sum() * 2 / steps
+    h_si = (t_si * basis).sum(axis=1) * 2 / steps
+    decrement = np.abs(h_si) / np.abs(h_ext)
+    lag = np.mod(np.angle(h_ext) - np.angle(h_si), 2 * np.pi) / omega / 3600
+
+    nan = np.where(valid, 1.0, np.nan)
+    return {
+        "dephasage_h": lag * nan,
+        "amortissement": decrement * nan,
+        "t_si": t_si * nan[:, None],
+        "t_si_max": t_si.max(axis=1) * nan,
+        "t_ext": t_ext,
+        "heures": times / 3600,
+    }
+
+
+def evaluate(
+    layers: pd.DataFrame,
+    df: pd.DataFrame,
+    t_mean: float = T_EXT_MEAN,
+    amplitude: float = T_EXT_AMPLITUDE,
+    t_int: float = T_INT,
+) -> pd.DataFrame:
+    """Déphasage, amortissement et surface intérieure maximale de chaque paroi de `layers`."""
+    names, e_m, props = walls.layer_arrays(
+        layers, df, ["conductivite_w_mk", "masse_volumique_kg_m3", "capacite_thermique_j_kgk"]
+    )
+    out = simulate(
+        e_m,
+        props["conductivite_w_mk"],
+        props["masse_volumique_kg_m3"],
+        props["capacite_thermique_j_kgk"],
+        t_mean=t_mean,
+        amplitude=amplitude,
+        t_int=t_int,
+    )
+    return pd.DataFrame({
+        "assemblage": names,
+        "dephasage_h": np.round(out["dephasage_h"], 2),
+        "amortissement": np.round(out["amortissement"], 3),
+        "t_si_max_c": np.round(out["t_si_max"], 2),
+    })
@@ -0,0 +1,146 @@
+"""
+Évaluation de parois multicouches (murs, toitures, planchers) par lots.
+
+Une paroi est une suite de couches (id du matériau + épaisseur), de
+l'extérieur vers l'intérieur. Toutes les couches de toutes les parois
+forment une seule table ; les propriétés des matériaux y sont jointes par
+position, puis chaque total est une somme par paroi (`np.bincount`).
+
+Formats acceptés :
+- CSV (séparateur ; ou ,) : une ligne par couche, colonnes `assemblage`,
+  `id`, `epaisseur_cm` (et `couche` pour l'ordre, sinon l'ordre des lignes) ;
+- JSON : la même table en liste d'objets, ou une liste de parois
+  `{"assemblage": "...", "couches": [{"id": 3, "epaisseur_cm": 12}, ...]}`.
+"""
+import io
+import json
+
+import numpy as np
+import pandas as pd
+
+# Résistances superficielles intérieure / extérieure d'une paroi verticale
+# (flux horizontal), en m²K/W
+RSI = 0.13
+RSE = 0.04
+
+LAYER_COLUMNS = ["assemblage", "couche", "id", "epaisseur_cm"]
+
+
+def read_layers(data: bytes, filename: str) -> pd.DataFrame:
+    """Table des couches (assemblage, couche, id, epaisseur_cm) d'un fichier CSV ou JSON."""
+    if filename.lower().endswith(".json"):
+        raw = json.loads(data.decode("utf-8"))
+        if isinstance(raw, dict):
+            raw = raw.get("assemblages", [raw])
+        rows = []
+        for item in raw:
+            if "couches" in item:
+                for k, layer in enumerate(item["couches"]):
+                    rows.append({"assemblage": item.get("assemblage", item.get("nom")), "couche": k + 1, **layer})
+            else:
+                rows.append(item)
+        layers = pd.DataFrame(rows)
+    else:
+        layers = pd.read_csv(io.BytesIO(data), sep=None, engine="python", dtype=str)
+
+    layers.columns = [str(c).strip().lower() for c in layers.columns]
+    missing = [c for c in ("assemblage", "id", "epaisseur_cm") if c not in layers.columns]
+    if missing:
+        raise ValueError(f"colonne(s) manquante(s) : {', '.join(missing)}")
+
+    if "couche" not in layers.columns:
+        layers["couche"] = layers.groupby("assemblage", sort=False).cumcount() + 1
+    layers["couche"] = pd.to_numeric(layers["couche"], errors="coerce")
+    layers["id"] = pd.to_numeric(layers["id"], errors="coerce")
+    # Virgule décimale acceptée (export Excel français)
+    layers["epaisseur_cm"] = pd.to_numeric(
+        layers["epaisseur_cm"].astype(str).str.replace(",", ".", regex=False), errors="coerce"
+    )
+    layers = layers.dropna(subset=["assemblage", "id", "epaisseur_cm"])
+    layers = layers.sort_values(["assemblage", "couche"], kind="stable")
+    return layers[LAYER_COLUMNS].reset_index(drop=True)
+
+
+def join_materials(layers: pd.DataFrame, df: pd.DataFrame) -> np.ndarray:
+    """Position dans `df` du matériau de chaque couche (-1 si id inconnu)."""
+    id_values = df["id"].to_numpy()
+    ids = layers["id"].to_numpy(dtype=id_values.dtype)
+    pos = np.minimum(np.searchsorted(id_values, ids), len(id_values) - 1)
+    return np.where(id_values[pos] == ids, pos, -1)
+
+
+def _take(df: pd.DataFrame, col: str, pos: np.ndarray) -> np.ndarray:
+    """Valeurs de `col` aux positions jointes (NaN pour un id inconnu)."""
+    values = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(pos >= 0, values[np.maximum(pos, 0)], np.nan)
+
+
+def layer_arrays(layers: pd.DataFrame, df: pd.DataFrame, columns) -> tuple:
+    """
+    Couches rangées en tableaux (N parois, L couches max), de l'extérieur
+    vers l'intérieur : (noms des parois, épaisseurs en m, {col: valeurs}).
+    Les cases sans couche ont une épaisseur 0 et des valeurs NaN.
+    """
+    codes, names = pd.factorize(layers["assemblage"], sort=False)
+    n = len(names)
+    rank = pd.Series(codes).groupby(codes).cumcount().to_numpy()
+    width = int(rank.max()) + 1 if len(rank) else 0
+    pos = join_materials(layers, df)
+
+    e_m = np.zeros((n, width))
+    e_m[codes, rank] = layers["epaisseur_cm"].to_numpy(dtype="float64") / 100.0
+    values = {}
+    for col in columns:
+        arr = np.full((n, width), np.nan)
+        arr[codes, rank] = _take(df, col, pos)
+        values[col] = arr
+    return names, e_m, values
+
+
+def evaluate(layers: pd.DataFrame, df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Résultats par paroi : R total (somme des R_i = e / λ des couches dont λ
+    est connu), U = 1 / (Rsi + R + Rse), éco-score pondéré par l'épaisseur,
+    CO₂ intrinsèque (ρ · e · CO₂/kg) et coût (somme des coûts au m²).
+    """
+    codes, names = pd.factorize(layers["assemblage"], sort=False)
+    n = len(names)
+    pos = join_materials(layers, df)
+    e_cm = layers["epaisseur_cm"].to_numpy(dtype="float64")
+
+    r_cm = _take(df, "r_par_cm_m2kw", pos)
+    eco = _take(df, "eco_score", pos)
+    rho = _take(df, "masse_volumique_kg_m3", pos)
+    co2 = _take(df, "empreinte_carbone_kgco2e_kg", pos)
+    cost = _take(df, "cout_eur_m2", pos)
+
+    def per_wall(x):
+        return np.bincount(codes, weights=np.nan_to_num(x), minlength=n)
+
+    def known(x):
+        return np.bincount(codes, weights=~np.isnan(x), minlength=n)
+
+    thickness = per_wall(e_cm)
+
+    # Même formule que le scénario de paroi : R_i = e × (R par cm) = e / λ
+    r_layers = e_cm * r_cm
+    r_total = np.where(known(r_layers) > 0, per_wall(r_layers), np.nan)
+
+    # Éco-score moyen pondéré par l'épaisseur (épaisseur totale au dénominateur)
+    has_eco = (known(eco) > 0) & (thickness > 0)
+    eco_wall = np.where(has_eco, per_wall(e_cm * eco) / np.where(thickness > 0, thickness, 1), np.nan)
+
+    co2_layers = rho * e_cm / 100.0 * co2
+
+    return pd.DataFrame({
+        "assemblage": names,
+        "nb_couches": np.bincount(codes, minlength=n),
+        "epaisseur_cm": thickness,
+        "R_m2kw": r_total,
+        "U_w_m2k": 1.0 / (RSI + r_total + RSE),
+        "eco_score": np.round(eco_wall, 1),
+        "co2_kgco2e_m2": np.where(known(co2_layers) > 0, per_wall(co2_layers), np.nan),
+        "cout_eur_m2": np.where(known(cost) > 0, per_wall(cost), np.nan),
+        "couches_incompletes": np.bincount(codes, weights=np.isnan(r_layers) | np.isnan(co2_layers), minlength=n).astype(int),
+        "ids_inconnus": np.bincount(codes, weights=pos < 0, minlength=n).astype(int),
+    })